@@ -0,0 +1,191 @@
+# adcsampler.py -- ADC sampling in the background, off of the Eventer's polling path
+#
+# An ADCSampler reads an ADC from a machine.Timer callback at a fixed rate, keeping the most
+#   recent samples in a ring buffer, and its read_u16() returns their average.  Since it looks
+#   just like a machine.ADC, it can be given to an analog eventoid in place of the ADC itself:
+#
+#       adc = ADCSampler(ADC(26), size=16, freq_hz=1000)
+#       eo  = EventoidAnalogLevel(eventer, events, adc, 32768, 1000)
+#
+#   and each poll then costs a division rather than a conversion, sees a value averaged over
+#   the last size samples no matter how seldom it's polled, and the sampling rate no longer
+#   depends on how often the eventer gets around to polling.
+#
+# The timer callback doesn't allocate memory: the samples are kept in a preallocated array,
+#   along with a running total that's updated as samples enter and leave it.
+#
+# An ADCScanner shares the ADC among several channels (and eventoids): each scan() reads every
+#   channel once, one right after the other, into an array, either from a timer callback or at
+#   the start of every Eventer poll pass.  Its channel(i) objects also look like machine.ADCs,
+#   whose read_u16() just returns channel i's value from the latest scan, so the eventoids can
+#   be given those instead:
+#
+#       scanner = ADCScanner((ADC(26), ADC(27), ADC(28)), eventer=eventer)
+#       eo_a = EventoidAnalogLevel(eventer, events_a, scanner.channel(0), 32768, 1000)
+#       eo_b = EventoidAnalogMultirange(eventer, events_b, scanner.channel(1), 8)
+#
+#   This way every channel is converted exactly once per pass however many eventoids read it,
+#   and all of the values that the eventoids see in a pass were sampled at (nearly) the same time.
+#
+# read_oversampled() is how the analog eventoids read their ADC on every poll.  To reduce noise, it
+#   can average oversample ADC reads, at the cost of the time to convert each of them on every poll;
+#   for averaging without that, give the eventoid an ADCSampler as its adc to have the ADC read in
+#   the background instead.  The averaged value is then passed through the eventoid's filter, if any.
+#
+# Last modified 16-Oct-2026 23:05
+
+from machine import Timer
+from array import array
+import machine, time
+
+def read_oversampled(adc, oversample=1, filter=None):
+    """ read_oversampled(): average of oversample reads of adc, passed through filter if there is one """
+    if oversample == 1:
+        val = adc.read_u16()
+    else:
+        val = 0
+        for _ in range(oversample):
+            val += adc.read_u16()
+        val //= oversample
+    return val if filter is None else filter.update(val)
+
+class ADCSampler:
+    """Timer-driven averaging sampler of one ADC, usable wherever a machine.ADC is."""
+
+    def __init__(self, adc, size=8, freq_hz=1000, timer_id=-1, start=True):
+        """
+        ADCSampler() - sample an ADC in the background
+
+        adc - instance of machine.ADC to sample
+        size - number of samples to average [type: int]
+        freq_hz - samples per second [type: int]
+        timer_id - (optional) id of the machine.Timer to use, -1 for a virtual timer
+        start - (optional) start sampling right away
+        """
+        self.adc      = adc
+        self.size     = size
+        self.freq_hz  = freq_hz
+        self.timer_id = timer_id
+        self.samples  = 0                # total samples taken, for diagnostics
+
+        self._ring  = array('H', [0] * size)
+        self._i     = 0
+        self._n     = 0                  # samples in the ring, until it's full
+        self._sum   = 0
+        self._timer = None
+        self._sample_ref = self._sample  # bound once, so that (re)starting the timer doesn't allocate
+
+        if start:
+            self.start()
+
+    def __repr__(self):
+        return "ADCSampler(adc="+str(self.adc)+",size="+str(self.size)+",freq_hz="+str(self.freq_hz)+\
+               ",samples="+str(self.samples)+",running="+str(self._timer is not None)+")"
+
+    def start(self):
+        """ start(): start sampling, with an empty ring (the first read_u16() samples directly) """
+        self.stop()
+        self._i   = 0
+        self._n   = 0
+        self._sum = 0
+        self._timer = Timer(self.timer_id)
+        self._timer.init(mode=Timer.PERIODIC, freq=self.freq_hz, callback=self._sample_ref)
+
+    def stop(self):
+        """ stop(): stop sampling, read_u16() keeps returning the average of the samples taken so far """
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+
+    def deinit(self):
+        self.stop()
+
+    def _sample(self, _):
+        v = self.adc.read_u16()
+        i = self._i
+        if self._n == self.size:
+            self._sum -= self._ring[i]
+        else:
+            self._n += 1
+        self._ring[i] = v
+        self._sum += v
+        self._i = 0 if i+1 == self.size else i+1
+        self.samples += 1
+
+    def read_u16(self):
+        """ read_u16(): average of the samples in the ring, like machine.ADC.read_u16() """
+        mask = machine.disable_irq()          # the sum and count have to match
+        s = self._sum
+        n = self._n
+        machine.enable_irq(mask)
+        if n == 0:                            # nothing sampled yet
+            return self.adc.read_u16()
+        return s // n
+
+class ADCChannel:
+    """One channel of an ADCScanner, usable wherever a machine.ADC is."""
+
+    def __init__(self, scanner, index):
+        self.scanner = scanner
+        self.index   = index
+
+    def __repr__(self):
+        return "ADCChannel("+str(self.scanner.adcs[self.index])+")"
+
+    def read_u16(self):
+        return self.scanner.values[self.index]
+
+class ADCScanner:
+    """Sweeps a set of ADCs into an array, from a timer or once per Eventer poll pass."""
+
+    def __init__(self, adcs, eventer=None, freq_hz=None, timer_id=-1):
+        """
+        ADCScanner() - sample several ADCs together
+
+        adcs - instances of machine.ADC (or anything with a read_u16()) to scan [type: sequence]
+        eventer - (optional) Eventer to scan at the start of every poll pass of
+        freq_hz - (optional) scans per second from a timer, instead of per poll pass [type: int]
+        timer_id - (optional) id of the machine.Timer to use, -1 for a virtual timer
+        """
+        self.adcs     = tuple(adcs)
+        self.values   = array('H', [0] * len(self.adcs))
+        self.channels = tuple([ADCChannel(self, i) for i in range(len(self.adcs))])
+        self.scans    = 0                     # total scans, for diagnostics
+        self.t_scan   = 0                     # ticks_ms of the latest scan
+        self.eventer  = None
+        self.freq_hz  = freq_hz
+        self._timer   = None
+        self._scan_ref = self.scan            # bound once, to add and later remove the same one
+
+        self.scan()                           # so that the channels have values from the start
+        if freq_hz is not None:
+            self._timer = Timer(timer_id)
+            self._timer.init(mode=Timer.PERIODIC, freq=freq_hz, callback=self._scan_ref)
+        elif eventer is not None:
+            self.eventer = eventer
+            eventer.add_poll_hook(self._scan_ref)
+
+    def __repr__(self):
+        return "ADCScanner(adcs="+str(self.adcs)+",freq_hz="+str(self.freq_hz)+",scans="+str(self.scans)+")"
+
+    def channel(self, i):
+        """ channel(): the ADC-like object for the i'th ADC """
+        return self.channels[i]
+
+    def scan(self, _=None):
+        """ scan(): read every ADC, in order, into values """
+        values = self.values
+        i = 0
+        for adc in self.adcs:
+            values[i] = adc.read_u16()
+            i += 1
+        self.t_scan = time.ticks_ms()
+        self.scans += 1
+
+    def deinit(self):
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+        if self.eventer is not None:
+            self.eventer.remove_poll_hook(self._scan_ref)
+            self.eventer = None
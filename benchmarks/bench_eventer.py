@@ -0,0 +1,198 @@
+# bench_eventer.py: throughput, polling cost, latency and allocation benchmarks for the eventer
+#
+# Runs either on the MCU (copy it alongside the library) or on the host under CPython using the
+#   simulated machine module in ../sim:
+#       python benchmarks/bench_eventer.py [output.json]
+#
+# Results are printed as a single line of JSON (and also written to the file given, if any), so
+#   that runs can be compared against each other to catch performance regressions.
+#
+# All times are real (not simulated) microseconds, even on the host.  On the MCU, allocations are
+#   measured exactly with gc.mem_alloc() while the garbage collector is off; on the host they are the
+#   growth in memory traced by tracemalloc, which only approximates it.
+#
+# Last modified 16-Oct-2026 16:20
+
+import sys, gc, json
+
+ON_MCU = sys.implementation.name == "micropython"
+if not ON_MCU:
+    import os
+    ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path[0:0] = [os.path.join(ROOT, "sim"), ROOT]
+    import tracemalloc
+
+import time
+from machine import Pin, ADC
+from eventer import Eventer
+from eventoid_gpio import EventoidGPIOPolled
+from eventoid_timer import EventoidTimerPolled
+from eventoid_analevel import EventoidAnalogLevel
+from eventoid_anarange import EventoidAnalogMultirange
+
+N_QUEUE     = 2000     # events through the queue
+N_PASSES    = 200      # poll passes per measurement
+N_LATENCY   = 200      # signal changes for the latency measurement
+EVENTOID_NS = (1, 8, 32)
+
+PIN_SIGNAL  = 16       # GPIO (as an output, which reads back its own value) standing in for a signal
+PIN_ADC     = 26
+
+EVENT_A = 0
+EVENT_B = 1
+
+if ON_MCU:
+    def now_us():
+        return time.ticks_us()
+    def elapsed_us(t0):
+        return time.ticks_diff(time.ticks_us(), t0)
+else:
+    def now_us():
+        return time.perf_counter_ns() // 1000
+    def elapsed_us(t0):
+        return (time.perf_counter_ns() // 1000) - t0
+
+def alloc_start():
+    gc.collect()
+    if ON_MCU:
+        gc.disable()
+        return gc.mem_alloc()
+    tracemalloc.start()
+    return tracemalloc.get_traced_memory()[0]
+
+def alloc_end(m0):
+    if ON_MCU:
+        m = gc.mem_alloc() - m0
+        gc.enable()
+        return m
+    m = tracemalloc.get_traced_memory()[0] - m0
+    tracemalloc.stop()
+    return m
+
+def bench_queue():
+    """add()/next() and add_isr()/next() throughput through a queue that's kept half-full"""
+    results = dict()
+    for (name, isr) in (("add", False), ("add_isr", True)):
+        eventer = Eventer(queue_size=64)
+        e = (EVENT_A, 0, None)
+        for i in range(32):
+            eventer.add(e)
+        def run():
+            for i in range(N_QUEUE):
+                if isr:
+                    eventer.add_isr(EVENT_A, i, i)
+                else:
+                    eventer.add(e)
+                eventer.next()
+        t0 = now_us()
+        run()
+        us = elapsed_us(t0)
+        m0 = alloc_start()              # separately, so that tracing doesn't skew the timing
+        run()
+        alloc = alloc_end(m0)
+        results[name] = { 'events_per_sec': int(N_QUEUE * 1000000 / max(us, 1)),
+                          'us_per_event':   us / N_QUEUE,
+                          'bytes_per_event': alloc / N_QUEUE }
+    return results
+
+def make_gpio(eventer, i):
+    return EventoidGPIOPolled(eventer, (EVENT_A, EVENT_B), Pin(PIN_SIGNAL, Pin.OUT, value=0))
+
+def make_timer_idle(eventer, i):
+    return EventoidTimerPolled(eventer, EVENT_A)
+
+def make_timer_running(eventer, i):
+    t = EventoidTimerPolled(eventer, EVENT_A)
+    t.start(3600000 + i)
+    return t
+
+def make_analevel(eventer, i):
+    return EventoidAnalogLevel(eventer, (EVENT_A, EVENT_B), ADC(PIN_ADC), 32768, 1000)
+
+def make_anarange(eventer, i):
+    return EventoidAnalogMultirange(eventer, (EVENT_A, EVENT_B), ADC(PIN_ADC), 8)
+
+EVENTOID_TYPES = (("gpio",          make_gpio,          False),
+                  ("timer_idle",    make_timer_idle,    False),
+                  ("timer_running", make_timer_running, False),
+                  ("timer_service", make_timer_running, True),
+                  ("analevel",      make_analevel,      False),
+                  ("anarange",      make_anarange,      False))
+
+def bench_poll():
+    """cost of a poll pass that finds nothing, per eventoid, for each eventoid type and count"""
+    results = dict()
+    for (name, make, timer_service) in EVENTOID_TYPES:
+        results[name] = dict()
+        for n in EVENTOID_NS:
+            eventer = Eventer(timer_service=timer_service)
+            for i in range(n):
+                eventer.register(make(eventer, i))
+            eventer.poll()
+            t0 = now_us()
+            for i in range(N_PASSES):
+                eventer.poll()
+            us = elapsed_us(t0)
+            m0 = alloc_start()
+            for i in range(N_PASSES):
+                eventer.poll()
+            alloc = alloc_end(m0)
+            results[name][str(n)] = { 'us_per_pass':     us / N_PASSES,
+                                      'us_per_eventoid': us / (N_PASSES * n),
+                                      'bytes_per_pass':  alloc / N_PASSES }
+    return results
+
+class _Done(Exception):
+    pass
+
+def bench_latency():
+    """time from a GPIO signal change to the process_func call in Eventer.loop(), with n other eventoids"""
+    results = dict()
+    for n in EVENTOID_NS:
+        eventer = Eventer()
+        for i in range(n - 1):                  # quiet eventoids polled ahead of the one that sees the change
+            eventer.register(make_timer_running(eventer, i))
+        pin = Pin(PIN_SIGNAL, Pin.OUT, value=0)
+        eventer.register(EventoidGPIOPolled(eventer, (EVENT_A, EVENT_B), pin))
+
+        samples = []
+        changed = [None]
+
+        def loop_hook(state):
+            if changed[0] is None:
+                if len(samples) == N_LATENCY:
+                    raise _Done()
+                changed[0] = now_us()
+                pin.toggle()
+
+        def process(state, event, event_ms, event_data):
+            samples.append(elapsed_us(changed[0]))
+            changed[0] = None
+            return state
+
+        eventer.set_loop_hook(loop_hook)
+        try:
+            eventer.loop(process, 0)
+        except _Done:
+            pass
+
+        samples.sort()
+        results[str(n)] = { 'us_min':    samples[0],
+                            'us_median': samples[len(samples) // 2],
+                            'us_p99':    samples[(len(samples) * 99) // 100],
+                            'us_max':    samples[-1] }
+    return results
+
+def main():
+    results = { 'platform': sys.platform,
+                'implementation': sys.implementation.name,
+                'queue':   bench_queue(),
+                'poll':    bench_poll(),
+                'latency': bench_latency() }
+    s = json.dumps(results)
+    print(s)
+    if (not ON_MCU) and (len(sys.argv) > 1):
+        with open(sys.argv[1], "w") as f:
+            f.write(s + "\n")
+
+main()
@@ -4,13 +4,107 @@
 # Note that any time that the event queue is manipulated, interrupts must be turned
 #   off to prevent it from being corrupted by interrupt-induced race conditions.
 #
+# When there is nothing to do, loop() can optionally idle (rather than spin) until the
+#   earliest time that any polled eventoid next needs attention, or until an interrupt
+#   queues an event, whichever comes first.  Each eventoid reports that deadline through
+#   Eventoid.ms_to_deadline().
+#
+# Polled eventoids can be registered with a poll period (and phase), in which case they are
+#   only polled once their period has elapsed rather than on every poll pass.  The polled
+#   eventoids are kept sorted by period, so that the ones needing the most frequent polling
+#   are polled first (rate-monotonic priority), with registration order breaking any ties.
+#   An explicit priority given at registration overrides the period when sorting.
+#
+# By default a poll pass stops as soon as one eventoid queues an event ("one and done"), and
+#   the next pass starts over from the top, so a chattering eventoid near the top can keep
+#   every one below it from ever being polled.  The poll policy and the number of events
+#   allowed per pass are selectable to bound how long that can go on, and the longest gap
+#   between polls of each eventoid is recorded so that it can be checked.
+#
+# Profiling can be turned on (and off) at any time with set_profiling(), after which each
+#   eventoid's poll times and event counts, and the time taken by process_func for each
+#   (state,event) dispatched by loop(), are accumulated for retrieval with stats().  When
+#   profiling is off, the only cost is checking that it's off once per poll/dispatch.
+#
 # Written by Eric Wertz (eric@edushields.com)
-# Last modified 18-Sep-2022 15:49
+# Last modified 16-Oct-2026 23:55
 
 import micropython, machine, time
+from micropython import const
+from array import array
+from eventqueue import EventQueue, OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST, OVERFLOW_RAISE
+from timerservice import TimerService
+
+try:
+    import threading                # only for IDLE_EVENT, when not running on an MCU
+except ImportError:
+    threading = None
 
 micropython.alloc_emergency_exception_buf(100)
 
+# how loop() waits when there are no events to process
+IDLE_SPIN       = const(0)   # don't wait, poll again immediately (the original behavior)
+IDLE_WFI        = const(1)   # machine.idle() until the deadline or an interrupt has queued an event
+IDLE_LIGHTSLEEP = const(2)   # machine.lightsleep() until the deadline or a wake-capable interrupt
+IDLE_EVENT      = const(3)   # threading.Event wait, ended early by an add() from another thread
+
+# which eventoid a poll pass starts with
+POLL_PRIORITY    = const(0)  # always the highest priority one (the original behavior)
+POLL_ROUND_ROBIN = const(1)  # the one after the last one to queue an event
+
+# poll schedule entry layout: [eventoid, period_ms, next_due_ticks_ms, id, priority, last_poll_ticks_ms, max_gap_ms]
+_SCHED_EO       = const(0)
+_SCHED_PERIOD   = const(1)
+_SCHED_DUE      = const(2)
+_SCHED_ID       = const(3)
+_SCHED_PRIO     = const(4)
+_SCHED_LAST     = const(5)
+_SCHED_GAP_MAX  = const(6)
+
+_HIST_BUCKETS = const(20)    # log2 buckets of profiled durations: [0], [1], [2-3], [4-7], ... usecs
+
+class _Timing:
+    """Accumulated profile of one eventoid's polls, or of one (state,event)'s dispatches."""
+
+    def __init__(self):
+        self.count    = 0
+        self.events   = 0
+        self.us_total = 0
+        self.us_min   = None
+        self.us_max   = 0
+        self.hist     = array('I', [0] * _HIST_BUCKETS)
+
+    def record(self, us):
+        self.count    += 1
+        self.us_total += us
+        if (self.us_min is None) or (us < self.us_min):
+            self.us_min = us
+        if us > self.us_max:
+            self.us_max = us
+        b = 0
+        while us and (b < _HIST_BUCKETS-1):
+            us >>= 1
+            b += 1
+        self.hist[b] += 1
+
+    def percentile_us(self, pct):
+        """Upper bound of the histogram bucket holding the pct'th percentile duration."""
+        if self.count == 0:
+            return None
+        n = (self.count * pct + 99) // 100
+        for b in range(_HIST_BUCKETS):
+            n -= self.hist[b]
+            if n <= 0:
+                return min((1 << b) - 1 if b else 0, self.us_max)
+        return self.us_max
+
+    def as_dict(self):
+        return { 'count': self.count, 'events': self.events, 'us_total': self.us_total,
+                 'us_min': self.us_min, 'us_max': self.us_max,
+                 'us_avg': (self.us_total // self.count) if self.count else None,
+                 'us_p50': self.percentile_us(50), 'us_p90': self.percentile_us(90),
+                 'us_p99': self.percentile_us(99) }
+
 class StateMachineException(Exception):
     pass
 
@@ -23,7 +117,9 @@ class Eventer:
     and queues them up for retrieval, usually by a state machine.
     """
 
-    def __init__(self, trace=False, trace_info=None):
+    def __init__(self, trace=False, trace_info=None, queue_size=32, overflow=OVERFLOW_DROP_OLDEST,
+                 idle=IDLE_SPIN, idle_max_ms=1000, timer_service=False,
+                 poll_policy=POLL_PRIORITY, max_events_per_pass=1):
         """
         Create an event-checker object with an internal queue for holding pending events.
 
@@ -32,70 +128,275 @@ class Eventer:
                      event values to strings.  If None or either tuple member is None, then str(val)
                      will be used instead.
                      [type: None | (None|dict(state_val, str), None|dict(event_val, str))]
+        queue_size - (optional) maximum number of pending events, preallocated up front [type: int]
+        overflow - (optional) what to do when an event is added to a full queue [type: OVERFLOW_*]
+                   OVERFLOW_DROP_OLDEST - discard the oldest pending event to make room
+                   OVERFLOW_DROP_NEWEST - discard the event being added
+                   OVERFLOW_RAISE       - discard the event being added and raise EventerException
+        idle - (optional) how loop() waits for the next deadline when no events are pending [type: IDLE_*]
+        idle_max_ms - (optional) longest that loop() will idle at once, even without a pending deadline [type: int]
+        timer_service - (optional) keep all EventoidTimerPolled expirations in one shared heap
+                        rather than polling each timer individually [type: bool]
+        poll_policy - (optional) which eventoid each poll pass starts with [type: POLL_*]
+                      POLL_PRIORITY    - the highest priority eventoid
+                      POLL_ROUND_ROBIN - the eventoid following the last one to queue an event
+        max_events_per_pass - (optional) end the poll pass after this many eventoids have queued events,
+                              or None to poll every due eventoid on every pass [type: None | int]
         """
+        if (idle == IDLE_EVENT) and (threading is None):
+            raise EventerException("IDLE_EVENT requires threading")
         self.trace = trace
         (self.state_str, self.event_str) = (None, None) if trace_info is None else trace_info
 
-        self._queue            = list()
-        self._requires_polling = 0
+        self._queue            = EventQueue(queue_size, overflow)
+        self._schedule         = []       # polled eventoids, in rate-monotonic order
         self._next_id          = 0
         self.eventoids         = dict()
         self._pollhook         = None
+        self._pollhooks        = []       # add_poll_hook() functions, called at the start of every poll pass
         self._loophook         = None
+        self.timers            = TimerService() if timer_service else None
+
+        self._poll_policy        = poll_policy
+        self.max_events_per_pass = max_events_per_pass
+        self._rr_next            = 0      # POLL_ROUND_ROBIN: index in _schedule where the next pass starts
+
+        self._prof_polls    = None        # when profiling: dict of eventoid id to _Timing
+        self._prof_dispatch = None        # when profiling: dict of (state,event) to _Timing
+
+        self._idle        = idle
+        self.idle_max_ms  = idle_max_ms
+        self._wake        = threading.Event() if idle == IDLE_EVENT else None
+        self._wait_event  = getattr(machine, "sim_wait_event", None)   # waits in virtual time, under the simulator
+        self._idle_stats  = { 'idles': 0, 'idle_ms': 0, 'wakes_deadline': 0, 'wakes_event': 0, 'wakes_timeout': 0,
+                              'wake_latency_ms_last': 0, 'wake_latency_ms_max': 0 }
+
+    def register(self, eo, period_ms=0, phase_ms=0, priority=None):
+        """
+        Add an eventoid to those managed by this Eventer.  Returns the id to unregister() it with.
 
-    def register(self, eo):
+        eo - the eventoid
+        period_ms - (optional) poll the eventoid only every period_ms msecs, or on every poll pass if 0 [type: int]
+        phase_ms - (optional) msecs from now until the first poll, to keep eventoids with the same period
+                   from all coming due in the same poll pass [type: int]
+        priority - (optional) polling priority, lower values polled first, or None to use period_ms [type: int]
+        """
         id = self._next_id
         self.eventoids[id] = eo
 
         eo.set_queue(self._queue)
         if eo.is_polled():
-            self._requires_polling += 1
+            if priority is None:
+                priority = period_ms
+            now = time.ticks_ms()
+            entry = [eo, period_ms, time.ticks_add(now, phase_ms), id, priority, now, 0]
+            schedule = self._schedule
+            i = len(schedule)
+            while (i > 0) and (schedule[i-1][_SCHED_PRIO] > priority):
+                i -= 1
+            schedule.insert(i, entry)
         self._next_id += 1
+        return id
 
-    # FIXME: this is entirely untested
     def unregister(self, id):
         if self.eventoids.get(id) is None:
             raise EventerException("No such eventoid id: "+str(id))
 
         eo = self.eventoids[id]
-        if eo.is_polled:
-            self._requires_polling -= 1
+        if eo.is_polled():
+            schedule = self._schedule
+            for i in range(len(schedule)):
+                if schedule[i][_SCHED_ID] == id:
+                    del schedule[i]
+                    if i < self._rr_next:          # keep the round robin on the same eventoid
+                        self._rr_next -= 1
+                    break
         eo.deinit()
         del self.eventoids[id]
 
     def requires_polling(self):
-        return bool(self._requires_polling)
+        return bool(self._schedule) or (self.timers is not None)
 
     def set_poll_hook(self, func):
         self._pollhook = func
 
+    def add_poll_hook(self, func):
+        """
+        Call func() at the start of every poll pass (after the set_poll_hook() function, if any), e.g. for
+          refreshing data that several eventoids share, like adcsampler.ADCScanner.scan().
+        """
+        self._pollhooks.append(func)
+
+    def remove_poll_hook(self, func):
+        self._pollhooks.remove(func)
+
     def poll(self):
         """
         Poll all of the eventoids that requrie it for changes since last called.
         The order in which they are checked/queued implicitly dictates their priority,
-          which is the order in which they were registered.
-        The current implementation only allows one (polled) event to be queued at a time because
+          which is the order of their priorities or poll periods (lowest first), and then the order
+          in which they were registered.  With POLL_ROUND_ROBIN, each pass starts just after the
+          eventoid that queued the last event, wrapping around, rather than at the top.
+        Eventoids registered with a poll period are skipped until their next poll is due.
+        By default only one (polled) event is allowed to be queued at a time because
           this helps to limit race conditions in users' programs that are very difficult to defend against --
           one example being the race between pressing a button to cancel a timer and the timer going
-          off anyways.
+          off anyways.  max_events_per_pass can raise (or remove) that limit.
+        Timers in the TimerService (if any) are expired before any eventoid is polled.
         
         params: none
         """
         if self._pollhook is not None:
             self._pollhook()
+        for hook in self._pollhooks:
+            hook()
+
+        limit   = self.max_events_per_pass
+        evented = 0
+        prof    = self._prof_polls
+        if self.timers is not None:
+            if prof is None:
+                expired = self.timers.poll()
+            else:
+                expired = self._poll_profiled("timers", self.timers, prof)
+            if expired:
+                evented = 1
+                if limit == 1:
+                    return
 
-        if self._requires_polling == 0:
-            return
-        for eo in self.eventoids.values():
-            if eo.is_polled():
-                if eo.poll():    # one and done
+        schedule = self._schedule
+        n = len(schedule)
+        start = self._rr_next if self._poll_policy == POLL_ROUND_ROBIN else 0
+        if start >= n:
+            start = 0
+
+        now = time.ticks_ms()
+        for k in range(n):
+            i = start + k
+            if i >= n:
+                i -= n
+            entry = schedule[i]
+            period = entry[_SCHED_PERIOD]
+            if period:
+                due = entry[_SCHED_DUE]
+                if time.ticks_diff(now, due) < 0:
+                    continue
+                due = time.ticks_add(due, period)
+                if time.ticks_diff(now, due) >= 0:    # fell a whole period behind, don't try to catch up
+                    due = time.ticks_add(now, period)
+                entry[_SCHED_DUE] = due
+
+            gap = time.ticks_diff(now, entry[_SCHED_LAST])
+            if gap > entry[_SCHED_GAP_MAX]:
+                entry[_SCHED_GAP_MAX] = gap
+            entry[_SCHED_LAST] = now
+
+            if prof is None:
+                polled = entry[_SCHED_EO].poll()
+            else:
+                polled = self._poll_profiled(entry[_SCHED_ID], entry[_SCHED_EO], prof)
+            if polled:
+                evented += 1
+                if (limit is not None) and (evented >= limit):    # (by default) one and done
+                    self._rr_next = i + 1
                     return
 
+    def _poll_profiled(self, key, eo, prof):
+        timing = prof.get(key)
+        if timing is None:
+            timing = prof[key] = _Timing()
+        queue = self._queue
+        n0 = queue.appended
+        t0 = time.ticks_us()
+        polled = eo.poll()
+        timing.record(time.ticks_diff(time.ticks_us(), t0))
+        timing.events += (queue.appended - n0) & 0x3FFFFFFF
+        return polled
+
+    def set_profiling(self, enabled=True):
+        """Start (or stop) accumulating poll and dispatch statistics for stats().  Keeps any so far."""
+        if enabled:
+            if self._prof_polls is None:
+                self._prof_polls    = dict()
+                self._prof_dispatch = dict()
+        else:
+            self._prof_polls    = None
+            self._prof_dispatch = None
+
+    def stats(self, reset=False):
+        """
+        Return a dict of the statistics collected while running:
+          'polls' - per eventoid id (and 'timers' for the TimerService): number of polls, events queued,
+                    and total/min/max/average/percentile poll durations in usecs (only while profiling)
+          'dispatch' - the same, per (state,event) dispatched to process_func by loop() (only while profiling)
+          'poll_gaps' - see poll_gaps()
+          'idle' - see idle_stats()
+          'overflows' - see overflows()
+          'queued' - number of events currently waiting in the queue
+        Percentiles are approximate: the upper bound of the power-of-two bucket that they fall in.
+        reset - (optional) restart the profiling (and poll gap) statistics after reading them [type: bool]
+        """
+        stats = { 'polls': dict(), 'dispatch': dict(),
+                  'poll_gaps': self.poll_gaps(reset), 'idle': self.idle_stats(),
+                  'overflows': self.overflows(), 'queued': len(self._queue) }
+        if self._prof_polls is not None:
+            for (key, timing) in self._prof_polls.items():
+                stats['polls'][key] = timing.as_dict()
+            for (key, timing) in self._prof_dispatch.items():
+                stats['dispatch'][key] = timing.as_dict()
+            if reset:
+                self._prof_polls.clear()
+                self._prof_dispatch.clear()
+        return stats
+
+    def poll_gaps(self, reset=False):
+        """
+        Return a dict of eventoid id to the longest time (msecs) that it has gone between polls,
+          a measure of how long it can be starved of polling by the eventoids ahead of it.
+        reset - (optional) restart the measurement after reading it [type: bool]
+        """
+        now  = time.ticks_ms()
+        gaps = dict()
+        for entry in self._schedule:
+            # one that's still waiting for its next poll counts too
+            gaps[entry[_SCHED_ID]] = max(entry[_SCHED_GAP_MAX], time.ticks_diff(now, entry[_SCHED_LAST]))
+            if reset:
+                entry[_SCHED_GAP_MAX] = 0
+        return gaps
+
     def add(self, e):
         """Put an event in the queue for subsequent removal"""
         mask = machine.disable_irq()
-        self._queue.append(e)
+        queued = self._queue.append(e)
         machine.enable_irq(mask)
+        if self._wake is not None:
+            self._wake.set()
+
+        if not queued and (self._queue.overflow == OVERFLOW_RAISE):
+            raise EventerException("Event queue overflow, dropped "+str(e))
+
+    def add_isr(self, event, event_msecs, event_data=None):
+        """
+        Put an event in the queue from a hard interrupt handler.  Unlike add(), nothing is
+          allocated here -- the event tuple isn't built until next() returns it -- so the event
+          and its data are restricted to integers.
+        An event that doesn't fit in a full queue is dropped and counted, but no exception is
+          raised regardless of the overflow policy.
+        event - event id [type: int]
+        event_msecs - time of the event, usually time.ticks_ms() [type: int]
+        event_data - (optional) data to return with event [type: None | small int]
+        Returns False if the event was dropped, otherwise True.
+        """
+        mask = machine.disable_irq()
+        queued = self._queue.append_isr(event, event_msecs, event_data)
+        machine.enable_irq(mask)
+        if self._wake is not None:
+            self._wake.set()
+        return queued
+
+    def overflows(self):
+        """Return the number of events lost to a full queue since the Eventer was created."""
+        return self._queue.overflows
 
     def next(self):
         """
@@ -106,11 +407,91 @@ class Eventer:
         params: none
         """
         mask = machine.disable_irq()        # prevent queue corruption
-        e = self._queue.pop(0) if len(self._queue) else None
+        e = self._queue.popleft()
         machine.enable_irq(mask)
 
         return e
 
+    def ms_to_deadline(self):
+        """
+        Return the number of msecs until the earliest time that any polled eventoid needs to be
+          polled again, 0 if one needs polling now, or None if none of them has a deadline.
+        """
+        now = time.ticks_ms()
+        ms  = None if self.timers is None else self.timers.ms_to_deadline(now)
+        if (ms is not None) and (ms <= 0):
+            return 0
+        for entry in self._schedule:
+            d = entry[_SCHED_EO].ms_to_deadline(now)
+            if d is None:
+                continue
+            if entry[_SCHED_PERIOD]:              # not before its next scheduled poll, either
+                d = max(d, time.ticks_diff(entry[_SCHED_DUE], now))
+            if d <= 0:
+                return 0
+            if (ms is None) or (d < ms):
+                ms = d
+        return ms
+
+    def idle(self):
+        """
+        Wait, using the Eventer's IDLE_* method, until the next polling deadline (but no longer than
+          idle_max_ms) or until an event is queued.  Returns immediately if there already is one.
+        """
+        if (self._idle == IDLE_SPIN) or len(self._queue):
+            return
+        ms = self.ms_to_deadline()
+        if ms == 0:
+            return
+        if (ms is None) or (ms > self.idle_max_ms):
+            ms = self.idle_max_ms
+
+        queue = self._queue
+        t0 = time.ticks_ms()
+        deadline = time.ticks_add(t0, ms)
+
+        if self._idle == IDLE_WFI:
+            while (not len(queue)) and (time.ticks_diff(deadline, time.ticks_ms()) > 0):
+                machine.idle()
+        elif self._idle == IDLE_LIGHTSLEEP:
+            machine.lightsleep(ms)
+        else:
+            self._wake.clear()                  # forget add()s of events that have already been taken,
+            if not len(queue):                  #   but not one that's just been queued
+                if self._wait_event is not None:
+                    self._wait_event(self._wake, ms)
+                else:
+                    self._wake.wait(ms / 1000)
+
+        # wake latency: how long after the event (or the deadline) that we got going again
+        t1 = time.ticks_ms()
+        stats = self._idle_stats
+        stats['idles']   += 1
+        stats['idle_ms'] += time.ticks_diff(t1, t0)
+        mask = machine.disable_irq()
+        t_event = queue.head_time()
+        machine.enable_irq(mask)
+        if t_event is None:
+            if self.ms_to_deadline() != 0:     # woke without an event, before any deadline (e.g. idle_max_ms)
+                stats['wakes_timeout'] += 1
+                return
+            stats['wakes_deadline'] += 1
+            latency = time.ticks_diff(t1, deadline)
+        else:
+            stats['wakes_event'] += 1
+            latency = time.ticks_diff(t1, t_event)
+        latency = max(latency, 0)
+        stats['wake_latency_ms_last'] = latency
+        if latency > stats['wake_latency_ms_max']:
+            stats['wake_latency_ms_max'] = latency
+
+    def idle_stats(self):
+        """
+        Return a copy of the idling statistics: counts of idles and of their wakes by deadline, by event
+          and by neither (idle_max_ms having passed), total msecs idled, and wake latencies.
+        """
+        return dict(self._idle_stats)
+
     def set_loop_hook(self, func):
         self._loophook = func
 
@@ -137,7 +518,10 @@ class Eventer:
             if self.requires_polling():
                 self.poll()
 
-            if (e := self.next()) is not None:
+            if (e := self.next()) is None:
+                if self._idle != IDLE_SPIN:
+                    self.idle()
+            else:
                 (event, event_time, event_data) = e
                 if self.trace:
                     if event_str is None:
@@ -150,7 +534,12 @@ class Eventer:
                     if event_data is not None:
                         print(f":{event_data}", end="")
 
-                state_new = process_func(state, event, event_time, event_data)
+                if self._prof_dispatch is None:
+                    state_new = process_func(state, event, event_time, event_data)
+                else:
+                    t0 = time.ticks_us()
+                    state_new = process_func(state, event, event_time, event_data)
+                    self._record_dispatch(state, event, time.ticks_diff(time.ticks_us(), t0))
 
                 if trace:
                     print(" -> ", end="")
@@ -162,6 +551,16 @@ class Eventer:
                     print(s)
                 state = state_new
 
+    def _record_dispatch(self, state, event, us):
+        prof = self._prof_dispatch
+        if prof is None:                     # turned off by process_func
+            return
+        key = (state, event)
+        timing = prof.get(key)
+        if timing is None:
+            timing = prof[key] = _Timing()
+        timing.record(us)
+
     def err_bad_event_in_state(self, st, e, data):
         try:
             e_str = self.event_str[st]
@@ -6,11 +6,31 @@
 #   4. TODO: someday they might be asked to clean-up via deinit() if unregistered
 #
 # Written by Eric B. Wertz (eric@edushields.com)
-# Last modified 18-Sep-2022 17:27
+# Last modified 16-Oct-2026 21:00
 
 class EventoidException(Exception):
     pass
 
+# (MicroPython has no bisect module) index at which x would be inserted into the sorted sequence a,
+#   before any equal values for bisect_left(), after them for bisect_right()
+def bisect_left(a, x):
+    lo = 0
+    hi = len(a)
+    while lo < hi:
+        mid = (lo + hi) >> 1
+        if a[mid] < x: lo = mid + 1
+        else:          hi = mid
+    return lo
+
+def bisect_right(a, x):
+    lo = 0
+    hi = len(a)
+    while lo < hi:
+        mid = (lo + hi) >> 1
+        if x < a[mid]: hi = mid
+        else:          lo = mid + 1
+    return lo
+
 class Eventoid:
 
     def __init__(self, eventer, eo_type, requires_polling):
@@ -26,11 +46,18 @@ class Eventoid:
     def is_polled(self):
         return self._polled
 
+    # event_queue is the Eventer's (preallocated) EventQueue ring buffer
     def set_queue(self, event_queue):
         self.event_queue = event_queue
 
     # method for subclasses that use require polling rather than solely relying on interrupts
     def poll(self): pass
 
+    # msecs from now (ticks_ms) until this eventoid next needs to be polled, <= 0 if it needs it now,
+    #   or None if nothing can happen until something outside of polling (e.g. start()) changes that.
+    #   The Eventer won't poll sooner than the poll period that the eventoid was registered with anyways.
+    def ms_to_deadline(self, now):
+        return 0 if self._polled else None
+
     # currently unused method for cleaning up when unregistered from the Eventer.
     def deinit(self): pass
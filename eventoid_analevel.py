@@ -4,16 +4,20 @@
 # level, measured in ADC counts, as this the width of the hysteresis band on each side
 # of the threshold.
 #
+# The level the value starts out at is taken from the first reading, when the eventoid is created,
+#   so no event is generated for where the value already is.
+#
 # Written by Eric B. Wertz (eric@edushields.com)
-# Last modified 19-Apr-2022 23:18
+# Last modified 16-Oct-2026 23:45
 
 from machine import ADC
 import time, eventoid
+from adcsampler import read_oversampled
 
 class EventoidAnalogLevel(eventoid.Eventoid):
     """EventoidAnalogLevel - generate events for bi-directional crossing over an analog threshold value."""
 
-    def __init__(self, eventer, events, adc, adc_threshold, half_width=0, data=None):
+    def __init__(self, eventer, events, adc, adc_threshold, half_width=0, data=None, filter=None, oversample=1):
         """
         EventoidAnalogLevel - create obj for monitoring bi-directional crossing over an analog threshold.
         
@@ -23,6 +27,8 @@ class EventoidAnalogLevel(eventoid.Eventoid):
         adc_threshold - center ADC value for thresholding
         half_width - ADC counts above and below threshold for hysteresis band
         data - optional data to return with event
+        filter - (optional) filter whose update() is applied to each ADC value, e.g. filters.MedianFilter
+        oversample - (optional) number of ADC reads to average for each value
         """
         super().__init__(eventer, "analevel", True)
 
@@ -30,9 +36,11 @@ class EventoidAnalogLevel(eventoid.Eventoid):
 
         (self.event_rising,self.event_falling) = events
         self.adc       = adc
+        self.filter    = filter
+        self.oversample = oversample
         self.band_low  = adc_threshold - half_width
         self.band_high = adc_threshold + half_width
-        self.level     = 1 if adc.read_u16() >= adc_threshold else 0
+        self.level     = 1 if self._read() >= adc_threshold else 0
         self.data      = data
 
     def __repr__(self):
@@ -40,10 +48,13 @@ class EventoidAnalogLevel(eventoid.Eventoid):
         return super().__repr__() + ",events=("+str(self.event_rising)+","+str(self.event_falling)+\
                "),band=("+str(self.band_low)+","+str(self.band_high)+"),prev="+str(self.level)+",data="+str(self.data)
 
+    def _read(self):
+        return read_oversampled(self.adc, self.oversample, self.filter)
+
     def poll(self):
         """ poll(): poll object for eventable conditions.  Returns True to Eventer if an event was queued, else False. """
 
-        val = self.adc.read_u16()
+        val = self._read()
         t   = time.ticks_ms()
         evented = False
         if (val <= self.band_low) and (self.level == 1):
@@ -1,14 +1,26 @@
 # eventoid_anarange.py -- generate events for subdivided analog range (can simulate rotary encoder)
 #
-# FIXME: hysteresis width not configurable
+# (For an actual rotary encoder, see eventoid_encoder.py.)
+#
+# The ADC range is divided into levels of equal width.  To keep a value sitting on the boundary
+#   between two levels from generating a stream of up/down events, the value has to be hysteresis
+#   ADC counts (the hysteresis parameter) past a boundary to cross it (by default, the middle 3/5 of
+#   a level is needed to enter it).  The crossing points are precomputed when the eventoid is created,
+#   into _up (the values that enter each level from below) and _down (those that enter it from above),
+#   so each sample is mapped to a level with a binary search of one of them (or just two comparisons,
+#   when it hasn't changed level).  A value that jumps across several levels queues an up/down event
+#   for each one crossed, in order.
 #
 # Written by Eric B. Wertz (eric@edushields.com)
-# Last modified 19-Apr-2022 23:23
+# Last modified 16-Oct-2026 23:45
 
 from machine import ADC
+from array import array
 import time, eventoid
+from adcsampler import read_oversampled
+from eventoid import EventoidException, bisect_right
 
-HYSTERESIS_LEVEL_FRACT = const(5)  # top and bottom 1/5 of subdivision for hysteresis
+HYSTERESIS_LEVEL_FRACT = const(5)  # default hysteresis: 1/5 of a level's width on each side of a boundary
 
 ANALOG_MAX = const((2**16)-1)
 
@@ -16,7 +28,7 @@ class EventoidAnalogMultirange(eventoid.Eventoid):
     """
     EventoidAnalogMultirange - generate events for subdivided analog ranges (can simulate rotary encoder)
     """
-    def __init__(self, eventer, events, adc, levels, data=None):
+    def __init__(self, eventer, events, adc, levels, data=None, filter=None, oversample=1, hysteresis=None):
         """
         EventoidAnalogMultirange - create obj for monitoring subdivided analog range
         
@@ -25,62 +37,62 @@ class EventoidAnalogMultirange(eventoid.Eventoid):
         adc - instance of machine.ADC to poll
         levels - number of subdivisions within ADC range
         data - optional data to return with event
+        filter - (optional) filter whose update() is applied to each ADC value, e.g. filters.MedianFilter
+        oversample - (optional) number of ADC reads to average for each value
+        hysteresis - (optional) ADC counts past a boundary needed to cross it, less than half of a level's
+                     width, or None for 1/HYSTERESIS_LEVEL_FRACT of it
         """
         super().__init__(eventer, "anarange", True)
 
         (self.event_up,self.event_down) = events
         self.adc    = adc
+        self.filter = filter
+        self.oversample = oversample
         self.levels = levels
         self.width  = (int)(ANALOG_MAX/levels)
-        self.margin = self.width // HYSTERESIS_LEVEL_FRACT # hysteretic dead-zone top/bottom 20% of the level width
-        self.level  = EventoidAnalogMultirange._get_level(adc.read_u16(), levels-1, self.width, self.margin)[0]
+        self.margin = self.width // HYSTERESIS_LEVEL_FRACT if hysteresis is None else hysteresis
+        if (self.margin < 0) or (2*self.margin >= self.width):
+            raise EventoidException("hysteresis must be less than half of the level width: "+str(self.margin))
+
+        # entering level k from below takes a value >= _up[k-1], from above one < _down[k]
+        self._up   = array('l', [k*self.width + self.margin for k in range(1, levels)])
+        self._down = array('l', [k*self.width - self.margin for k in range(1, levels)])
+
+        self.level  = bisect_right(self._up, self._read())
         self.data   = data
 
     def __repr__(self):
         """ __repr__(): Return printable obj representation"""
         return super().__repr__() + ",events=("+str(self.event_up)+","+str(self.event_down)+"),levels="+str(self.levels)+\
-               "width="+str(self.width)+",margin="+str(self.margin)+",level="+str(self.level)+",data="+str(self.data)
+               ",width="+str(self.width)+",margin="+str(self.margin)+",level="+str(self.level)+",data="+str(self.data)
 
-    def _get_level(adcval, max_level, width, margin):
-        lvl = adcval // width
-        if lvl > max_level: return (max_level, 1)
-        if lvl < 0        : return (0, -1)
+    def level_of(self, adcval):
+        """ level_of(): level that adcval is in, coming from the current level """
+        level = self.level
+        up    = self._up
+        if (level < len(up)) and (adcval >= up[level]):
+            return bisect_right(up, adcval)
+        down = self._down
+        if (level > 0) and (adcval < down[level-1]):
+            return bisect_right(down, adcval)
+        return level
 
-        n = adcval  % width
-        if adcval < margin:
-            sublvl = -1
-        elif adcval > (width-margin):
-            sublvl = 1
-        else:
-            sublvl = 0
-        return (lvl, sublvl)
+    def _read(self):
+        return read_oversampled(self.adc, self.oversample, self.filter)
 
     def poll(self):
         """ poll(): poll object for eventable conditions.  Returns True to Eventer if an event was queued, else False. """
-        evented = False
-        val = self.adc.read_u16()
-        t   = time.ticks_ms()
-        (lev, sublev) = EventoidAnalogMultirange._get_level(val, self.levels-1, self.width, self.margin)
+        lev = self.level_of(self._read())
+        if lev == self.level:
+            return False
 
-        while lev != self.level:
-            if lev == self.level+1:
-                if sublev >= 0:   # mid-range or higher
-                    self.level = lev
-                    self.eventer.add((self.event_up, t, self.level if self.data is None else self.data))
-                    evented = True
-                break
-            elif lev == self.level-1:
-                if sublev <= 0:   # mid-range or lower
-                    self.level = lev
-                    self.eventer.add((self.event_down, t, self.level if self.data is None else self.data))
-                    evented = True
-                break
-            else:
-                if lev > self.level+1:
-                    self.level += 1
-                    self.eventer.add((self.event_up, t, self.level if self.data is None else self.data))
-                    evented = True
-                elif lev < self.level-1:
-                    self.level -= 1
-                    self.eventer.add((self.event_down, t, self.level if self.data is None else self.data))
-                    evented = True
+        t = time.ticks_ms()
+        data = self.data
+        if lev > self.level:
+            for level in range(self.level+1, lev+1):
+                self.eventer.add((self.event_up, t, level if data is None else data))
+        else:
+            for level in range(self.level-1, lev-1, -1):
+                self.eventer.add((self.event_down, t, level if data is None else data))
+        self.level = lev
+        return True
@@ -3,79 +3,233 @@
 # This eventoid replicates the content/analysis of the demo code provided with the driver
 #   generalized a bit for easier tuning
 #
-# Events are generated when a single color is determined to be dominant-ish.
+# Events are generated when a single color is determined to be dominant-ish: when its count is
+#   more than sat_factor (plus the hysteresis halfwidth) times the average of the red, green and
+#   blue counts, and again when it drops back below sat_factor (minus the halfwidth) times it.
+#   Counts that have saturated (reached the overflow count of the integration time) are taken
+#   as 0, since they don't say anything about the color anymore.
+#
+# The sensor only produces a new set of counts once per integration cycle (its integration time,
+#   plus its wait time if that's enabled), which is usually much slower than the eventoid is polled.
+#   So the eventoid reads the sensor's timing registers when it's created (and again whenever
+#   update_timing() is called, e.g. after changing the driver's integration time), and only reads
+#   the counts once a cycle has passed since the last time, telling the Eventer how long that will be
+#   with ms_to_deadline().  Even then, it only reads them if the status register says that they're
+#   valid (i.e. an integration has completed since the sensor was enabled).  The counts are read with
+#   a single 8-byte burst read into a preallocated buffer, and checked with integer arithmetic, so
+#   polling doesn't allocate any memory unless an event is generated.
+#
+# The eventoid talks to the sensor's registers directly, so it needs its I2C bus and address, or a
+#   driver that keeps them in its _i2c (or i2c) and _address (or address) attributes.  If the driver
+#   hasn't enabled the sensor, the eventoid does.
+#
+# Given an i2cbus.I2CBus, the eventoid instead takes the status and the counts from a block of the
+#   sensor's registers shared on the bus (a single 9-byte burst read starting at the status register),
+#   so that any number of eventoids watching the same sensor cost one bus transaction per integration
+#   cycle between them, rather than two (status, then counts) each.  The trade-off is that the counts
+#   are read along with the status even when they aren't valid yet, which only happens until the first
+#   integration completes, and then aren't read again for another cycle.
 #
 # Written by Eric Wertz (eric@edushields.com)
-# Last modified 04-May-2022 12:40
+# Last modified 16-Oct-2026 23:30
 
-from machine import SoftI2C #FIXME Pin?
+from array import array
+from micropython import const
 import time, eventoid
-
-from tcs34725 import *
+from eventoid import EventoidException
+
+# color indexes, as in events_colors and in the event_data's counts
+COLOR_RED   = const(0)
+COLOR_GREEN = const(1)
+COLOR_BLUE  = const(2)
+NUM_COLORS  = const(3)
+
+# index positions for RECOGNIZED, DERECOGNIZED
+IDX_RECOGNIZED   = 0
+IDX_DERECOGNIZED = 1
+
+I2CADDR_TCS34725 = const(0x29)
+
+# TCS34725 registers, addressed through the command register
+_CMD            = const(0x80)
+_CMD_AUTOINC    = const(0xA0)   # command for reading several registers in a row
+_REG_ENABLE     = const(0x00)
+_REG_ATIME      = const(0x01)
+_REG_WTIME      = const(0x03)
+_REG_CONFIG     = const(0x0D)
+_REG_STATUS     = const(0x13)
+_REG_CDATAL     = const(0x14)   # clear, red, green, blue: 16 bits each, low byte first
+
+_ENABLE_PON     = const(0x01)
+_ENABLE_AEN     = const(0x02)
+_ENABLE_WEN     = const(0x08)
+_CONFIG_WLONG   = const(0x02)
+_STATUS_AVALID  = const(0x01)
+
+_CYCLE_US       = const(2400)   # integration/wait time per ATIME/WTIME step
+_SAT_SCALE      = const(256)    # fixed-point scale of the saturation factors
 
 class EventoidColor(eventoid.Eventoid):
-    """EventoidColor - generate events for independent g-values crossing a threshold in either axis"""
+    """EventoidColor - generate events for a single (R|G|B) color becoming, or no longer being, dominant"""
 
-    def __init__(self, eventer, events_colors, tcs, sat_factor=1.45, halfwidth_satfactor=0.05, data=None):
+    def __init__(self, eventer, events_colors, tcs, sat_factor=1.45, halfwidth_satfactor=0.05, data=None,
+                 i2c=None, address=None, bus=None):
         """
-        EventoidColor - create obj for monitoring dominancy of a single (R|G|B) color         
+        EventoidColor - create obj for monitoring dominancy of a single (R|G|B) color
         eventer - Eventer maintaining the queue of generated events
-        events - triple of four tuples of (recognized,de-recognized) color threshold-exceeding/receeding events
-                 to return for each color, in the order of (clear, red, green, blue), or None
-        tcs - instance of driver object for color sensor
-        data - optional data to return with event (current 4-tuple of color-values returned if None)
+        events_colors - triple of (recognized,de-recognized) color threshold-exceeding/receding event
+                 tuples to return for each color, in the order of (red, green, blue).
+                 None may be specified for a color to ignore within the triple, or for either
+                 event to ignore within a color's tuple.
+        tcs - instance of driver object for color sensor (only used for its I2C bus and address)
+        sat_factor - how many times the average count a color's count has to be to be dominant
+        halfwidth_satfactor - hysteresis halfwidth around sat_factor
+        data - optional data to return with event (current (red,green,blue) counts returned if None)
+        i2c - (optional) instance of machine.I2C the sensor is on, if not the driver's
+        address - (optional) I2C address of the sensor, if not the driver's
+        bus - (optional) i2cbus.I2CBus to share the sensor's readings with other eventoids through
         """
         super().__init__(eventer, "color_TCS34725", True)
 
-        if len(events_colors) != 3:
-            raise FIXMEException("events_colors must have three components")
-        self.events = events_colors
+        if len(events_colors) != NUM_COLORS:
+            raise EventoidException("events_colors must have three components")
+        for events in events_colors:
+            if (events is not None) and (len(events) != 2):
+                raise EventoidException("a color's events must be a 2-tuple")
+        self.events = tuple(events_colors)
         self.tcs    = tcs
 
         self.sat_factor_high = sat_factor + halfwidth_satfactor
         self.sat_factor_low  = sat_factor - halfwidth_satfactor
+        self.halfwidth_sat   = halfwidth_satfactor
         self.data            = data
-
-        self.prev_color = None
+        self._sat_high = int(self.sat_factor_high * _SAT_SCALE)
+        self._sat_low  = int(self.sat_factor_low  * _SAT_SCALE)
+
+        self.prev_color = None                 # index of the dominant color, or None
+        self.counts     = array('H', (0, 0, 0, 0))   # latest (clear, red, green, blue) counts
+        self.reads      = 0                    # times the counts have been read, for diagnostics
+
+        if i2c is None:
+            i2c = getattr(tcs, "_i2c", None) or getattr(tcs, "i2c", None)
+        if address is None:
+            address = getattr(tcs, "_address", None) or getattr(tcs, "address", None) or I2CADDR_TCS34725
+        if i2c is None:
+            raise EventoidException("EventoidColor needs the TCS34725's i2c bus")
+        self._i2c     = i2c
+        self._address = address
+        self._reg     = bytearray(1)
+        self._buf     = bytearray(8)
+        self._block   = None
+        self._seen    = 0                      # the block's reads when it was last looked at
+
+        enable = self._read_reg(_REG_ENABLE)
+        if (enable & (_ENABLE_PON | _ENABLE_AEN)) != (_ENABLE_PON | _ENABLE_AEN):
+            self._write_reg(_REG_ENABLE, enable | _ENABLE_PON)
+            time.sleep_ms(3)                   # its oscillator has to warm up before integrating
+            self._write_reg(_REG_ENABLE, enable | _ENABLE_PON | _ENABLE_AEN)
+        if bus is not None:
+            self._block = bus.block(i2c, address, _CMD_AUTOINC | _REG_STATUS, 9)
+        self.update_timing()
+        self._t_read = time.ticks_ms()
 
     def __repr__(self):
         """ __repr__(): Return printable obj representation"""
 
         return super().__repr__() + ",events=("+str(self.events)+\
-               "),sats_f=("+str(self.sat_factor_low)+","+str(self.sat_factor_high)+"),sat_wid/2"+str(self.halfwidth_sat)+"),data="+str(self.data)
+               "),sats_f=("+str(self.sat_factor_low)+","+str(self.sat_factor_high)+"),sat_wid/2="+str(self.halfwidth_sat)+\
+               ",period_ms="+str(self.period_ms)+",color="+str(self.prev_color)+",data="+str(self.data)
+
+    def _read_reg(self, reg):
+        self._i2c.readfrom_mem_into(self._address, _CMD | reg, self._reg)
+        return self._reg[0]
+
+    def _write_reg(self, reg, value):
+        self._reg[0] = value
+        self._i2c.writeto_mem(self._address, _CMD | reg, self._reg)
+
+    def update_timing(self):
+        """ update_timing(): re-read the sensor's integration cycle time, after it has been changed """
+        steps = 256 - self._read_reg(_REG_ATIME)
+        cycle_us = steps * _CYCLE_US
+        if self._read_reg(_REG_ENABLE) & _ENABLE_WEN:
+            wait_us = (256 - self._read_reg(_REG_WTIME)) * _CYCLE_US
+            if self._read_reg(_REG_CONFIG) & _CONFIG_WLONG:
+                wait_us *= 12
+            cycle_us += wait_us
+        self.period_ms      = (cycle_us + 999) // 1000
+        self.overflow_count = min(65535, steps * 1024)
+        if self._block is not None:
+            self._block.period_ms = self.period_ms
+
+    def ms_to_deadline(self, now):
+        block = self._block
+        if block is None:
+            return self.period_ms - time.ticks_diff(now, self._t_read)
+        if block.t_ms is None:
+            return 0
+        return self.period_ms - time.ticks_diff(now, block.t_ms)
 
     def poll(self):
         """ poll(): poll object for eventable conditions.
                     Returns True to Eventer if an event was queued, else False. """
 
-        evented = False
         t = time.ticks_ms()
+        block = self._block
+        if block is None:
+            if time.ticks_diff(t, self._t_read) < self.period_ms:
+                return False                       # no new counts yet
+            if not (self._read_reg(_REG_STATUS) & _STATUS_AVALID):
+                return False                       # not integrated yet, check again next poll
+            self._t_read = t
+            self._i2c.readfrom_mem_into(self._address, _CMD_AUTOINC | _REG_CDATAL, self._buf)
+            buf = self._buf
+            o   = 0
+        else:
+            buf = block.reading()                  # (status, counts), read at most once a cycle
+            if block.reads == self._seen:
+                return False                       # no new counts yet
+            self._seen = block.reads
+            if not (buf[0] & _STATUS_AVALID):
+                return False                       # not integrated yet
+            o = 1
+        self.reads += 1
+
+        counts   = self.counts
+        overflow = self.overflow_count
+        for i in range(4):
+            count = buf[o+2*i] | (buf[o+2*i+1] << 8)
+            counts[i] = 0 if (i > 0) and (count >= overflow) else count   # toss R/G/B values that overflowed
+        total = counts[1] + counts[2] + counts[3]  # 3 * average of RGB counts
 
-        color_counts = list(tcs.colors[1:])     # get rid of unused "clear" data so that R,G,B indexes start at 0
-
-        for count in color_counts:
-            if count >= tcs.overflow_count:
-                count = 0                       # toss value that overflowed
-        largest_count = max(color_counts)             # largest R/G/B count
-        largest_color = color_count.index(largest_count)
-        avg_count     = sum(color_counts) // 3        # average of RGB counts
-
-        data = color_counts if self.data is None else self.data
-
-        if self.last_color is not None:
+        evented = False
+        color = self.prev_color
+        if color is not None:
             # did previous color fall out of dominance?
-            if color_counts[self.last_color] < int(avg * self.sat_factor_low):
-                if (self.events[self.last_color] is not None) and (self.events[self.last_color][1] is not None):
-                   self.eventer.add((self.events[self.last_color][1], t, data))     # send out-of-dominance event
-                   self.last_color = None
-                   evented = True
-
-        if self.last_color is None:
-            if largest_count > int(avg * self.sat_factor_high):
+            if counts[1+color] * 3 * _SAT_SCALE < total * self._sat_low:
+                self.prev_color = None
+                evented = self._event(color, IDX_DERECOGNIZED, t)
+
+        if (self.prev_color is None) and total:
+            color = COLOR_RED                      # largest R/G/B count
+            if counts[1+COLOR_GREEN] > counts[1+color]:
+                color = COLOR_GREEN
+            if counts[1+COLOR_BLUE] > counts[1+color]:
+                color = COLOR_BLUE
+            if counts[1+color] * 3 * _SAT_SCALE > total * self._sat_high:
                 # a color is now dominant, send event if we care about that color
-                if (self.events[largest_color] is not None) and (self.events[largest_color][0] is not None):
-                   self.eventer.add((self.events[largest_color][0], t, data))   # send new dominance event
-                   self.last_color = largest_color
-                   evented = True
+                self.prev_color = color
+                if self._event(color, IDX_RECOGNIZED, t):
+                    evented = True
 
         return evented
+
+    def _event(self, color, idx, t):
+        """ _event(): queue the color's (de)recognized event, if there is one """
+        events = self.events[color]
+        if (events is None) or (events[idx] is None):
+            return False
+        counts = self.counts
+        data = (counts[1], counts[2], counts[3]) if self.data is None else self.data
+        self.eventer.add((events[idx], t, data))
+        return True
@@ -0,0 +1,98 @@
+# eventoid_encoder.py -- event checker for a rotary (quadrature) encoder
+#
+# A quadrature encoder's two outputs (A and B) step through the Gray code 00,10,11,01 in one
+#   direction and the reverse in the other, typically four steps per detent (click).  Polling the
+#   pins would miss steps whenever the knob (or wheel) turns faster than the eventer polls, so the
+#   steps are counted where they can't be missed, by an interrupt handler on both edges of both
+#   pins, and poll() only turns the count into events.  The handler looks up the change in position
+#   from the previous and current pin states in a 16-entry table, and doesn't allocate memory.
+#
+# Each poll() that finds that the encoder has moved by at least one detent queues a single up or
+#   down event, whose event_data is the number of detents moved since the last event (negative for
+#   down), so that however fast it's turned, summing the event_data always gives the position.
+#
+# Last modified 16-Oct-2026 23:46
+
+from machine import Pin
+from array import array
+import time, eventoid
+
+# change in position, indexed by (previous AB state << 2) | current AB state.  Both pins changing at
+#   once means a step was missed, and can't be counted either way (0).
+_QUAD_DELTA = array('b', (0, -1, 1, 0,
+                          1, 0, 0, -1,
+                          -1, 0, 0, 1,
+                          0, 1, -1, 0))
+
+class EventoidEncoderPolled(eventoid.Eventoid):
+    """EventoidEncoderPolled - generate events for a quadrature encoder being turned up or down."""
+
+    def __init__(self, eventer, events, pin_a, pin_b, steps_per_detent=4):
+        """
+        EventoidEncoderPolled() - eventoid object for a rotary quadrature encoder
+
+        eventer - Eventer maintaining the queue of generated events
+        events - tuple of (up,down) events to return
+        pin_a - instance of machine.Pin connected to output A
+        pin_b - instance of machine.Pin connected to output B
+        steps_per_detent - (optional) quadrature steps per detent, usually 4 (sometimes 2 or 1)
+        """
+        super().__init__(eventer, "encoder", True)
+
+        (self.event_up, self.event_down) = events
+        self.pin_a = pin_a
+        self.pin_b = pin_b
+        self.steps_per_detent = steps_per_detent
+        self.position = 0         # detents, as reported by events so far
+        self.errors   = 0         # transitions with both pins changing, i.e. missed steps
+
+        self._count    = 0        # quadrature steps
+        self._reported = 0        # _count as of the last event
+
+        self._ab = (pin_a.value() << 1) | pin_b.value()
+        pin_a.irq(trigger=Pin.IRQ_RISING|Pin.IRQ_FALLING, handler=self._isr_ab)
+        pin_b.irq(trigger=Pin.IRQ_RISING|Pin.IRQ_FALLING, handler=self._isr_ab)
+
+    def __repr__(self):
+        """ __repr__(): Return printable obj representation"""
+        return super().__repr__() + ",events=("+str(self.event_up)+","+str(self.event_down)+\
+               "),steps="+str(self.steps_per_detent)+\
+               ",position="+str(self.position)+",errors="+str(self.errors)
+
+    def _isr_ab(self, pin):
+        ab = (self.pin_a.value() << 1) | self.pin_b.value()
+        i = (self._ab << 2) | ab
+        self._ab = ab
+        d = _QUAD_DELTA[i]
+        if d:
+            self._count += d
+        elif (i == 3) or (i == 6) or (i == 9) or (i == 12):
+            self.errors += 1
+
+    def count(self):
+        """ count(): quadrature steps counted so far """
+        return self._count
+
+    def poll(self):
+        """ poll(): poll object for eventable conditions.  Returns True to Eventer if an event was queued, else False. """
+        steps = self.count() - self._reported
+        spd = self.steps_per_detent
+        if steps >= spd:
+            detents = steps // spd
+            event = self.event_up
+        elif steps <= -spd:
+            detents = -((-steps) // spd)
+            event = self.event_down
+        else:
+            return False
+
+        self._reported += detents * spd
+        self.position  += detents
+        if event is None:
+            return False
+        self.eventer.add((event, time.ticks_ms(), detents))
+        return True
+
+    def deinit(self):
+        self.pin_a.irq(handler=None)
+        self.pin_b.irq(handler=None)
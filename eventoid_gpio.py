@@ -1,7 +1,7 @@
 # eventoid_gpio.py -- event checker for a single GPIO input pin.
 #
 # Written by Eric B. Wertz (eric@edushields.com)
-# Last modified 27-Apr-2022 10:52
+# Last modified 16-Oct-2026 09:40
 
 import machine, time
 import eventoid
@@ -69,6 +69,11 @@ class EventoidGPIONonPolled(eventoid.Eventoid):
         mask =  0 if self.event_rising  is None else machine.Pin.IRQ_RISING
         mask |= 0 if self.event_falling is None else machine.Pin.IRQ_FALLING
 
+        # integer events and data can be queued without allocating anything in the ISR
+        self.alloc_free = (isinstance(self.event_rising,  int) or (self.event_rising  is None)) and \
+                          (isinstance(self.event_falling, int) or (self.event_falling is None)) and \
+                          (isinstance(data, int) or (data is None))
+
         pin.irq(trigger=mask, handler=self._isr_gpio)
 
     def _isr_gpio(self, pin):
@@ -76,9 +81,16 @@ class EventoidGPIONonPolled(eventoid.Eventoid):
         t = time.ticks_ms()
 
         if   (g == 0) and (self.event_falling is not None):
-                self.eventer.add((self.event_falling, t, self.data))
+                event = self.event_falling
         elif (g == 1) and (self.event_rising is not None):
-                self.eventer.add((self.event_rising,  t, self.data))
+                event = self.event_rising
+        else:
+                return
+
+        if self.alloc_free:
+            self.eventer.add_isr(event, t, self.data)
+        else:
+            self.eventer.add((event, t, self.data))
 
     def __repr__(self):
         """ __repr__(): Return printable obj representation"""
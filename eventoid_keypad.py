@@ -1,71 +1,260 @@
 # eventoid_keypad.py -- event checker for matrix keypads
 #
-# This eventoid polls the keypad (rather than uses interrupts), and returns only
+# This eventoid polls the keypad (rather than uses interrupts), and by default returns only
 #   one keypad press or release at a time, by design.  Multiple (or all, if you have
-#   a friend) keys can be held down simultaneously without issues.
+#   a friend) keys can be held down simultaneously without issues.  With multi=True, every
+#   press and release found in a scan is queued at once instead, and if a chord event is
+#   given, one event carrying the set of all keys held down is queued after every complete
+#   scan in which that set changed.
 #
-# Note: to decrease the time spent in any one poll() call, we could poll just the next,
-#       single row at a time and return quicker, but that level of performance/granularity
-#       probably isn't necessary for most applications, given the nature of this device.
-# Note: It probably wouldn't hurt to queue multiple press and release events in one call to poll()
+# The state of the keys is kept in a single integer bitmask, one bit per key, numbered
+#   row*ncols+col, so that finding the keys that changed in a row is a single XOR.  The
+#   press/release event_data is the key's (row,col) tuple and the chord event_data is the
+#   bitmask (see keys_down() to unpack it).
 #
-# TODO: Implement and interrupt-driven eventoid that does *almost* the same thing.  It would likely
-#       behave differently as some presses/releases wouldn't be noticed depending on the state of
-#       other keys in the same row/column.
+# Note: by default each poll() scans every row, sleeping row_delay_ms between rows, so a 4-row
+#       keypad blocks the Eventer for 3*row_delay_ms (~100ms) per poll.  With incremental=True,
+#       each poll() instead does just one step of the scan: it either drives the next row and
+#       returns immediately, or, once that row has had row_delay_ms to settle, reads its columns.
+#       Nothing ever sleeps, and the timing between steps is tracked with ticks_ms().
+#
+# EventoidKeypadNonPolled is the interrupt-driven version, which is never polled.  It keeps every row
+#   driven high and waits for a column pin to change, and only then (outside of interrupt context, via
+#   micropython.schedule()) scans the keypad.  It behaves *almost* the same, but since a column only
+#   changes level when its first key goes down or its last key comes up, pressing or releasing a key
+#   while another key in the same column is held down isn't noticed until some other column changes.
 #
 # Written by Eric B. Wertz (eric@edushields.com)
-# Last modified 21-Apr-2022 18:35
+# Last modified 16-Oct-2026 19:05
 
 from machine import Pin
-import time, eventoid
+import micropython, time, eventoid
+
+def keys_down(mask, ncols):
+    """Return the list of (row,col) of the keys set in a chord event's bitmask."""
+    keys = []
+    i = 0
+    while mask:
+        if mask & 1:
+            keys.append(divmod(i, ncols))
+        mask >>= 1
+        i += 1
+    return keys
 
 class EventoidKeypadPolled(eventoid.Eventoid):
-    def __init__(self, eventer, events, pinnums_rows, pinnums_cols, row_delay_ms=35):
+    def __init__(self, eventer, events, pinnums_rows, pinnums_cols, row_delay_ms=35, incremental=False,
+                 multi=False):
+        """
+        EventoidKeypadPolled - create obj for polling an M-by-N matrix keypad
+
+        eventer - Eventer maintaining the queue of generated events
+        events - tuple of (press,release) or (press,release,chord) events, any of which may be None
+        pinnums_rows - GPIO numbers of the row pins, which are driven high one at a time
+        pinnums_cols - GPIO numbers of the column pins, which read 1 when the key on the driven row is pressed
+        row_delay_ms - msecs between scanning successive rows
+        incremental - scan one row per poll() without ever sleeping, rather than all rows
+        multi - queue every press/release found in a scan, rather than one per poll()
+        """
         super().__init__(eventer, "keypad", True)
 
-        (self.event_press,self.event_release) = events
+        (self.event_press,self.event_release) = events[:2]
+        self.event_chord  = events[2] if len(events) > 2 else None
         self.pinnums_rows = pinnums_rows
         self.pinnums_cols = pinnums_cols
-        self.pins_cols    = [Pin(i, Pin.IN) for i in pinnums_cols]
+        self.pins_rows    = [Pin(n, Pin.IN) for n in pinnums_rows]
+        self.pins_cols    = [Pin(n, Pin.IN) for n in pinnums_cols]
         self.row_delay_ms = row_delay_ms
+        self.incremental  = incremental
+        self.multi        = multi
+
+        ncols = len(pinnums_cols)
+        self._keys     = [divmod(i, ncols) for i in range(len(pinnums_rows) * ncols)]  # event_data, made once
+        self._row_mask = (1 << ncols) - 1
+        self.state       = 0          # bitmask of keys currently down
+        self._chord_sent = 0          # bitmask sent with the last chord event
 
-        self.prev_state   = []
-        for i in range(len(self.pinnums_rows)):
-            cols = [0 for i in pinnums_cols]
-            self.prev_state.append(cols)
+        self._row           = 0       # incremental: row being scanned
+        self._row_driven_ms = None    # incremental: when that row was driven, None if it isn't yet
 
     def __repr__(self):
         return super().__repr__()+\
-               ",events="+str((self.event_press,self.event_release))+",rows="+\
-               str(self.pinnums_rows)+",cols="+str(self.pinnums_cols)
+               ",events="+str((self.event_press,self.event_release,self.event_chord))+",rows="+\
+               str(self.pinnums_rows)+",cols="+str(self.pinnums_cols)+",incr="+str(self.incremental)+\
+               ",multi="+str(self.multi)+",state="+hex(self.state)
+
+    def ms_to_deadline(self, now):
+        if (not self.incremental) or (self._row_driven_ms is None) or (self.row_delay_ms is None):
+            return 0
+        return self.row_delay_ms - time.ticks_diff(now, self._row_driven_ms)
+
+    def _read_row(self, row):
+        """ _read_row(): return the column bits of the (already driven) row, shifted into position """
+        bits = 0
+        b = 1
+        for pin in self.pins_cols:
+            if pin.value():
+                bits |= b
+            b <<= 1
+        return bits << (row * len(self.pins_cols))
+
+    def _process_row(self, row, bits, t):
+        """ _process_row(): queue the press/release events for a row's changes.  Returns True if any were queued. """
+        ncols = len(self.pins_cols)
+        changed = (bits ^ self.state) & (self._row_mask << (row * ncols))
+        evented = False
+        i = row * ncols
+        b = 1 << i
+        while changed:
+            if changed & b:
+                changed &= ~b
+                if bits & b:
+                    self.state |= b
+                    event = self.event_press
+                else:
+                    self.state &= ~b
+                    event = self.event_release
+                if event is not None:
+                    self.eventer.add((event, t, self._keys[i]))
+                    evented = True
+                    if not self.multi:
+                        break
+            b <<= 1
+            i += 1
+        return evented
+
+    def _scan_done(self, t):
+        """ _scan_done(): a complete scan has finished, send a chord event if the keys down have changed """
+        if (self.event_chord is None) or (self.state == self._chord_sent):
+            return False
+        self._chord_sent = self.state
+        self.eventer.add((self.event_chord, t, self.state))
+        return True
 
     def poll(self):
-        _ = [Pin(n, Pin.IN) for n in self.pinnums_rows]
-        pins_cols = self.pins_cols
+        if self.incremental:
+            return self._poll_row()
 
         evented = False
-        for (row,row_pinnum) in enumerate(self.pinnums_rows):
-            Pin(row_pinnum, Pin.OUT, value=1)
-            for (col, pinobj) in enumerate(pins_cols):
-                val = pinobj.value()                   # 0=pressed, 1=unpressed
-                if val == self.prev_state[row][col]:   # no change from prev scan, skip
-                    continue
-
-                if (self.event_press is not None) and (val == 1):
-                        self.eventer.add((self.event_press, time.ticks_ms(), (row,col)))
-                        evented = True
-                elif (self.event_release is not None) and (val == 0):
-                        self.eventer.add((self.event_release, time.ticks_ms(), (row,col)))
-                        evented = True
-
-                self.prev_state[row][col] = val
-
-                if evented:
-                    break
-            Pin(row_pinnum, Pin.IN)
-            if evented:
-                break
-            if self.row_delay_ms is not None:
+        for (row, pin) in enumerate(self.pins_rows):
+            pin.init(Pin.OUT, value=1)
+            bits = self._read_row(row)
+            pin.init(Pin.IN)
+            if self._process_row(row, bits, time.ticks_ms()):
+                evented = True
+                if not self.multi:
+                    return True
+            if (self.row_delay_ms is not None) and (row < len(self.pins_rows)-1):
                 time.sleep_ms(self.row_delay_ms)
 
+        return self._scan_done(time.ticks_ms()) or evented
+
+    def _poll_row(self):
+        """ _poll_row(): one step of an incremental scan, either driving a row or reading its columns """
+        t = time.ticks_ms()
+        row = self._row
+        if self._row_driven_ms is None:
+            self.pins_rows[row].init(Pin.OUT, value=1)
+            self._row_driven_ms = t
+            return False
+        if (self.row_delay_ms is not None) and (time.ticks_diff(t, self._row_driven_ms) < self.row_delay_ms):
+            return False                               # still settling
+
+        evented = self._process_row(row, self._read_row(row), t)
+        if evented and not self.multi:
+            return True                                # stay on this row, it's already settled
+
+        # move on to the next row, which starts settling now
+        self.pins_rows[row].init(Pin.IN)
+        row += 1
+        if row == len(self.pins_rows):
+            row = 0
+            evented = self._scan_done(t) or evented
+        self.pins_rows[row].init(Pin.OUT, value=1)
+        self._row = row
+        self._row_driven_ms = t
         return evented
+
+class EventoidKeypadNonPolled(EventoidKeypadPolled):
+    def __init__(self, eventer, events, pinnums_rows, pinnums_cols, settle_us=50):
+        """
+        EventoidKeypadNonPolled - create obj for detecting presses/releases of an M-by-N matrix keypad using interrupts
+
+        eventer - Eventer maintaining the queue of generated events
+        events - tuple of (press,release) or (press,release,chord) events, any of which may be None
+        pinnums_rows - GPIO numbers of the row pins, which are all driven high while waiting for a key
+        pinnums_cols - GPIO numbers of the column pins, whose edges start a scan
+        settle_us - usecs to let each row settle before reading the columns during a scan
+        """
+        super().__init__(eventer, events, pinnums_rows, pinnums_cols, row_delay_ms=None, multi=True)
+        self.eo_type   = "keypad.non-polled"
+        self._polled   = False
+        self.settle_us = settle_us
+
+        self._scan_ref = self._scan   # bound once, since the ISR can't allocate one
+        self._pending  = False        # a scan has been scheduled and hasn't run yet
+        self._scanning = False        # column edges are the scan's own doing, ignore them
+
+        for pin in self.pins_rows:
+            pin.init(Pin.OUT, value=1)
+        for pin in self.pins_cols:
+            pin.irq(trigger=Pin.IRQ_RISING|Pin.IRQ_FALLING, handler=self._isr_col)
+        if self._read_row(0):
+            self._isr_col(None)       # keys already down
+
+    def __repr__(self):
+        return super().__repr__()+",settle_us="+str(self.settle_us)
+
+    def _isr_col(self, pin):
+        if self._pending or self._scanning:
+            return
+        self._pending = True
+        try:
+            micropython.schedule(self._scan_ref, 0)
+        except RuntimeError:          # schedule queue full: the next edge will try again
+            self._pending = False
+
+    def _cols_expected(self):
+        """ _cols_expected(): column bits that the keys known to be down read with every row driven """
+        ncols = len(self.pins_cols)
+        bits = 0
+        state = self.state
+        while state:
+            bits |= state & self._row_mask
+            state >>= ncols
+        return bits
+
+    def _scan(self, _):
+        """ _scan(): scheduled by a column edge, scan every row and queue the changes """
+        self._scanning = True
+        self._pending  = False
+        t = time.ticks_ms()
+
+        for pin in self.pins_rows:
+            pin.init(Pin.IN)
+        for (row, pin) in enumerate(self.pins_rows):
+            pin.init(Pin.OUT, value=1)
+            if self.settle_us:
+                time.sleep_us(self.settle_us)
+            bits = self._read_row(row)
+            pin.init(Pin.IN)
+            self._process_row(row, bits, t)
+        self._scan_done(t)
+
+        for pin in self.pins_rows:
+            pin.init(Pin.OUT, value=1)
+        if self.settle_us:
+            time.sleep_us(self.settle_us)
+        self._scanning = False
+
+        # anything that changed while its edges were being ignored has to be caught now
+        if self._read_row(0) != self._cols_expected():
+            self._isr_col(None)
+
+    def poll(self):
+        return False
+
+    def deinit(self):
+        for pin in self.pins_cols:
+            pin.irq(handler=None)
+        for pin in self.pins_rows:
+            pin.init(Pin.IN)
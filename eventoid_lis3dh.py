@@ -5,15 +5,83 @@
 #
 # See the class' docstring(s) for usage information.
 #
+# By default, each poll reads the current acceleration from the driver, so short shocks are only
+#   noticed if the eventoid is polled at the sensor's output data rate.  In FIFO mode (fifo=True)
+#   the LIS3DH's own 32-sample FIFO is turned on (in stream mode) instead, and whenever it has had
+#   time to fill halfway the eventoid drains every sample in it with a single I2C burst read into a
+#   preallocated buffer, and checks the thresholds against each of them.  The events found are
+#   timestamped by working back from the time of the read at the output data rate.  FIFO mode talks
+#   to the chip's registers directly, so it needs its I2C bus and address (or a driver that keeps
+#   them in its _i2c and _address attributes), and takes the output data rate and full scale range
+#   that the driver has already set.
+#
+# In interrupt mode (given the pin(s) that the LIS3DH's INT1 and optionally INT2 outputs are wired to)
+#   the eventoid isn't polled at all.  The chip's two interrupt generators are programmed to watch for
+#   the axes that aren't alarmed to rise past their thresholds (INT1) and for those that are to fall
+#   back through them (INT2), and only when one of them fires is the acceleration read and checked.
+#   An idle accelerometer then costs no I2C traffic or poll time at all.  The chip compares the
+#   magnitudes of the axes against a single threshold per generator, so it's programmed with the
+#   most sensitive of the axes' thresholds and the exact per-axis checks are still done here, and
+#   the thresholds have to be larger than their halfwidths (i.e. the band has to be above 0g).  A
+#   consequence is that while an axis sits between its own threshold and a more sensitive one of
+#   another axis, the chip interrupts on every sample without an event resulting, so this mode works
+#   best when the axes' thresholds are similar or only one axis is used.  If only INT1 is wired,
+#   both generators are routed to it.
+#
+# The axes' hysteresis bands are kept by a Thresholds (see thresholds.py), scaled to the units that
+#   the samples come in (m/s^2 from the driver, or output counts from the FIFO), so that each sample
+#   is checked without any arithmetic, and only the axes that it reports as changed are evented.
+#
 # Written by Eric Wertz (eric@edushields.com)
-# Last modified 18-Sep-2022 21:55
+# Last modified 16-Oct-2026 23:50
 
-from machine import ADC
-import time, eventoid
+from machine import Pin
+from array import array
+from micropython import const
+import micropython, time, eventoid
+from eventoid import EventoidException
+from thresholds import Thresholds
 
 NUM_AXES = 3    # X,Y,Z
 G_MPS    = 9.8  # g in meters/sec^2
 
+# LIS3DH registers
+_REG_CTRL1     = const(0x20)
+_REG_CTRL3     = const(0x22)
+_REG_CTRL4     = const(0x23)
+_REG_CTRL5     = const(0x24)
+_REG_CTRL6     = const(0x25)
+_REG_OUT_X_L   = const(0x28)
+_REG_FIFO_CTRL = const(0x2E)
+_REG_FIFO_SRC  = const(0x2F)
+_REG_INT1_CFG  = const(0x30)   # INT2_* are the same, 4 registers up
+_REG_INT1_SRC  = const(0x31)
+_REG_INT1_THS  = const(0x32)
+_REG_INT1_DUR  = const(0x33)
+_REG_INT2_CFG  = const(0x34)
+_REG_INT2_SRC  = const(0x35)
+_REG_INT2_THS  = const(0x36)
+_REG_INT2_DUR  = const(0x37)
+_REG_AUTOINC   = const(0x80)   # or'ed with a register to read/write several in a row
+
+_CTRL5_FIFO_EN    = const(0x40)
+_FIFO_MODE_STREAM = const(0x80)
+_FIFO_SRC_OVRN    = const(0x40)
+_FIFO_SRC_FSS     = const(0x1F)
+_FIFO_SIZE        = const(32)
+_CTRL3_I1_IA1     = const(0x40)
+_CTRL3_I1_IA2     = const(0x20)
+_CTRL5_LIR_INT1   = const(0x08)
+_CTRL5_LIR_INT2   = const(0x02)
+_CTRL6_I2_IA2     = const(0x20)
+_INT_CFG_XLIE     = const(0x01)   # << 2*axis for Y and Z
+_INT_CFG_XHIE     = const(0x02)
+_THS_MAX          = const(0x7F)
+
+_ODR_US  = (0, 1000000, 100000, 40000, 20000, 10000, 5000, 2500, 625, 744)  # sample period by CTRL_REG1 ODR
+_DIVIDER = (16380, 8190, 4096, 1365)    # 16-bit output counts per g by CTRL_REG4 FS (+/-2, 4, 8, 16g)
+_THS_MG  = (16, 32, 62, 186)            # mg per INTx_THS count, likewise
+
 # index positions for RISING, FALLING
 IDX_RISING  = 0
 IDX_FALLING = 1
@@ -21,7 +89,8 @@ IDX_FALLING = 1
 class EventoidLIS3DH(eventoid.Eventoid):
     """EventoidLIS3DH - generate events for g-values crossing any axis' threshold"""
 
-    def __init__(self, eventer, events_axes, lis3dh):
+    def __init__(self, eventer, events_axes, lis3dh, fifo=False, i2c=None, address=None, int1=None, int2=None,
+                 duration=0):
         """
         EventoidLIS3DH - create obj for monitoring g-value of a single X|Y|Z axis.
         
@@ -31,6 +100,12 @@ class EventoidLIS3DH(eventoid.Eventoid):
                  None may be specified for either the rising or falling event to ignore
                  within the axis' tuple.
         lis3dh - accelerometer driver instance
+        fifo - (optional) drain the chip's FIFO in bursts rather than reading one sample per poll
+        i2c - (optional) instance of machine.I2C the LIS3DH is on, for FIFO/interrupt mode, if not the driver's
+        address - (optional) I2C address of the LIS3DH, for FIFO/interrupt mode, if not the driver's
+        int1 - (optional) instance of machine.Pin connected to INT1, for interrupt mode
+        int2 - (optional) instance of machine.Pin connected to INT2, for interrupt mode, if it's wired
+        duration - (optional) samples that an interrupt's condition has to last (INTx_DURATION)
         
         The event_data returned by this eventoid denotes the axis (0=X, 1=Y, and 2=Z)
         that has alarmed or idled by passing through the threshold value/band.
@@ -61,7 +136,145 @@ class EventoidLIS3DH(eventoid.Eventoid):
         self.lis3dh      = lis3dh
         self.threshold_g = None
         self.halfwidth_g = None
-        self.prev_alarm  = [False, False, False]
+
+        self.fifo = fifo
+        self.int1 = int1
+        self.int2 = int2
+        if fifo and (int1 is not None):
+            raise EventoidException("FIFO and interrupt modes can't both be used")
+        if fifo or (int1 is not None):
+            self._bus_init(lis3dh if i2c is None else None, i2c, address)
+        if fifo:
+            self._fifo_init()
+            self._th = Thresholds(NUM_AXES, self._divider, 'i')   # in output counts
+        else:
+            self._th = Thresholds(NUM_AXES, G_MPS)                # in m/s^2, like the driver
+        if int1 is not None:
+            self._int_init(duration)
+
+    def _bus_init(self, driver, i2c, address):
+        if driver is not None:
+            i2c = getattr(driver, "_i2c", None)
+        if address is None:
+            address = getattr(driver, "_address", 0x18)
+        if i2c is None:
+            raise EventoidException("FIFO and interrupt modes need the LIS3DH's i2c bus")
+        self._i2c     = i2c
+        self._address = address
+        self._reg     = bytearray(1)
+
+    def _fifo_init(self):
+        self._buf     = bytearray(6 * _FIFO_SIZE)
+        mv = memoryview(self._buf)
+        self._views   = [mv[:6*n] for n in range(_FIFO_SIZE + 1)]   # so draining n samples doesn't allocate
+        self._sample  = array('i', (0, 0, 0))                       # one sample's axes, in output counts
+        self.overruns = 0                                          # drains that found the FIFO overflowed
+
+        odr = self._read_reg(_REG_CTRL1) >> 4
+        self._period_us = _ODR_US[odr] if odr < len(_ODR_US) else 0
+        if not self._period_us:
+            raise EventoidException("FIFO mode needs the LIS3DH's data rate set")
+        self._divider  = _DIVIDER[(self._read_reg(_REG_CTRL4) >> 4) & 3]
+        self._drain_ms = max(1, (self._period_us * (_FIFO_SIZE // 2)) // 1000)
+        self._t_drained = time.ticks_ms()
+
+        self._write_reg(_REG_CTRL5, self._read_reg(_REG_CTRL5) | _CTRL5_FIFO_EN)
+        self._write_reg(_REG_FIFO_CTRL, 0)                          # bypass, to empty it
+        self._write_reg(_REG_FIFO_CTRL, _FIFO_MODE_STREAM)
+
+    def _int_init(self, duration):
+        self._polled      = False
+        self.eo_type      = "LIS3DH.non-polled"
+        self._pending     = False         # a _service() has been scheduled and hasn't run yet
+        self._service_ref = self._service # bound once, since the ISR can't allocate one
+        self.interrupts   = 0             # times serviced, for diagnostics
+        self._ths_mg      = _THS_MG[(self._read_reg(_REG_CTRL4) >> 4) & 3]
+
+        self._write_reg(_REG_INT1_CFG, 0)                           # nothing until there are thresholds
+        self._write_reg(_REG_INT2_CFG, 0)
+        self._write_reg(_REG_INT1_DUR, duration)
+        self._write_reg(_REG_INT2_DUR, duration)
+        self._write_reg(_REG_CTRL5, self._read_reg(_REG_CTRL5) | _CTRL5_LIR_INT1 | _CTRL5_LIR_INT2)
+        if self.int2 is None:
+            self._write_reg(_REG_CTRL3, self._read_reg(_REG_CTRL3) | _CTRL3_I1_IA1 | _CTRL3_I1_IA2)
+        else:
+            self._write_reg(_REG_CTRL3, self._read_reg(_REG_CTRL3) | _CTRL3_I1_IA1)
+            self._write_reg(_REG_CTRL6, self._read_reg(_REG_CTRL6) | _CTRL6_I2_IA2)
+            self.int2.irq(trigger=Pin.IRQ_RISING, handler=self._isr_int)
+        self.int1.irq(trigger=Pin.IRQ_RISING, handler=self._isr_int)
+
+    def _int_arm(self):
+        """ _int_arm(): program the interrupt generators for the axes' current alarm states """
+        if (self.threshold_g is None) or (self.halfwidth_g is None):
+            return
+        ths_mg  = self._ths_mg
+        cfg_hi  = 0
+        cfg_lo  = 0
+        ths_hi  = _THS_MAX
+        ths_lo  = 0
+        alarms  = self._th.alarms
+        for axis in range(NUM_AXES):
+            if self.events[axis] == (None, None):
+                continue
+            g_high = self.threshold_g[axis] + self.halfwidth_g[axis]
+            g_low  = self.threshold_g[axis] - self.halfwidth_g[axis]
+            if g_low <= 0:
+                raise EventoidException("interrupt mode needs thresholds above their halfwidths, axis="+str(axis))
+            if alarms & (1 << axis):       # wake when its magnitude falls below (at least) g_low
+                cfg_lo |= _INT_CFG_XLIE << (2*axis)
+                ths_lo = max(ths_lo, -(-int(g_low * 1000) // ths_mg))
+            else:                          # wake when its magnitude rises above (at most) g_high
+                cfg_hi |= _INT_CFG_XHIE << (2*axis)
+                ths_hi = min(ths_hi, int(g_high * 1000) // ths_mg)
+        self._write_reg(_REG_INT1_THS, ths_hi)
+        self._write_reg(_REG_INT2_THS, min(ths_lo, _THS_MAX))
+        self._write_reg(_REG_INT1_CFG, cfg_hi)
+        self._write_reg(_REG_INT2_CFG, cfg_lo)
+        self._read_reg(_REG_INT1_SRC)                               # clear anything latched before
+        self._read_reg(_REG_INT2_SRC)
+
+    def _isr_int(self, pin):
+        if self._pending:
+            return
+        self._pending = True
+        try:
+            micropython.schedule(self._service_ref, 0)
+        except RuntimeError:          # schedule queue full: the next interrupt will try again
+            self._pending = False
+
+    def _service(self, _):
+        """ _service(): scheduled by an INT pin, read and check the acceleration and re-arm the interrupts """
+        self._pending = False
+        self.interrupts += 1
+        self._read_reg(_REG_INT1_SRC)                               # unlatch
+        self._read_reg(_REG_INT2_SRC)
+
+        changed = self._th.update(self.lis3dh.acceleration)
+        if changed:
+            self._events(changed, time.ticks_ms())
+            self._int_arm()
+
+        if self.int1.value() or ((self.int2 is not None) and self.int2.value()):
+            self._isr_int(None)       # latched again already
+
+    def _read_reg(self, reg):
+        self._i2c.readfrom_mem_into(self._address, reg, self._reg)
+        return self._reg[0]
+
+    def _write_reg(self, reg, value):
+        self._reg[0] = value
+        self._i2c.writeto_mem(self._address, reg, self._reg)
+
+    def _set_thresholds(self):
+        if self.threshold_g is None:
+            return
+        thresholds = [None if self.events[axis] == (None, None) else self.threshold_g[axis] for axis in range(NUM_AXES)]
+        self._th.set(thresholds, self.halfwidth_g)
+
+    @property
+    def prev_alarm(self):
+        """each axis' alarm state [type: list of bool]"""
+        return [self._th.alarmed(axis) for axis in range(NUM_AXES)]
 
     def __repr__(self):
         """ __repr__(): Return printable obj representation"""
@@ -75,10 +288,12 @@ class EventoidLIS3DH(eventoid.Eventoid):
         if len(thresholds_g) != NUM_AXES:
             raise BadParamFIXMEException("set_thresholds_g()")
         self.threshold_g = thresholds_g
+        self._set_thresholds()
 
-        g = self.lis3dh.acceleration
-        for axis in range(NUM_AXES):
-            self.prev_alarm[axis] = (g[axis] >= self.threshold_g[axis])
+        scale = self._th.scale / G_MPS             # from m/s^2 to the thresholds' sample units
+        self._th.reset([a * scale for a in self.lis3dh.acceleration])
+        if self.int1 is not None:
+            self._int_arm()
 
     def set_halfwidths_g(self, halfwidths_g=None):
         """halfwidths_g - per-axis triple of g-values above and below threshold for hysteresis band"""
@@ -89,6 +304,29 @@ class EventoidLIS3DH(eventoid.Eventoid):
             if len(halfwidths_g) != NUM_AXES:
                 raise Exception("set_halfwidths_g() param != "+NUM_AXIS)
             self.halfwidth_g = tuple(halfwidths_g)
+        self._set_thresholds()
+        if self.int1 is not None:
+            self._int_arm()
+
+    def _events(self, changed, t):
+        """ _events(): queue the events of the axes in the changed mask from the Thresholds """
+        evented = False
+        alarms = self._th.alarms
+        for axis in range(NUM_AXES):
+            bit = 1 << axis
+            if changed & bit:
+                event = self.events[axis][IDX_RISING if alarms & bit else IDX_FALLING]
+                if event is not None:
+                    self.eventer.add((event, t, axis))
+                    evented = True
+        return evented
+
+    def ms_to_deadline(self, now):
+        if self.int1 is not None:
+            return None
+        if not self.fifo:
+            return 0
+        return self._drain_ms - time.ticks_diff(now, self._t_drained)
 
     def poll(self):
         """ poll(): poll object for eventable conditions.
@@ -97,19 +335,47 @@ class EventoidLIS3DH(eventoid.Eventoid):
         if (self.threshold_g is None) or (self.halfwidth_g is None):
             Exception("threshold info not set")
 
-        evented = False
+        if self.fifo:
+            return self._poll_fifo()
+        if self.int1 is not None:
+            return False
+
+        changed = self._th.update(self.lis3dh.acceleration)
+        if not changed:
+            return False
+        return self._events(changed, time.ticks_ms())
+
+    def _poll_fifo(self):
+        """ _poll_fifo(): once it's had time to fill halfway, drain the FIFO and check every sample in it """
         t = time.ticks_ms()
-        g = self.lis3dh.acceleration
+        if time.ticks_diff(t, self._t_drained) < self._drain_ms:
+            return False
+        self._t_drained = t
 
-        for axis in range(NUM_AXES):
-            g_axis = g[axis] / G_MPS
-            if (g_axis > self.threshold_g[axis]+self.halfwidth_g[axis]) and not self.prev_alarm[axis]:
-                self.eventer.add((self.events[axis][IDX_RISING], t, axis))
-                self.prev_alarm[axis] = True
-                evented = True
-            elif (g_axis < self.threshold_g[axis]-self.halfwidth_g[axis]) and self.prev_alarm[axis]:
-                self.eventer.add((self.events[axis][IDX_FALLING], t, axis))
-                self.prev_alarm[axis] = False
-                evented = True
+        src = self._read_reg(_REG_FIFO_SRC)
+        if src & _FIFO_SRC_OVRN:
+            self.overruns += 1
+            n = _FIFO_SIZE
+        else:
+            n = src & _FIFO_SRC_FSS
+        if n == 0:
+            return False
+        self._i2c.readfrom_mem_into(self._address, _REG_OUT_X_L | _REG_AUTOINC, self._views[n])
+
+        evented = False
+        buf    = self._buf
+        sample = self._sample
+        th     = self._th
+        j = 0
+        for i in range(n):
+            for axis in range(NUM_AXES):
+                raw = buf[j] | (buf[j+1] << 8)
+                sample[axis] = raw - 0x10000 if raw & 0x8000 else raw
+                j += 2
+            changed = th.update(sample)
+            if changed:
+                ts = time.ticks_add(t, -(((n-1-i) * self._period_us) // 1000))   # the last sample is the newest
+                if self._events(changed, ts):
+                    evented = True
 
         return evented
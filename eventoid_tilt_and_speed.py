@@ -36,11 +36,16 @@
 # It's a silly example eventoid as written, but demonstrates how to fuse two sensors, with one
 # that happens to use polling, and one that happens to use interrupts.
 #
+# The hysteresis band that the speed is checked against moves with the tilt, so it's kept by a
+#   one-channel Thresholds (see thresholds.py) whose threshold is set from the tilt on every poll.
+#
 # Written by Eric Wertz (eric@edushields.com)
-# Last modified 27-Apr-2022 19:14
+# Last modified 16-Oct-2026 23:50
 
 from machine import ADC, Pin
+from array import array
 import time, eventoid
+from thresholds import Thresholds
 
 FAKE_SPEED_CHANGE_BEHAVIOR = True  # turn this off (or nuke its code) once you start pulse counting/measuring
 
@@ -65,6 +70,8 @@ class EventoidTiltAndSpeed(eventoid.Eventoid):
 
         self.t_prev_pulse_ms = 0      # this is when we saw the previous Hall pulse
         self.was_in_danger   = False  # remember previous condition for comparison to now
+        self._th     = Thresholds(1)  # speed against a +/- 10% band around the tilt, alarmed if dangerous
+        self._sample = array('f', [0])
         
         self.tilt  = EventoidTiltAndSpeed._compute_tilt(lis3dh) # most recent tilt  calculation result
         self.speed = 0                                          # most recent speed calculation result
@@ -117,25 +124,18 @@ class EventoidTiltAndSpeed(eventoid.Eventoid):
                     generate events based on whatever *changes* warrant it.
                     Returns True to Eventer if an event was queued, else False. """
 
-        evented = False
         t = time.ticks_ms()
 
         self.tilt = EventoidTiltAndSpeed._compute_tilt(self.lis3dh)
 
-        # FIXME placeholder fake tilt computation, with a +/- 10% thick hysteresis band
-        if self.speed > (self.tilt * 1.1):   # DANGEROUS range of operation
-            if not self.was_in_danger:
-                # it's now dangerous, but it wasn't before
-                self.eventer.add((self.events[1], t, (self.tilt,self.speed))) # FIXME provide event_data makes sense to you
-                evented = True
-            self.was_in_danger = True
-        elif self.speed < (self.tilt * 0.9): # SAFE range of operation
-            if self.was_in_danger:
-                # it's not dangerous now, but it was
-                self.eventer.add((self.events[0], t, (self.tilt,self.speed))) # FIXME (same as above)
-                evented = True
-            self.was_in_danger = False
-        else:
-            pass  # nothing changed enough to warrant an event
-
-        return evented
+        # FIXME placeholder fake tilt computation, with a +/- 10% thick hysteresis band:
+        #   DANGEROUS above tilt*1.1, SAFE again below tilt*0.9
+        self._th.set_channel(0, self.tilt, self.tilt * 0.1)
+        self._sample[0] = self.speed
+        if not self._th.update(self._sample):
+            return False  # nothing changed enough to warrant an event
+
+        self.was_in_danger = self._th.alarmed(0)
+        # FIXME provide event_data makes sense to you
+        self.eventer.add((self.events[1 if self.was_in_danger else 0], t, (self.tilt,self.speed)))
+        return True
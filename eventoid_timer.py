@@ -1,7 +1,7 @@
 # Eventoid_timer.py -- event checker for a (restartable) timer
 #
 # Written by Eric B. Wertz (eric@edushields.com)
-# Last modified 19-Apr-2022 13:17
+# Last modified 16-Oct-2026 23:45
 
 from machine import Pin
 import time, eventoid
@@ -10,8 +10,14 @@ class ExceptionTimerIncomplete(Exception):
     pass
 
 class EventoidTimerPolled(eventoid.Eventoid):
+    # If the eventer has a TimerService, the timer is scheduled there instead of being polled
+    #   on its own, and so it registers as a non-polled eventoid.
     def __init__(self, eventer, event, periodic=False, period_ms=None, data=None):
-        super().__init__(eventer, "timer.polled", True)
+        service = getattr(eventer, "timers", None)
+        super().__init__(eventer, "timer.polled", service is None)
+
+        self._service  = service
+        self._entry    = None     # our pending entry in the TimerService
 
         self.event     = event
         self.periodic  = periodic
@@ -34,9 +40,35 @@ class EventoidTimerPolled(eventoid.Eventoid):
         if data is not None:
             self.data = data
         self.expiration = time.ticks_add(time.ticks_ms(), msecs)
+        if self._service is not None:
+            if self._entry is not None:
+                self._service.cancel(self._entry)
+            self._entry = self._service.schedule(self.expiration, self)
 
     def cancel(self):
         self.expiration = None
+        if self._entry is not None:
+            self._service.cancel(self._entry)
+            self._entry = None
+
+    def deinit(self):
+        self.cancel()                # so that a timer in the TimerService doesn't outlive its unregistering
+
+    def _expire(self, t):
+        """Called by the TimerService when our expiration comes due."""
+        self._entry = None
+        self.eventer.add((self.event, t, self.data))
+        if self.periodic:
+            self.expiration = time.ticks_add(t, self.period_ms)
+            self._entry = self._service.schedule(self.expiration, self)
+        else:
+            self.expiration = None
+        return True
+
+    def ms_to_deadline(self, now):
+        if self.expiration is None:
+            return None
+        return time.ticks_diff(self.expiration, now)
 
     def poll(self):
         if self.expiration is not None:
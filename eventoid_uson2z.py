@@ -1,23 +1,127 @@
 # EventoidUsonic2Zone.py -- event checker for two zone-thresholded ultrasonic sensor:
 #
-# NB: The worst-case time that it takes to poll using this eventoid is the time that it takes
+# NB: With a ranging object (usonic) that measures synchronously, e.g. with its range_mm() method,
+#     the worst-case time that it takes to poll using this eventoid is the time that it takes
 #     for the ranging function to time-out and finally give up.
 #
+# Given a UsonicAsyncRanger instead, ranging is split-phase: one poll() sends the trigger pulse and
+#   returns right away, an interrupt handler on the echo pin timestamps the echo pulse's edges, and
+#   a later poll() turns the pulse width into a distance and zone.  Each poll then takes microseconds,
+#   and a new measurement is started every period_ms.
+#
+# A filter (see filters.py) can be given to smooth the distances before they're zoned.  Measurements
+#   outside of range_window (including USONIC_TIMEOUT, when the echo was missed) are thrown away
+#   before they get to it, so that a missed echo can't drag a smoothed distance across a boundary.
+#
 # Written by Eric B. Wertz (eric@edushields.com)
-# Last modified 18-Apr-2022 12:24
+# Last modified 16-Oct-2026 22:30
 
 from machine import Pin
+from array import array
 import time, eventoid
 
 USONIC_2ZONES_FAR   = 2
 USONIC_2ZONES_OUTER = 1
 USONIC_2ZONES_INNER = 0
 
+USONIC_TIMEOUT = -1         # result_mm() of a measurement that got no echo in time
+
+class UsonicAsyncRanger:
+    """Split-phase ranging of an HC-SR04 style ultrasonic sensor, timing the echo pulse with interrupts."""
+
+    def __init__(self, pin_trigger, pin_echo, timeout_us=30000):
+        """
+        UsonicAsyncRanger() - ranger using the trigger/echo pins of an ultrasonic sensor
+
+        pin_trigger - instance of machine.Pin connected to the sensor's trigger input
+        pin_echo - instance of machine.Pin connected to the sensor's echo output
+        timeout_us - usecs after the trigger to give up on an echo (30ms is ~5m)
+        """
+        self.pin_trigger = pin_trigger
+        self.pin_echo    = pin_echo
+        self.timeout_us  = timeout_us
+        self.busy        = False
+
+        self._edges   = array('i', (0, 0))   # ticks_us of the echo's rising and falling edges
+        self._n_edges = 0
+        self._t_start = 0
+        self._t_started_ms = None            # ticks_ms of the last start(), for poll_mm()
+
+        pin_trigger.init(Pin.OUT, value=0)
+        pin_echo.init(Pin.IN)
+        pin_echo.irq(trigger=Pin.IRQ_RISING|Pin.IRQ_FALLING, handler=self._isr_echo)
+
+    def __repr__(self):
+        return "UsonicAsyncRanger(trigger="+str(self.pin_trigger)+",echo="+str(self.pin_echo)+\
+               ",timeout_us="+str(self.timeout_us)+",busy="+str(self.busy)+")"
+
+    def _isr_echo(self, pin):
+        t = time.ticks_us()
+        n = self._n_edges
+        if pin.value():
+            if n == 0:
+                self._edges[0] = t
+                self._n_edges = 1
+        elif n == 1:
+            self._edges[1] = t
+            self._n_edges = 2
+
+    def start(self):
+        """ start(): send the trigger pulse, beginning a measurement """
+        self._n_edges = 0
+        self.pin_trigger.value(1)
+        time.sleep_us(10)
+        self.pin_trigger.value(0)
+        self._t_start = time.ticks_us()
+        self._t_started_ms = time.ticks_ms()
+        self.busy = True
+
+    def result_mm(self):
+        """
+        result_mm(): the distance measured in mm, USONIC_TIMEOUT if there was no echo, or None if
+          no measurement has finished since the last call.
+        """
+        if not self.busy:
+            return None
+        if self._n_edges == 2:
+            self.busy = False
+            return (time.ticks_diff(self._edges[1], self._edges[0]) * 100) // 582
+        if time.ticks_diff(time.ticks_us(), self._t_start) > self.timeout_us:
+            self.busy = False
+            return USONIC_TIMEOUT
+        return None
+
+    def ms_to_result(self):
+        """ ms_to_result(): msecs until the measurement in progress has to have finished """
+        return (self.timeout_us - time.ticks_diff(time.ticks_us(), self._t_start) + 999) // 1000
+
+    def poll_mm(self, period_ms):
+        """
+        poll_mm(): for polling eventoids, return a finished measurement (see result_mm()), or else start
+          the next one once period_ms have passed since the last one started, and return None.
+        """
+        if self.busy:
+            return self.result_mm()
+        if (self._t_started_ms is None) or (time.ticks_diff(time.ticks_ms(), self._t_started_ms) >= period_ms):
+            self.start()
+        return None
+
+    def ms_to_deadline(self, now, period_ms):
+        """ ms_to_deadline(): msecs from now until poll_mm() has something to do """
+        if self.busy:
+            return self.ms_to_result()
+        if self._t_started_ms is None:
+            return 0
+        return period_ms - time.ticks_diff(now, self._t_started_ms)
+
 class EventoidUsonic2ZonesPolled(eventoid.Eventoid):
-    def __init__(self, eventer, usonic, range_window, zones, hysteresis_mm, debug):
+    def __init__(self, eventer, usonic, range_window, zones, hysteresis_mm, debug, period_ms=60, filter=None):
         super().__init__(eventer, "uson2z", True)
 
         self.usonic = usonic
+        self.ranger = usonic if isinstance(usonic, UsonicAsyncRanger) else None
+        self.period_ms = period_ms         # ranger only: msecs between starting measurements
+        self.filter = filter
         (self.mm_min, self.mm_max) = range_window
         (self.mm_boundary_outer, self.events_outer) = zones[0]
         (self.mm_boundary_inner, self.events_inner) = zones[1]
@@ -30,12 +134,11 @@ class EventoidUsonic2ZonesPolled(eventoid.Eventoid):
 
     def __repr__(self):
         return super().__repr__() +\
-               ",range="+str(self.range_window)+",zones="+str(self.zones)+\
-               ",hyst="+str(self.hysteresis_mm+","+str(debug))
-
-    def _usonic_get_zone(self):
-        mm = self.usonic.range_mm()
+               ",range="+str((self.mm_min,self.mm_max))+\
+               ",zones="+str(((self.mm_boundary_outer,self.events_outer),(self.mm_boundary_inner,self.events_inner)))+\
+               ",hyst="+str(self.mm_hysteresis)+",debug="+str(self.debug)+",zone="+str(self.zone_last)
 
+    def _usonic_get_zone(self, mm):
         if (mm < self.mm_min) or (mm > self.mm_max):  # toss all "unreliable" values
             return None
 
@@ -64,11 +167,23 @@ class EventoidUsonic2ZonesPolled(eventoid.Eventoid):
 
         return (ret_zone, mm)
 
+    def ms_to_deadline(self, now):
+        return 0 if self.ranger is None else self.ranger.ms_to_deadline(now, self.period_ms)
+
     # TODO/FIXME: there's an ugly division of labor between this function and _usonic_get_zone
     #   that could use some cleaning-up
-    # Note: it takes about 15ms to call _usonic_get_zone(), so this will block for that long
+    # Note: it takes about 15ms to call range_mm() synchronously, so this will block for that long
+    #   unless a UsonicAsyncRanger is used
     def poll(self):
-        if (z := self._usonic_get_zone()) is None: return False
+        if self.ranger is None:
+            mm = self.usonic.range_mm()
+        elif (mm := self.ranger.poll_mm(self.period_ms)) is None:
+            return False
+        if (mm < self.mm_min) or (mm > self.mm_max):  # toss all "unreliable" values before filtering
+            return False
+        if self.filter is not None:
+            mm = self.filter.update(mm)
+        if (z := self._usonic_get_zone(mm)) is None: return False
         z,mm = z
         if z == (zone_last := self.zone_last): return False
 
@@ -0,0 +1,125 @@
+# eventoid_usonnz.py -- event checker for an ultrasonic sensor with any number of distance zones
+#
+# This is the generalization of EventoidUsonic2ZonesPolled to N zones, each one bounded by a
+#   distance and having its own (entering,exiting) events.  Zones are numbered from 0 (beyond all
+#   of the boundaries, i.e. "far") up to N (inside all of them, i.e. nearest).  Every boundary has
+#   the same hysteresis: an object has to get hysteresis_mm closer than a boundary to enter it,
+#   and hysteresis_mm farther than it to exit it again.
+#
+# Since the hysteresis depends on which side of each boundary the object already is, the
+#   effective thresholds for every possible current zone are worked out when the eventoid is
+#   created, so that finding the new zone from a distance is a single binary search.  When the
+#   object moves across several boundaries between measurements, every boundary crossed queues
+#   its event, in the order they'd have been crossed (outermost first when approaching,
+#   innermost first when leaving), all in the same poll().
+#
+# The sensor (usonic) can be either an object with a synchronous range_mm() method or an
+#   eventoid_uson2z.UsonicAsyncRanger for split-phase ranging, as for EventoidUsonic2ZonesPolled.
+#   Likewise, measurements outside of range_window (including missed echoes) are thrown away
+#   before they get to the filter, if any.
+#
+# Last modified 16-Oct-2026 22:45
+
+from array import array
+import time, eventoid
+from eventoid import EventoidException, bisect_left
+from eventoid_uson2z import UsonicAsyncRanger
+
+USONIC_ZONE_FAR = 0
+
+class EventoidUsonicZonesPolled(eventoid.Eventoid):
+    """EventoidUsonicZonesPolled - generate events for an object moving between N distance zones."""
+
+    def __init__(self, eventer, usonic, range_window, zones, hysteresis_mm, debug=None, period_ms=60, filter=None):
+        """
+        EventoidUsonicZonesPolled - create obj for ranging an ultrasonic sensor against N zone boundaries
+
+        eventer - Eventer maintaining the queue of generated events
+        usonic - ultrasonic sensor with a range_mm() method, or a UsonicAsyncRanger
+        range_window - (min,max) mm, outside of which measurements are ignored
+        zones - sequence of (boundary_mm, (entering,exiting)) for each zone, in any order
+        hysteresis_mm - mm on each side of every boundary for hysteresis
+        debug - (optional) print distances that changed by more than this many mm, or None
+        period_ms - (optional) msecs between measurements with a UsonicAsyncRanger
+        filter - (optional) filter whose update() is applied to each measurement, e.g. filters.MedianFilter
+        """
+        super().__init__(eventer, "usonnz", True)
+
+        zones = sorted(zones, key=lambda z: z[0], reverse=True)         # outermost first
+        boundaries = [z[0] for z in zones]
+        for i in range(1, len(boundaries)):
+            if boundaries[i] == boundaries[i-1]:
+                raise EventoidException("duplicate zone boundary: "+str(boundaries[i]))
+
+        self.usonic = usonic
+        self.ranger = usonic if isinstance(usonic, UsonicAsyncRanger) else None
+        self.period_ms     = period_ms
+        self.filter        = filter
+        (self.mm_min, self.mm_max) = range_window
+        self.boundaries    = tuple(boundaries)
+        self.events_enter  = tuple([z[1][0] for z in zones])
+        self.events_exit   = tuple([z[1][1] for z in zones])
+        self.mm_hysteresis = hysteresis_mm
+        self.debug         = debug
+        self.mm_last       = None
+        self.zone          = USONIC_ZONE_FAR
+
+        # In zone z, the object is inside boundaries 0..z-1 (so it stays inside boundary i while
+        #   mm <= boundaries[i]+hysteresis) and outside the rest (entering boundary i once
+        #   mm <= boundaries[i]-hysteresis).  These effective thresholds only get smaller going
+        #   inwards, so reversed they're sorted, and the new zone is the number of them >= mm.
+        n = len(boundaries)
+        self._thresholds = []
+        for z in range(n + 1):
+            t = [b + hysteresis_mm if i < z else b - hysteresis_mm for (i, b) in enumerate(boundaries)]
+            t.reverse()
+            self._thresholds.append(array('i', t))
+
+    def __repr__(self):
+        """ __repr__(): Return printable obj representation"""
+        return super().__repr__() + ",range="+str((self.mm_min,self.mm_max))+",boundaries="+str(self.boundaries)+\
+               ",events=("+str(self.events_enter)+","+str(self.events_exit)+"),hyst="+str(self.mm_hysteresis)+\
+               ",debug="+str(self.debug)+",zone="+str(self.zone)
+
+    def zone_of(self, mm):
+        """ zone_of(): zone that an object at mm would be in, coming from the current zone """
+        thresholds = self._thresholds[self.zone]
+        return len(thresholds) - bisect_left(thresholds, mm)
+
+    def ms_to_deadline(self, now):
+        return 0 if self.ranger is None else self.ranger.ms_to_deadline(now, self.period_ms)
+
+    # Note: it takes about 15ms to call range_mm() synchronously, so this will block for that long
+    #   unless a UsonicAsyncRanger is used
+    def poll(self):
+        """ poll(): poll object for eventable conditions.  Returns True to Eventer if an event was queued, else False. """
+        if self.ranger is None:
+            mm = self.usonic.range_mm()
+        elif (mm := self.ranger.poll_mm(self.period_ms)) is None:
+            return False
+        if (mm < self.mm_min) or (mm > self.mm_max):    # toss all "unreliable" values before filtering
+            return False
+        if self.filter is not None:
+            mm = self.filter.update(mm)
+
+        if self.debug is not None:  # only print if enabled and movement above threshold
+            if (self.mm_last is None) or (abs(mm - self.mm_last) > self.debug):
+                print(mm, "mm")
+            self.mm_last = mm
+
+        zone_last = self.zone
+        z = self.zone_of(mm)
+        if z == zone_last:
+            return False
+
+        t = time.ticks_ms()
+        if z > zone_last:                               # approaching: entering each boundary, outermost first
+            for i in range(zone_last, z):
+                if self.events_enter[i] is not None:
+                    self.eventer.add((self.events_enter[i], t, mm))
+        else:                                           # leaving: exiting each boundary, innermost first
+            for i in range(zone_last - 1, z - 1, -1):
+                if self.events_exit[i] is not None:
+                    self.eventer.add((self.events_exit[i], t, mm))
+        self.zone = z
+        return True
@@ -0,0 +1,159 @@
+# eventqueue.py -- fixed-capacity ring buffer holding an Eventer's pending events
+#
+# All of the slots are allocated once when the queue is created, so queueing an event
+#   never grows (and therefore never reallocates) the underlying list, and both adding
+#   to the tail and removing from the head are O(1) regardless of how deep the backlog is.
+#
+# When the queue is full, what happens to the next event is decided by the overflow policy:
+#   the oldest pending event can be thrown away to make room for it, or the new event itself
+#   can be thrown away.  Either way the overflow is counted so that it can be noticed later.
+#
+# Events queued from hard interrupt handlers can't be tuples (or anything else requiring
+#   allocation), so for those the queue also has parallel preallocated arrays into which
+#   append_isr() writes an integer event id, timestamp and (optional) small-integer payload.
+#   The event tuple isn't built until the event is removed by popleft() in the main loop.
+#   Each slot records which of the two representations it currently holds.
+#
+# Note: just like the list that it replaces, the queue does no locking of its own.  The Eventer
+#   is responsible for turning off interrupts around any manipulation of it.
+#
+# Last modified 16-Oct-2026 09:12
+
+from micropython import const
+from array import array
+
+OVERFLOW_DROP_OLDEST = const(0)   # discard the oldest queued event to make room for the new one
+OVERFLOW_DROP_NEWEST = const(1)   # discard the event being added
+OVERFLOW_RAISE       = const(2)   # discard the event being added and let the Eventer raise an exception
+
+# what representation each slot holds
+_SLOT_TUPLE   = const(0)          # event tuple in _slots[]
+_SLOT_INTDATA = const(1)          # ISR-queued event in the arrays, with integer data
+_SLOT_NODATA  = const(2)          # ISR-queued event in the arrays, data is None
+
+class EventQueue:
+    """
+    Preallocated FIFO ring buffer of (event, event_msecs, event_data) tuples.
+    """
+
+    def __init__(self, size=32, overflow=OVERFLOW_DROP_OLDEST):
+        """
+        Create an empty queue able to hold up to size events.
+
+        size - maximum number of pending events [type: int > 0]
+        overflow - one of OVERFLOW_* deciding which event is lost when the queue is full
+        """
+        if size < 1:
+            raise ValueError("queue size must be >= 1")
+        if overflow not in (OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST, OVERFLOW_RAISE):
+            raise ValueError("bad overflow policy: "+str(overflow))
+
+        self._slots    = [None] * size
+        self._kinds    = bytearray(size)          # _SLOT_* for each slot
+        self._events   = array('i', [0] * size)   # ISR-queued event ids, timestamps and data
+        self._times    = array('i', [0] * size)
+        self._datas    = array('i', [0] * size)
+        self._size     = size
+        self._head     = 0        # index of the oldest pending event
+        self._count    = 0
+        self.overflow  = overflow
+        self.overflows = 0        # number of events lost since creation (or reset_overflows())
+        self.appended  = 0        # number of events ever queued, wrapping at 2**30
+
+    def __repr__(self):
+        return "EventQueue(size="+str(self._size)+",count="+str(self._count)+\
+               ",overflow="+str(self.overflow)+",overflows="+str(self.overflows)+")"
+
+    def __len__(self):
+        return self._count
+
+    def capacity(self):
+        return self._size
+
+    def append(self, e):
+        """
+        Put an event at the tail of the queue.
+        Returns False if the queue was full and the event was dropped, otherwise True
+          (including when the oldest event was dropped to make room for it).
+        """
+        size = self._size
+        if self._count == size:
+            self.overflows += 1
+            if self.overflow != OVERFLOW_DROP_OLDEST:
+                return False
+            self._slots[self._head] = e          # tail == head when full: overwrite the oldest
+            self._kinds[self._head] = _SLOT_TUPLE
+            self._head = (self._head + 1) % size
+            self.appended = (self.appended + 1) & 0x3FFFFFFF
+            return True
+
+        i = (self._head + self._count) % size
+        self._slots[i] = e
+        self._kinds[i] = _SLOT_TUPLE
+        self._count += 1
+        self.appended = (self.appended + 1) & 0x3FFFFFFF
+        return True
+
+    def append_isr(self, event, t, data=None):
+        """
+        Put an event at the tail of the queue without allocating any memory, so that it is
+          safe to call from a hard interrupt handler.
+        event - event id [type: int]
+        t - event timestamp, usually from time.ticks_ms() [type: int]
+        data - (optional) event data [type: None | small int]
+        Returns False if the queue was full and the event was dropped, otherwise True.
+        """
+        size = self._size
+        if self._count == size:
+            self.overflows += 1
+            if self.overflow != OVERFLOW_DROP_OLDEST:
+                return False
+            i = self._head
+            self._slots[i] = None
+            self._head = (i + 1) % size
+        else:
+            i = (self._head + self._count) % size
+            self._count += 1
+
+        self.appended = (self.appended + 1) & 0x3FFFFFFF
+        self._events[i] = event
+        self._times[i]  = t
+        if data is None:
+            self._kinds[i] = _SLOT_NODATA
+        else:
+            self._kinds[i] = _SLOT_INTDATA
+            self._datas[i] = data
+        return True
+
+    def popleft(self):
+        """Remove and return the event at the head of the queue, or None if it is empty."""
+        if self._count == 0:
+            return None
+        head = self._head
+        kind = self._kinds[head]
+        if kind == _SLOT_TUPLE:
+            e = self._slots[head]
+            self._slots[head] = None             # don't keep the event (and its data) alive
+        else:
+            e = (self._events[head], self._times[head], None if kind == _SLOT_NODATA else self._datas[head])
+        self._head = (head + 1) % self._size
+        self._count -= 1
+        return e
+
+    def head_time(self):
+        """Return the timestamp of the event at the head of the queue, or None if it is empty."""
+        if self._count == 0:
+            return None
+        head = self._head
+        return self._slots[head][1] if self._kinds[head] == _SLOT_TUPLE else self._times[head]
+
+    def clear(self):
+        for i in range(self._size):
+            self._slots[i] = None
+        self._head  = 0
+        self._count = 0
+
+    def reset_overflows(self):
+        n = self.overflows
+        self.overflows = 0
+        return n
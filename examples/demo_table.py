@@ -0,0 +1,86 @@
+# demo_table.py: demo of driving a state machine from a transition table
+#
+# This is demo_gpio3.py's dimmable light, but with its event_process() replaced by a
+#   TransitionTable.  Each transition names the function that performs its action and the
+#   state to go to afterwards.  The table is checked for completeness when it is built, and
+#   dispatching an event is a direct lookup rather than a chain of if/elif comparisons.
+#
+# Last modified 16-Oct-2026 17:30
+
+from machine import Pin, PWM
+from eventer import Eventer
+from eventoid_gpio import EventoidGPIONonPolled
+from transitions import TransitionTable, SAME
+
+TRACE_STATES = True
+
+PIN_BUTTON0 = const(20)
+PIN_BUTTON1 = const(21)
+PIN_BUTTON2 = const(22)
+PIN_LIGHT   = const(16)
+
+BRIGHTNESS_MIN   = const(    0)
+BRIGHTNESS_MAX   = const(65535)
+BRIGHTNESS_RESET = const(  512)
+
+LIGHT_PWM_FREQ = const(1000)
+
+# States of the state machine
+STATE_DIMMABLE = const(0)
+STATE_OFF      = const(1)   # while the reset button is held down
+STATE_STR   = { STATE_DIMMABLE: 'STATE_DIMMABLE',
+                STATE_OFF:      'STATE_OFF' }
+
+# Events returned from all of our eventoids
+EVENT_UP          = const(0)
+EVENT_RESET_START = const(1)
+EVENT_RESET_END   = const(2)
+EVENT_DOWN        = const(3)
+EVENT_STR   = { EVENT_UP:          'EVENT_UP',
+                EVENT_RESET_START: 'EVENT_RESET_START',
+                EVENT_RESET_END:   'EVENT_RESET_END',
+                EVENT_DOWN:        'EVENT_DOWN' }
+
+eventer = Eventer(trace=TRACE_STATES, trace_info=(STATE_STR,EVENT_STR))
+
+#                                               (rising,falling) edge event(s)         the GPIO Pin
+eo_btn_up    = EventoidGPIONonPolled(eventer, (None,EVENT_UP),                     Pin(PIN_BUTTON0, Pin.IN))
+eo_btn_reset = EventoidGPIONonPolled(eventer, (EVENT_RESET_END,EVENT_RESET_START), Pin(PIN_BUTTON1, Pin.IN))
+eo_btn_down  = EventoidGPIONonPolled(eventer, (EVENT_DOWN,None),                   Pin(PIN_BUTTON2, Pin.IN))
+_ = eventer.register(eo_btn_up)
+_ = eventer.register(eo_btn_reset)
+_ = eventer.register(eo_btn_down)
+
+light_pwm = PWM(Pin(PIN_LIGHT, Pin.OUT))
+
+brightness = BRIGHTNESS_RESET
+
+def set_brightness(n):
+    global brightness
+    brightness = n
+    light_pwm.duty_u16(brightness)
+    print(f" <brightness={brightness}>", end="")
+
+# Actions, called as action(state, event, event_ms, event_data)
+def bright_up(state, event, event_ms, event_data):    set_brightness(min(brightness*2, BRIGHTNESS_MAX))
+def bright_down(state, event, event_ms, event_data):  set_brightness(brightness//2)
+def light_off(state, event, event_ms, event_data):    set_brightness(BRIGHTNESS_MIN)
+def light_reset(state, event, event_ms, event_data):  set_brightness(BRIGHTNESS_RESET)
+
+# Every (state, event) combination must be covered, or building the table raises an exception
+table = TransitionTable(STATE_STR.keys(), EVENT_STR.keys(), (
+#           state           event              action       next state
+          ( STATE_DIMMABLE, EVENT_UP,          bright_up,   SAME           ),
+          ( STATE_DIMMABLE, EVENT_DOWN,        bright_down, SAME           ),
+          ( STATE_DIMMABLE, EVENT_RESET_START, light_off,   STATE_OFF      ),
+          ( STATE_DIMMABLE, EVENT_RESET_END,   light_reset, SAME           ),
+          ( STATE_OFF,      EVENT_UP,          None,        SAME           ),   # ignored while held off
+          ( STATE_OFF,      EVENT_DOWN,        None,        SAME           ),
+          ( STATE_OFF,      EVENT_RESET_START, None,        SAME           ),
+          ( STATE_OFF,      EVENT_RESET_END,   light_reset, STATE_DIMMABLE ),
+        ), trace_info=(STATE_STR,EVENT_STR))
+
+light_pwm.duty_u16(brightness)
+light_pwm.freq(LIGHT_PWM_FREQ)
+
+eventer.loop(table, STATE_DIMMABLE)
@@ -0,0 +1,144 @@
+# filters.py -- streaming filters for cleaning up noisy samples before an eventoid acts on them
+#
+# A single noisy sample (an ADC glitch, an ultrasonic echo off the wrong thing, etc.) can push a
+#   reading across a threshold and back, generating a pair of spurious events each time.  These
+#   filters are given each new sample with update(x), which returns the filtered value to use
+#   instead.  Eventoids that take samples accept one as their filter= parameter, e.g.:
+#
+#       f = FilterChain((OutlierReject(2000), MedianFilter(5), EMAFilter(2)))
+#       eo = EventoidAnalogLevel(eventer, events, adc, 32768, 1000, filter=f)
+#
+# Samples must be integers.  All of the filters' state is allocated when they are created
+#   (using arrays for their sample history) and all of the arithmetic is integer arithmetic,
+#   so update() doesn't allocate memory and can even be used in an interrupt handler.
+#
+# Last modified 16-Oct-2026 20:15
+
+from array import array
+
+class MedianFilter:
+    """Rolling median of the last size samples, which ignores spikes shorter than half of that."""
+
+    def __init__(self, size=5):
+        """
+        size - number of samples to take the median of, best odd [type: int]
+        """
+        self.size    = size
+        self._ring   = array('i', [0] * size)    # samples in arrival order
+        self._sorted = array('i', [0] * size)    # the same samples, in order of value
+        self._n      = 0
+        self._i      = 0                         # ring index of the oldest sample
+
+    def __repr__(self):
+        return "MedianFilter(size="+str(self.size)+",n="+str(self._n)+")"
+
+    def reset(self):
+        self._n = 0
+        self._i = 0
+
+    def update(self, x):
+        ring = self._ring
+        s    = self._sorted
+        n    = self._n
+        if n < self.size:                        # still filling: x goes in at the end
+            j = n
+            n = self._n = n + 1
+        else:                                    # x replaces the oldest sample where it is
+            old = ring[self._i]
+            j = 0
+            while s[j] != old:
+                j += 1
+        ring[self._i] = x
+        self._i = (self._i + 1) % self.size
+
+        # slide x into its place in the sorted samples
+        while (j > 0) and (s[j-1] > x):
+            s[j] = s[j-1]
+            j -= 1
+        while (j < n-1) and (s[j+1] < x):
+            s[j] = s[j+1]
+            j += 1
+        s[j] = x
+        return s[n >> 1]
+
+class EMAFilter:
+    """Exponential moving average with a smoothing factor of 1/2**shift, in integer arithmetic."""
+
+    def __init__(self, shift=2):
+        """
+        shift - log2 of the averaging time constant in samples, e.g. 2 for a factor of 1/4 [type: int]
+        """
+        self.shift = shift
+        self._acc  = 0           # average << shift, to keep the fraction
+        self._primed = False
+
+    def __repr__(self):
+        return "EMAFilter(shift="+str(self.shift)+",value="+str(self._acc >> self.shift)+")"
+
+    def reset(self):
+        self._primed = False
+
+    def update(self, x):
+        if self._primed:
+            self._acc += x - (self._acc >> self.shift)
+        else:                    # start at the first sample rather than ramping up from 0
+            self._acc = x << self.shift
+            self._primed = True
+        return self._acc >> self.shift
+
+class OutlierReject:
+    """
+    Replace samples that differ from the last good one by more than max_delta with the last good one,
+      unless more than max_rejects in a row do, in which case the signal really has moved.
+    """
+
+    def __init__(self, max_delta, max_rejects=2):
+        """
+        max_delta - largest believable change between successive samples [type: int]
+        max_rejects - most samples in a row to reject [type: int]
+        """
+        self.max_delta   = max_delta
+        self.max_rejects = max_rejects
+        self.rejected    = 0     # total samples rejected, for tuning max_delta
+        self._last       = 0
+        self._run        = 0     # samples rejected in a row
+        self._primed     = False
+
+    def __repr__(self):
+        return "OutlierReject(max_delta="+str(self.max_delta)+",max_rejects="+str(self.max_rejects)+\
+               ",rejected="+str(self.rejected)+")"
+
+    def reset(self):
+        self._primed = False
+        self._run    = 0
+
+    def update(self, x):
+        if self._primed and (self._run < self.max_rejects) and (abs(x - self._last) > self.max_delta):
+            self._run += 1
+            self.rejected += 1
+            return self._last
+        self._run    = 0
+        self._last   = x
+        self._primed = True
+        return x
+
+class FilterChain:
+    """Several filters applied one after another, itself usable as a filter."""
+
+    def __init__(self, filters):
+        """
+        filters - filters to apply, in order [type: sequence]
+        """
+        self.filters = tuple(filters)
+
+    def __repr__(self):
+        return "FilterChain("+",".join([repr(f) for f in self.filters])+")"
+
+    def reset(self):
+        for f in self.filters:
+            f.reset()
+
+    def update(self, x):
+        for f in self.filters:
+            x = f.update(x)
+        return x
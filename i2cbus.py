@@ -0,0 +1,196 @@
+# i2cbus.py -- sharing I2C sensor readings among eventoids, one bus read per device per poll pass
+#
+# Eventoids on I2C sensors (EventoidLIS3DH, EventoidTiltAndSpeed, EventoidColor) read their driver's
+#   property (acceleration, etc.), or the sensor's registers, every time they're polled.  When
+#   several of them watch the same sensor, each reads it for itself, multiplying the bus traffic
+#   (and the time that each poll pass spends waiting on the bus) for what's the same reading anyway.
+#
+# An I2CBus owns the sensor drivers that are given to it, and hands out an I2CDevice for each driver
+#   property, which the eventoids are given in place of the driver itself:
+#
+#       bus   = I2CBus(eventer)
+#       accel = bus.device(lis3dh.LIS3DH_I2C(i2c), "acceleration", period_ms=10)
+#       eo_shock = EventoidLIS3DH(eventer, events_shock, accel)
+#       eo_tilt  = EventoidTiltAndSpeed(eventer, events_tilt, accel, Pin(PIN_PULSE, Pin.IN))
+#
+#   The first read of the property in a poll pass reads the driver and caches the value, along with
+#   when it was read, and any more reads in the same pass (by the same or other eventoids) return the
+#   cached value.  A device can also be paced with period_ms (e.g. to the sensor's output data rate),
+#   so that it isn't read again until its reading is that old, even in later passes.  Without an
+#   eventer, only period_ms decides when a reading is stale.  All of the driver's other attributes
+#   and methods are passed through to the driver.  With prefetch=True, every device that's due for a
+#   new reading is read at the very start of each pass, before any eventoid is polled, so that the
+#   bus traffic is batched together rather than spread among (and delaying) the eventoids' polls.
+#
+# Eventoids that read a sensor's registers themselves, rather than through a driver property (e.g.
+#   EventoidColor, when it's given the bus), can share a block of registers instead:
+#
+#       status_counts = bus.block(i2c, address, reg, nbytes)
+#
+#   hands out an I2CBlock, whose reading() is a bytearray of the nbytes registers starting at reg
+#   (with whatever auto-increment bit the device needs already in reg), read with a single
+#   readfrom_mem_into() and cached just like a property.  The block is read into one of two
+#   preallocated buffers, so reading it doesn't allocate memory, and a failed read leaves the
+#   previous reading intact.  The bytearray that reading() returns is only good until the block
+#   is next read, so it should be used right away rather than kept.
+#
+# If reading the driver fails (OSError from the bus), the previous reading keeps being returned, its
+#   age growing, and the failure is counted in errors, so that a single bus glitch doesn't end the
+#   program; the very first read of a device has nothing to fall back on, so its failure is raised.
+#
+# Readings are cached per poll pass, so an eventoid that reads a sensor from an interrupt's scheduled
+#   handler (e.g. EventoidLIS3DH's interrupt mode) should be given the driver itself rather than an
+#   I2CDevice, or call refresh() for a new reading.
+#
+# Last modified 16-Oct-2026 23:46
+
+import time
+
+class I2CDevice:
+    """Cached reading of a driver's property, usable wherever the driver is."""
+
+    def __init__(self, bus, driver, attr, period_ms=0):
+        self.bus       = bus
+        self.driver    = driver
+        self.attr      = attr
+        self.period_ms = period_ms
+        self.t_ms      = None        # ticks_ms of the latest reading, None until there is one
+        self.reads     = 0           # times the driver has been read, for diagnostics
+        self.errors    = 0           # reads that failed
+        self._value    = None
+        self._pass     = -1          # bus' pass of the latest reading
+
+    def __repr__(self):
+        return "I2CDevice("+str(self.attr)+",period_ms="+str(self.period_ms)+",reads="+str(self.reads)+\
+               ",errors="+str(self.errors)+")"
+
+    def __getattr__(self, name):
+        # only called for attributes that the I2CDevice doesn't have itself
+        if name == self.attr:
+            return self.reading()
+        return getattr(self.driver, name)
+
+    def age_ms(self):
+        """ age_ms(): msecs since the latest reading, or None if there hasn't been one """
+        return None if self.t_ms is None else time.ticks_diff(time.ticks_ms(), self.t_ms)
+
+    def reading(self):
+        """ reading(): the property's value, read from the driver only if the cached one is stale """
+        if self.t_ms is not None:
+            bus = self.bus
+            if (bus.eventer is not None) and (self._pass == bus.passes):
+                return self._value
+            if time.ticks_diff(time.ticks_ms(), self.t_ms) < self.period_ms:
+                return self._value
+        return self.refresh()
+
+    def _read(self):
+        return getattr(self.driver, self.attr)
+
+    def refresh(self):
+        """ refresh(): read the property from the driver now, and cache it """
+        try:
+            value = self._read()
+        except OSError:
+            self.errors += 1
+            if self.t_ms is None:
+                raise
+            return self._value
+        self._value = value
+        self.t_ms   = time.ticks_ms()
+        self._pass  = self.bus.passes
+        self.reads += 1
+        return value
+
+class I2CBlock(I2CDevice):
+    """Cached reading of a block of a device's registers, in a preallocated buffer."""
+
+    def __init__(self, bus, i2c, address, reg, nbytes, period_ms=0):
+        super().__init__(bus, i2c, None, period_ms)
+        self.address = address
+        self.reg     = reg
+        self.nbytes  = nbytes
+        self._value  = bytearray(nbytes)
+        self._spare  = bytearray(nbytes)  # read into, then swapped with _value if the read succeeds
+
+    def __repr__(self):
+        return "I2CBlock(address="+hex(self.address)+",reg="+hex(self.reg)+",nbytes="+str(self.nbytes)+\
+               ",period_ms="+str(self.period_ms)+",reads="+str(self.reads)+",errors="+str(self.errors)+")"
+
+    def _read(self):
+        buf = self._spare
+        self.driver.readfrom_mem_into(self.address, self.reg, buf)
+        self._spare = self._value
+        return buf
+
+class I2CBus:
+    """Owns a set of I2C sensor drivers, reading each of their shared properties at most once per poll pass."""
+
+    def __init__(self, eventer=None, prefetch=False):
+        """
+        I2CBus() - share sensor readings among eventoids
+
+        eventer - (optional) Eventer whose poll passes the readings are cached for
+        prefetch - (optional) read the devices that are due at the start of every pass [type: bool]
+        """
+        self.devices  = []
+        self.passes   = 0                     # poll passes started, for telling readings' passes apart
+        self.eventer  = eventer
+        self.prefetch = prefetch
+        self._pass_ref = self._new_pass       # bound once, to add and later remove the same one
+        if eventer is not None:
+            eventer.add_poll_hook(self._pass_ref)
+
+    def __repr__(self):
+        return "I2CBus(devices="+str(self.devices)+",passes="+str(self.passes)+",prefetch="+str(self.prefetch)+")"
+
+    def device(self, driver, attr, period_ms=0):
+        """
+        device() - the I2CDevice for a driver's property, the same one for every eventoid asking for it
+
+        driver - sensor driver instance
+        attr - name of the driver's property to share, e.g. "acceleration" [type: str]
+        period_ms - (optional) msecs that a reading stays fresh for, even across poll passes [type: int]
+        """
+        for dev in self.devices:
+            if (dev.driver is driver) and (dev.attr == attr):
+                dev.period_ms = max(dev.period_ms, period_ms)
+                return dev
+        dev = I2CDevice(self, driver, attr, period_ms)
+        self.devices.append(dev)
+        return dev
+
+    def block(self, i2c, address, reg, nbytes, period_ms=0):
+        """
+        block() - the I2CBlock for a block of a device's registers, the same one for every eventoid asking for it
+
+        i2c - instance of machine.I2C the device is on
+        address - I2C address of the device [type: int]
+        reg - register address to read from, including any auto-increment bit the device needs [type: int]
+        nbytes - number of bytes to read [type: int]
+        period_ms - (optional) msecs that a reading stays fresh for, even across poll passes [type: int]
+        """
+        for dev in self.devices:
+            if isinstance(dev, I2CBlock) and (dev.driver is i2c) and (dev.address == address) and \
+               (dev.reg == reg) and (dev.nbytes == nbytes):
+                dev.period_ms = max(dev.period_ms, period_ms)
+                return dev
+        dev = I2CBlock(self, i2c, address, reg, nbytes, period_ms)
+        self.devices.append(dev)
+        return dev
+
+    def refresh(self):
+        """ refresh(): read every device now, e.g. to take all of the sensors' readings together """
+        for dev in self.devices:
+            dev.refresh()
+
+    def _new_pass(self, _=None):
+        self.passes += 1
+        if self.prefetch:
+            for dev in self.devices:
+                dev.reading()
+
+    def deinit(self):
+        if self.eventer is not None:
+            self.eventer.remove_poll_hook(self._pass_ref)
+            self.eventer = None
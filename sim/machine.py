@@ -0,0 +1,367 @@
+# machine.py -- simulated machine module, for running the eventer and eventoids under CPython
+#
+# Put this directory at the front of sys.path, before anything imports machine, micropython
+#   or time, and the eventer, eventoids and programs using them run unchanged, e.g.:
+#
+#       import sys
+#       sys.path.insert(0, "sim")
+#       import machine, simclock
+#       from eventer import Eventer
+#
+# All time is virtual (see simclock.py): it only passes when the program sleeps or idles, or
+#   when the test/benchmark driving it calls simclock.clock.advance_ms().
+#
+# Pins, ADCs and I2C buses are identified by their id, so, just like the hardware, every
+#   Pin(n) object refers to the same simulated pin no matter how many of them are created.
+#   The sim_*() methods (which don't exist on a real MCU) are for the code driving the
+#   simulation to set input levels and ADC values immediately, on a schedule, or from a
+#   function evaluated on every read.  Pin edges matching an irq() trigger run the handler
+#   as a simulated interrupt: immediately, unless interrupts are disabled by disable_irq()
+#   or another simulated ISR is running, in which case it runs as soon as that's over.
+#   Functions passed to micropython.schedule() run after any running ISR has returned.
+#
+# idle(), lightsleep() and sim_wait_event() (which the Eventer uses for IDLE_EVENT under the
+#   simulator, in place of waiting on its threading.Event in real time) let virtual time pass.
+#
+# Last modified 16-Oct-2026 23:55
+
+import simclock
+
+clock = simclock.clock
+
+_irq_enabled = True
+_in_isr      = False
+_deferred    = []      # (handler, arg) of IRQs raised while they couldn't run
+_scheduled   = []      # (func, arg) from micropython.schedule()
+
+def disable_irq():
+    global _irq_enabled
+    state = _irq_enabled
+    _irq_enabled = False
+    return state
+
+def enable_irq(state=True):
+    global _irq_enabled
+    _irq_enabled = state
+    if state:
+        _run_pending()
+
+def _raise_irq(handler, arg):
+    _deferred.append((handler, arg))
+    _run_pending()
+
+def _schedule(func, arg):
+    _scheduled.append((func, arg))
+    _run_pending()
+
+def _run_pending():
+    global _in_isr
+    if _in_isr or not _irq_enabled:
+        return
+    while _deferred:
+        (handler, arg) = _deferred.pop(0)
+        _in_isr = True
+        try:
+            handler(arg)
+        finally:
+            _in_isr = False
+    while _scheduled and _irq_enabled:
+        (func, arg) = _scheduled.pop(0)
+        func(arg)
+
+def idle():
+    """Wait for the next 'interrupt': the next scheduled simulation event or the next 1ms tick."""
+    t_tick = (clock.now_us // 1000 + 1) * 1000
+    t_next = clock.next_us()
+    clock.run_until_us(t_tick if (t_next is None) or (t_next > t_tick) else t_next)
+
+def lightsleep(time_ms=None):
+    """Sleep until time_ms has passed or the next scheduled simulation event, whichever comes first."""
+    t_next = clock.next_us()
+    if time_ms is not None:
+        t_end = clock.now_us + time_ms * 1000
+        t_next = t_end if (t_next is None) or (t_next > t_end) else t_next
+    if t_next is not None:
+        clock.run_until_us(t_next)
+
+def sim_wait_event(event, time_ms):
+    """
+    Wait on a threading.Event (Eventer's IDLE_EVENT) in virtual time: run the simulation until the
+      event is set, e.g. by a simulated interrupt queueing an event, or time_ms has passed.
+    """
+    t_end = clock.now_us + int(time_ms * 1000)
+    while not event.is_set():
+        t_next = clock.next_us()
+        if (t_next is None) or (t_next > t_end):
+            clock.run_until_us(t_end)
+            break
+        clock.run_until_us(t_next)
+    return event.is_set()
+
+def freq(hz=None):
+    return 125000000
+
+class _PinState:
+    def __init__(self, id):
+        self.id       = id
+        self.mode     = Pin.IN
+        self.pull     = None
+        self.driven   = 0          # output value
+        self.external = None       # input level, None if floating
+        self.func     = None       # function returning the input level, if any
+        self.level    = 0          # last level seen, for edge detection
+        self.handler  = None
+        self.trigger  = 0
+        self.obj      = None       # Pin passed to the irq handler
+        self.watchers = []
+
+class Pin:
+    IN         = 0
+    OUT        = 1
+    OPEN_DRAIN = 2
+    ALT        = 3
+    PULL_UP    = 1
+    PULL_DOWN  = 2
+    IRQ_LOW_LEVEL  = 1
+    IRQ_HIGH_LEVEL = 2
+    IRQ_FALLING    = 4
+    IRQ_RISING     = 8
+
+    _pins = dict()
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        s = Pin._pins.get(id)
+        if s is None:
+            s = Pin._pins[id] = _PinState(id)
+        self._s = s
+        self.init(mode, pull, value)
+
+    def __repr__(self):
+        s = self._s
+        return "Pin(GPIO"+str(s.id)+", mode="+("OUT" if s.mode == Pin.OUT else "IN")+")"
+
+    def init(self, mode=-1, pull=-1, value=None):
+        s = self._s
+        if value is not None:
+            s.driven = 1 if value else 0
+        if mode != -1:
+            s.mode = mode
+        if pull != -1:
+            s.pull = pull
+        s.level = self._level()
+        self._notify()
+
+    def value(self, x=None):
+        s = self._s
+        if x is None:
+            return s.driven if s.mode == Pin.OUT else self._level()
+        s.driven = 1 if x else 0
+        self._notify()
+
+    __call__ = value
+
+    def on(self):     self.value(1)
+    def off(self):    self.value(0)
+    def high(self):   self.value(1)
+    def low(self):    self.value(0)
+    def toggle(self): self.value(1 - self._s.driven)
+
+    def irq(self, handler=None, trigger=IRQ_FALLING|IRQ_RISING, hard=False):
+        s = self._s
+        s.handler = handler
+        s.trigger = trigger if handler is not None else 0
+        s.obj     = self
+        s.level   = self._level()
+        return self
+
+    def _level(self):
+        s = self._s
+        if s.func is not None:
+            return 1 if s.func() else 0
+        if s.external is not None:
+            return s.external
+        return 1 if s.pull == Pin.PULL_UP else 0
+
+    def _notify(self):
+        for func in self._s.watchers:
+            func(self)
+
+    # ---- simulation only ----
+
+    def sim_set(self, level):
+        """Set the externally applied input level (None to float it), firing any irq() on an edge."""
+        self._s.external = None if level is None else (1 if level else 0)
+        self.sim_refresh()
+
+    def sim_func(self, func):
+        """Take the input level from func() on every read, e.g. to model a switch matrix."""
+        self._s.func = func
+        self.sim_refresh()
+
+    def sim_script(self, steps, repeat_ms=None):
+        """
+        Apply input levels at later times.
+        steps - sequence of (msecs_from_now, level)
+        repeat_ms - (optional) restart the whole sequence every repeat_ms msecs
+        """
+        t0 = clock.now_us
+        def apply(level):
+            return lambda: self.sim_set(level)
+        def start(t0):
+            for (ms, level) in steps:
+                clock.call_at_us(t0 + int(ms * 1000), apply(level))
+            if repeat_ms is not None:
+                t_next = t0 + int(repeat_ms * 1000)
+                clock.call_at_us(t_next, lambda: start(t_next))
+        start(t0)
+
+    def sim_refresh(self):
+        """Re-evaluate the input level, firing any irq() whose trigger matches the edge."""
+        s = self._s
+        level = self._level()
+        if level == s.level:
+            return
+        s.level = level
+        edge = Pin.IRQ_RISING if level else Pin.IRQ_FALLING
+        if s.trigger & edge:
+            _raise_irq(s.handler, s.obj)
+
+    def sim_watch(self, func):
+        """Call func(pin) whenever the pin's mode or output value changes."""
+        self._s.watchers.append(func)
+
+class ADC:
+    CORE_TEMP = 4
+
+    _adcs = dict()
+
+    def __init__(self, pin):
+        id = pin._s.id if isinstance(pin, Pin) else pin
+        s = ADC._adcs.get(id)
+        if s is None:
+            s = ADC._adcs[id] = { 'value': 0, 'func': None, 'reads': 0 }
+        self._id = id
+        self._s  = s
+
+    def __repr__(self):
+        return "ADC("+str(self._id)+")"
+
+    def read_u16(self):
+        s = self._s
+        s['reads'] += 1
+        v = s['value'] if s['func'] is None else int(s['func'](clock.now_us / 1000))
+        return max(0, min(v, 65535))
+
+    # ---- simulation only ----
+
+    def sim_set(self, value):
+        self._s['value'] = value
+        self._s['func']  = None
+
+    def sim_func(self, func):
+        """Take the value from func(msecs) on every read, where msecs is the (unwrapped) virtual time."""
+        self._s['func'] = func
+
+    def sim_script(self, steps):
+        """Apply values at later times.  steps - sequence of (msecs_from_now, value)"""
+        for (ms, value) in steps:
+            clock.call_after_ms(ms, (lambda v: lambda: self.sim_set(v))(value))
+
+    def sim_reads(self):
+        return self._s['reads']
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1, mode=PERIODIC, period=-1, freq=-1, callback=None, tick_hz=1000):
+        self._entry = None
+        if callback is not None:
+            self.init(mode=mode, period=period, freq=freq, callback=callback, tick_hz=tick_hz)
+
+    def init(self, mode=PERIODIC, period=-1, freq=-1, callback=None, tick_hz=1000):
+        self.deinit()
+        self._mode      = mode
+        self._callback  = callback
+        self._period_us = int(1000000 / freq) if freq > 0 else int(period * 1000000 / tick_hz)
+        self._entry     = clock.call_at_us(clock.now_us + self._period_us, self._fire)
+
+    def deinit(self):
+        if self._entry is not None:
+            clock.cancel(self._entry)
+            self._entry = None
+
+    def _fire(self):
+        if self._mode == Timer.PERIODIC:
+            self._entry = clock.call_at_us(clock.now_us + self._period_us, self._fire)
+        else:
+            self._entry = None
+        if self._callback is not None:
+            _raise_irq(self._callback, self)
+
+class I2C:
+    """
+    Simulated I2C bus.  Devices are attached to a bus with sim_attach(addr, device), where
+      device provides read(reg, nbytes) -> bytes and write(reg, data).
+    """
+
+    _buses = dict()
+
+    def __init__(self, id=0, scl=None, sda=None, freq=400000, timeout=50000):
+        self._id      = id
+        self._devices = I2C._buses.setdefault(id, dict())
+        self._reg     = dict()     # register pointer left by writeto(), per address
+        self.transactions = 0
+
+    def _dev(self, addr):
+        self.transactions += 1
+        dev = self._devices.get(addr)
+        if dev is None:
+            raise OSError(19)      # ENODEV, like the real thing
+        return dev
+
+    def scan(self):
+        return sorted(self._devices)
+
+    def readfrom_mem(self, addr, memaddr, nbytes, addrsize=8):
+        return bytes(self._dev(addr).read(memaddr, nbytes))
+
+    def readfrom_mem_into(self, addr, memaddr, buf, addrsize=8):
+        buf[:] = self._dev(addr).read(memaddr, len(buf))
+
+    def writeto_mem(self, addr, memaddr, buf, addrsize=8):
+        self._dev(addr).write(memaddr, bytes(buf))
+
+    def writeto(self, addr, buf, stop=True):
+        dev = self._dev(addr)
+        self._reg[addr] = buf[0]
+        if len(buf) > 1:
+            dev.write(buf[0], bytes(buf[1:]))
+        return len(buf)
+
+    def readfrom(self, addr, nbytes, stop=True):
+        return bytes(self._dev(addr).read(self._reg.get(addr, 0), nbytes))
+
+    def readfrom_into(self, addr, buf, stop=True):
+        buf[:] = self._dev(addr).read(self._reg.get(addr, 0), len(buf))
+
+    # ---- simulation only ----
+
+    def sim_attach(self, addr, device):
+        self._devices[addr] = device
+
+class SoftI2C(I2C):
+    def __init__(self, scl=None, sda=None, freq=400000, timeout=50000):
+        super().__init__("soft", scl=scl, sda=sda, freq=freq, timeout=timeout)
+
+def sim_reset():
+    """Forget all simulated pins, ADCs, I2C devices and pending interrupts, and restart the clock at 0."""
+    global _irq_enabled, _in_isr
+    Pin._pins.clear()
+    ADC._adcs.clear()
+    I2C._buses.clear()
+    del _deferred[:]
+    del _scheduled[:]
+    _irq_enabled = True
+    _in_isr      = False
+    clock.reset()
@@ -0,0 +1,36 @@
+# micropython.py -- simulated micropython module, for running under CPython
+#
+# See simclock.py and machine.py.
+#
+# Last modified 16-Oct-2026 14:05
+
+import simclock
+
+const = simclock.const
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+def schedule(func, arg):
+    """Run func(arg) soon, outside of interrupt context (after the current simulated ISR returns)."""
+    import machine
+    machine._schedule(func, arg)
+
+# code generation decorators are no-ops here
+def native(func):
+    return func
+
+def viper(func):
+    return func
+
+def heap_lock():
+    return 0
+
+def heap_unlock():
+    return 0
+
+def mem_info(verbose=False):
+    pass
+
+def opt_level(level=None):
+    return 0
@@ -0,0 +1,119 @@
+# simclock.py -- virtual clock for running the eventer and eventoids under CPython
+#
+# Time only moves when something asks it to: the program sleeping (time.sleep_ms(), etc.),
+#   machine.idle()/lightsleep(), or the test/benchmark driving it with advance_ms().  This
+#   makes simulated runs deterministic and lets them go thousands of times faster than real
+#   time.  Anything that has to happen at a particular time (scripted pin and ADC waveforms,
+#   machine.Timer callbacks, etc.) is scheduled on the clock and run as time passes it.
+#
+# Importing this module (which the simulated machine and micropython modules do) adds the
+#   MicroPython-only functions to the time module (ticks_ms(), ticks_us(), ticks_add(),
+#   ticks_diff(), sleep_ms(), sleep_us()), and const() to the builtins, so the code being
+#   simulated runs unchanged.
+#
+# Last modified 16-Oct-2026 14:05
+
+import builtins, heapq, time
+
+TICKS_PERIOD = 1 << 30               # same as MicroPython's ports
+_TICKS_MAX   = TICKS_PERIOD - 1
+_TICKS_HALF  = TICKS_PERIOD // 2
+
+class Clock:
+    """Virtual microsecond clock with a queue of callbacks to run at given times."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self, start_ms=0):
+        """Set the time to start_ms (e.g. just short of TICKS_PERIOD to test wraparound) and forget all callbacks."""
+        self.now_us   = start_ms * 1000
+        self.step_us  = 0            # time that passes on every ticks_*() read, to model execution time
+        self._pending = []
+        self._seq     = 0
+        self._running = False
+
+    def call_at_us(self, t_us, func):
+        """Run func() when the clock reaches t_us (now, if that's already passed).  Returns an entry for cancel()."""
+        entry = [max(t_us, self.now_us), self._seq, func]
+        self._seq += 1
+        heapq.heappush(self._pending, entry)
+        return entry
+
+    def call_after_ms(self, ms, func):
+        return self.call_at_us(self.now_us + int(ms * 1000), func)
+
+    def cancel(self, entry):
+        entry[2] = None
+
+    def next_us(self):
+        """Time of the next pending callback, or None."""
+        pending = self._pending
+        while pending and (pending[0][2] is None):
+            heapq.heappop(pending)
+        return pending[0][0] if pending else None
+
+    def advance_us(self, us):
+        """Move time forward by us microseconds, running each callback at its time along the way."""
+        self.run_until_us(self.now_us + us)
+
+    def advance_ms(self, ms):
+        self.run_until_us(self.now_us + int(ms * 1000))
+
+    def run_until_us(self, t_us):
+        if self._running:                # a callback sleeping: just move time along
+            self.now_us = max(self.now_us, t_us)
+            return
+        self._running = True
+        try:
+            while True:
+                t_next = self.next_us()
+                if (t_next is None) or (t_next > t_us):
+                    break
+                (t_cb, _, func) = heapq.heappop(self._pending)
+                self.now_us = max(self.now_us, t_cb)
+                func()
+            self.now_us = max(self.now_us, t_us)
+        finally:
+            self._running = False
+
+    def _read_us(self):
+        if self.step_us:
+            self.advance_us(self.step_us)
+        return self.now_us
+
+clock = Clock()
+
+def ticks_us():
+    return clock._read_us() & _TICKS_MAX
+
+def ticks_ms():
+    return (clock._read_us() // 1000) & _TICKS_MAX
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & _TICKS_MAX
+
+def ticks_diff(ticks1, ticks2):
+    return ((ticks1 - ticks2 + _TICKS_HALF) & _TICKS_MAX) - _TICKS_HALF
+
+def sleep_ms(ms):
+    clock.advance_us(int(ms * 1000))
+
+def sleep_us(us):
+    clock.advance_us(int(us))
+
+def const(x):
+    return x
+
+def install():
+    """Add the MicroPython time functions and const() to CPython.  Safe to call more than once."""
+    time.ticks_ms   = ticks_ms
+    time.ticks_us   = ticks_us
+    time.ticks_cpu  = ticks_us
+    time.ticks_add  = ticks_add
+    time.ticks_diff = ticks_diff
+    time.sleep_ms   = sleep_ms
+    time.sleep_us   = sleep_us
+    builtins.const  = const
+
+install()
@@ -0,0 +1,380 @@
+# simdevices.py -- simulated external devices to connect to simulated pins, ADCs and I2C buses
+#
+# Along with the LIS3DH, there's the bare-bones driver for it (LIS3DHDriver) that the host tests
+#   give the eventoids, and a canned shock to feed it (lis3dh_shock()).
+#
+# Last modified 16-Oct-2026 23:44
+
+from machine import Pin, clock
+
+class KeypadMatrix:
+    """
+    Matrix keypad: a column pin reads 1 whenever a pressed key connects it to a row pin
+      that is being driven high, otherwise 0.
+    """
+
+    def __init__(self, pinnums_rows, pinnums_cols):
+        self.rows    = [Pin(n) for n in pinnums_rows]
+        self.cols    = [Pin(n) for n in pinnums_cols]
+        self.pressed = set()     # (row,col)
+
+        for (c, pin) in enumerate(self.cols):
+            pin.sim_func((lambda c: lambda: self._col_level(c))(c))
+        for pin in self.rows:
+            pin.sim_watch(lambda pin: self._refresh())
+
+    def _col_level(self, c):
+        for (r, pin) in enumerate(self.rows):
+            s = pin._s
+            if ((r, c) in self.pressed) and (s.mode == Pin.OUT) and s.driven:
+                return 1
+        return 0
+
+    def _refresh(self):
+        for pin in self.cols:
+            pin.sim_refresh()
+
+    def press(self, row, col):
+        self.pressed.add((row, col))
+        self._refresh()
+
+    def release(self, row, col):
+        self.pressed.discard((row, col))
+        self._refresh()
+
+class UltrasonicSensor:
+    """
+    HC-SR04 style ultrasonic ranger: the end of a pulse on the trigger pin is followed, after
+      burst_us, by a pulse on the echo pin that is 5.82us long for every mm of distance_mm.
+      With nothing in range (distance_mm None), the echo pulse is the sensor's 38ms maximum.
+    """
+
+    def __init__(self, pinnum_trigger, pinnum_echo, distance_mm=None, burst_us=450):
+        self.trigger     = Pin(pinnum_trigger)
+        self.echo        = Pin(pinnum_echo)
+        self.distance_mm = distance_mm
+        self.burst_us    = burst_us
+        self.triggers    = 0
+        self._triggered  = False
+        self._func       = None
+
+        self.echo.sim_set(0)
+        self.trigger.sim_watch(self._watch_trigger)
+
+    def _watch_trigger(self, pin):
+        level = pin.value()
+        if self._triggered and not level:
+            self.triggers += 1
+            if self._func is not None:
+                self.distance_mm = self._func(self.triggers)
+            width_us = 38000 if self.distance_mm is None else (self.distance_mm * 582) // 100
+            t_echo = clock.now_us + self.burst_us
+            clock.call_at_us(t_echo, lambda: self.echo.sim_set(1))
+            clock.call_at_us(t_echo + width_us, lambda: self.echo.sim_set(0))
+        self._triggered = bool(level)
+
+    def sim_func(self, func):
+        """Take distance_mm from func(n) for the n'th measurement (counting from 1), e.g. to drop some echoes."""
+        self._func = func
+
+class QuadratureEncoder:
+    """
+    Rotary quadrature encoder: turn() steps its A and B outputs through the Gray code 00,10,11,01
+      (forwards) or its reverse, either all at once or one step every step_us.
+    """
+
+    _GRAY = ((0, 0), (1, 0), (1, 1), (0, 1))
+
+    def __init__(self, pinnum_a, pinnum_b):
+        self.a = Pin(pinnum_a)
+        self.b = Pin(pinnum_b)
+        self.steps = 0          # position, in quadrature steps
+        self._set()
+
+    def _set(self):
+        (a, b) = QuadratureEncoder._GRAY[self.steps & 3]
+        self.a.sim_set(a)
+        self.b.sim_set(b)
+
+    def step(self, direction):
+        self.steps += 1 if direction > 0 else -1
+        self._set()
+
+    def turn(self, steps, step_us=0):
+        """Move by steps quadrature steps (negative to go backwards), one every step_us from now."""
+        direction = 1 if steps > 0 else -1
+        for i in range(abs(steps)):
+            if step_us:
+                clock.call_at_us(clock.now_us + (i+1) * step_us, lambda: self.step(direction))
+            else:
+                self.step(direction)
+
+class LIS3DH:
+    """
+    LIS3DH accelerometer on a simulated I2C bus, at the register level: output data rate (CTRL_REG1),
+      full scale (CTRL_REG4), the output registers, and the 32-sample FIFO (CTRL_REG5 FIFO_EN,
+      FIFO_CTRL_REG bypass/FIFO/stream modes, FIFO_SRC_REG), and the two interrupt generators (the
+      OR of the INTx_CFG high/low events against INTx_THS, INTx_DURATION, latching by CTRL_REG5,
+      INTx_SRC, and routing to the INT1/INT2 pins by CTRL_REG3/CTRL_REG6).  New samples are generated
+      at the output data rate as the virtual time passes, from the g-values set with sim_set() or
+      sim_func().  Registers not modelled read back whatever was last written to them.
+    """
+
+    _ODR_US  = (0, 1000000, 100000, 40000, 20000, 10000, 5000, 2500, 625, 744)   # by CTRL_REG1 ODR
+    _DIVIDER = (16380, 8190, 4096, 1365)                                        # counts/g by CTRL_REG4 FS
+    _THS_MG  = (16, 32, 62, 186)                                                # mg/INTx_THS count, likewise
+
+    def __init__(self, i2c, address=0x18, pinnum_int1=None, pinnum_int2=None):
+        self.regs = bytearray(0x40)
+        self.regs[0x0F] = 0x33          # WHO_AM_I
+        self.regs[0x20] = 0x07          # power-down, XYZ enabled
+        self.fifo = []                  # (x,y,z) raw samples, oldest first
+        self.reads_out = 0              # samples read out of the output registers/FIFO
+        self._g     = (0.0, 0.0, 1.0)
+        self._func  = None
+        self._t_us  = clock.now_us      # time of the latest sample
+        self._last  = (0, 0, 0)
+        self._ia    = [0, 0]            # INTx_SRC of each generator
+        self._dur   = [0, 0]            # samples its condition has lasted
+        self.pins_int = (None if pinnum_int1 is None else Pin(pinnum_int1),
+                         None if pinnum_int2 is None else Pin(pinnum_int2))
+        i2c.sim_attach(address, self)
+        for pin in self.pins_int:
+            if pin is not None:
+                pin.sim_set(0)
+        if pinnum_int1 is not None:     # interrupts happen whether or not anything is reading
+            clock.call_after_ms(1, self._tick)
+
+    def _tick(self):
+        self._advance()
+        clock.call_after_ms(1, self._tick)
+
+    def sim_set(self, x, y, z):
+        self._advance()
+        self._g    = (x, y, z)
+        self._func = None
+
+    def sim_func(self, func):
+        """Take the g-values from func(msecs) -> (x,y,z) for every sample."""
+        self._advance()
+        self._func = func
+
+    def _raw(self, t_us):
+        g = self._g if self._func is None else self._func(t_us / 1000)
+        div = LIS3DH._DIVIDER[(self.regs[0x23] >> 4) & 3]
+        return tuple([max(-32768, min(32767, int(v * div))) for v in g])
+
+    def _fifo_mode(self):
+        return (self.regs[0x2E] >> 6) if (self.regs[0x24] & 0x40) else 0
+
+    def _sample(self, raw):
+        self._last = raw
+        self._interrupts(raw)
+        mode = self._fifo_mode()
+        if mode == 0:
+            return
+        if len(self.fifo) == 32:
+            if mode == 1:               # FIFO mode: stops when full
+                return
+            self.fifo.pop(0)            # stream mode: oldest is lost
+        self.fifo.append(raw)
+
+    def _advance(self):
+        odr = self.regs[0x20] >> 4
+        period = LIS3DH._ODR_US[odr] if odr < len(LIS3DH._ODR_US) else 0
+        if not period:
+            self._t_us = clock.now_us
+            return
+        n = (clock.now_us - self._t_us) // period
+        if n > 64:                      # only the latest ones can matter
+            self._t_us += (n - 64) * period
+            n = 64
+        for _ in range(n):
+            self._t_us += period
+            self._sample(self._raw(self._t_us))
+
+    def _interrupts(self, raw):
+        regs = self.regs
+        counts = (LIS3DH._THS_MG[(regs[0x23] >> 4) & 3] * LIS3DH._DIVIDER[(regs[0x23] >> 4) & 3]) // 1000
+        for gen in (0, 1):
+            cfg = regs[0x30 + 4*gen]
+            ths = (regs[0x32 + 4*gen] & 0x7F) * counts
+            src = 0
+            for axis in range(3):
+                mag = abs(raw[axis])
+                if (cfg & (0x02 << (2*axis))) and (mag > ths):
+                    src |= 0x02 << (2*axis)
+                if (cfg & (0x01 << (2*axis))) and (mag < ths):
+                    src |= 0x01 << (2*axis)
+            if src:
+                self._dur[gen] += 1
+            else:
+                self._dur[gen] = 0
+            active = src and (self._dur[gen] > (regs[0x33 + 4*gen] & 0x7F))
+            latched = regs[0x24] & (0x08 if gen == 0 else 0x02)
+            if active:
+                self._ia[gen] = 0x40 | src
+            elif not latched:
+                self._ia[gen] = 0
+        self._drive_pins()
+
+    def _drive_pins(self):
+        regs = self.regs
+        ia1 = self._ia[0] != 0
+        ia2 = self._ia[1] != 0
+        levels = (((regs[0x22] & 0x40) and ia1) or ((regs[0x22] & 0x20) and ia2),
+                  (regs[0x25] & 0x20) and ia2)
+        for (pin, level) in zip(self.pins_int, levels):
+            if pin is not None:
+                pin.sim_set(1 if level else 0)
+
+    def _fifo_src(self):
+        n = len(self.fifo)
+        return (0x20 if n == 0 else 0) | (0x40 if n == 32 else 0) | min(n, 31)
+
+    def read(self, reg, nbytes):
+        self._advance()
+        auto = reg & 0x80
+        reg &= 0x7F
+        out = bytearray()
+        while len(out) < nbytes:
+            if reg == 0x28:             # OUT_X_L: the start of a sample
+                if self._fifo_mode() and self.fifo:
+                    sample = self.fifo.pop(0)
+                else:
+                    sample = self._last
+                self.reads_out += 1
+                for v in sample:
+                    v &= 0xFFFF
+                    out += bytes((v & 0xFF, v >> 8))
+                reg = 0x28 if auto else 0x2D
+                continue
+            elif reg == 0x2F:
+                out.append(self._fifo_src())
+            elif (reg == 0x31) or (reg == 0x35):   # INTx_SRC: reading unlatches
+                gen = 0 if reg == 0x31 else 1
+                out.append(self._ia[gen])
+                self._ia[gen] = 0
+                self._drive_pins()
+            elif (reg > 0x28) and (reg <= 0x2D):
+                v = self._last[(reg - 0x28) >> 1] & 0xFFFF
+                out.append((v >> 8) if (reg & 1) else (v & 0xFF))
+            else:
+                out.append(self.regs[reg])
+            if auto:
+                reg = (reg + 1) & 0x3F
+        return bytes(out[:nbytes])
+
+    def write(self, reg, data):
+        self._advance()
+        reg &= 0x7F
+        for b in data:
+            if (reg == 0x2E) and ((b >> 6) == 0):
+                self.fifo = []          # bypass mode empties the FIFO
+            self.regs[reg] = b
+            reg = (reg + 1) & 0x3F
+
+I2CADDR_LIS3DH = 0x18
+G_MPS          = 9.8            # g in meters/sec^2, as in eventoid_lis3dh
+
+class LIS3DHDriver:
+    """just enough of a LIS3DH driver: 100Hz, +/-2g, and acceleration in m/s^2"""
+    def __init__(self, i2c, address=I2CADDR_LIS3DH):
+        self._i2c     = i2c
+        self._address = address
+        i2c.writeto_mem(address, 0x20, bytes((0x57,)))
+        i2c.writeto_mem(address, 0x23, bytes((0x88,)))
+
+    @property
+    def acceleration(self):
+        b = self._i2c.readfrom_mem(self._address, 0x28 | 0x80, 6)
+        g = []
+        for axis in range(3):
+            v = b[2*axis] | (b[2*axis+1] << 8)
+            g.append((v - 0x10000 if v & 0x8000 else v) / 16380 * G_MPS)
+        return tuple(g)
+
+def lis3dh_shock(at_ms, g=3.0, ms=20, y=0.0, z=1.0):
+    """g-values for LIS3DH.sim_func(): a g-sized, ms-long shock in X at at_ms, otherwise (0, y, z)"""
+    return lambda t_ms: (g if at_ms <= t_ms < at_ms + ms else 0.0, y, z)
+
+class TCS34725:
+    """
+    TCS34725 color sensor on a simulated I2C bus, at the register level: the command register
+      (repeated-byte and auto-increment reads), ENABLE (PON/AEN/WEN), ATIME, WTIME, CONFIG WLONG,
+      ID, STATUS AVALID and the clear/red/green/blue data registers.  Once enabled, a new set of
+      counts is latched at the end of every integration cycle as the virtual time passes, from the
+      values set with sim_set() or sim_func(), saturating at the integration time's overflow count.
+      Registers not modelled read back whatever was last written to them.
+    """
+
+    def __init__(self, i2c, address=0x29):
+        self.regs = bytearray(0x20)
+        self.regs[0x01] = 0xFF          # ATIME: 2.4ms
+        self.regs[0x03] = 0xFF          # WTIME
+        self.regs[0x12] = 0x44          # ID
+        self.data_reads = 0             # reads of the data registers
+        self._crgb  = (0, 0, 0, 0)
+        self._func  = None
+        self._t_us  = None              # end of the current cycle, None if not integrating
+        i2c.sim_attach(address, self)
+
+    def sim_set(self, c, r, g, b):
+        self._advance()
+        self._crgb = (c, r, g, b)
+        self._func = None
+
+    def sim_func(self, func):
+        """Take the counts from func(msecs) -> (c,r,g,b) for every integration."""
+        self._advance()
+        self._func = func
+
+    def _cycle_us(self):
+        regs = self.regs
+        us = (256 - regs[0x01]) * 2400
+        if regs[0x00] & 0x08:
+            us += (256 - regs[0x03]) * 2400 * (12 if regs[0x0D] & 0x02 else 1)
+        return us
+
+    def _advance(self):
+        if self._t_us is None:
+            return
+        cycle = self._cycle_us()
+        while self._t_us <= clock.now_us:
+            crgb = self._crgb if self._func is None else self._func(self._t_us / 1000)
+            overflow = min(65535, (256 - self.regs[0x01]) * 1024)
+            for i in range(4):
+                v = max(0, min(int(crgb[i]), overflow))
+                self.regs[0x14 + 2*i] = v & 0xFF
+                self.regs[0x15 + 2*i] = v >> 8
+            self.regs[0x13] |= 0x01     # AVALID
+            self._t_us += cycle
+
+    def read(self, reg, nbytes):
+        self._advance()
+        auto = (reg & 0x60) == 0x20
+        reg &= 0x1F
+        if (reg == 0x14) or (auto and (reg < 0x14 < reg + nbytes)):
+            self.data_reads += 1
+        out = bytearray()
+        for _ in range(nbytes):
+            out.append(self.regs[reg])
+            if auto:
+                reg = (reg + 1) & 0x1F
+        return bytes(out)
+
+    def write(self, reg, data):
+        self._advance()
+        auto = (reg & 0x60) == 0x20
+        reg &= 0x1F
+        for b in data:
+            if reg == 0x00:
+                running = (b & 0x03) == 0x03
+                if running and (self._t_us is None):
+                    self._t_us = clock.now_us + self._cycle_us()
+                elif not running:
+                    self._t_us = None
+                    self.regs[0x13] &= ~0x01
+            self.regs[reg] = b
+            if auto:
+                reg = (reg + 1) & 0x1F
@@ -0,0 +1,75 @@
+# simtest.py -- what all of the host tests have in common: finding the code and running the tests
+#
+# Each tests_*.py file that runs under CPython against the simulated machine module in ../sim
+#   starts with:
+#
+#       import simtest
+#       simtest.setup()
+#
+#   before importing anything else from the library, defines its tests as test_*() functions,
+#   and ends with:
+#
+#       simtest.run_tests(globals())
+#
+# A test that can't run here (e.g. for lack of an optional package) calls skip(), and is
+#   reported as SKIPPED rather than PASSED.
+#
+# Tests drive an Eventer with run(), which polls it once every every_ms of virtual time, or take
+#   whatever has been queued with drain().  Both return the events, or with fields, just those
+#   fields of each, e.g. fields=(0, 2) for (event, data).
+#
+# Last modified 16-Oct-2026 23:45
+
+import os, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class Skipped(Exception):
+    pass
+
+def setup():
+    """Put the simulated machine module (../sim), then the library, at the front of sys.path."""
+    for path in (ROOT, os.path.join(ROOT, "sim")):
+        if path in sys.path:
+            sys.path.remove(path)
+        sys.path.insert(0, path)
+
+def skip(reason):
+    raise Skipped(reason)
+
+def drain(eventer, fields=None):
+    """Take all of the events off of eventer's queue."""
+    events = []
+    while (e := eventer.next()) is not None:
+        events.append(e if fields is None else tuple([e[i] for i in fields]))
+    return events
+
+def run(eventer, ms, every_ms=1, fields=None):
+    """Poll eventer every every_ms for ms of virtual time, returning the events that it queued."""
+    import time
+    events = []
+    for _ in range(ms // every_ms):
+        eventer.poll()
+        events += drain(eventer, fields)
+        time.sleep_ms(every_ms)
+    return events
+
+def run_tests(namespace):
+    """Run every test_*() in namespace (a test file's globals()) in order, each on a freshly reset simulation, and exit."""
+    import machine
+    n_failed = 0
+    n = 1
+    for (name, test) in [(k, v) for (k, v) in namespace.items() if k.startswith("test_")]:
+        machine.sim_reset()
+        print(f"Test #{n}: {name} ", end="")
+        try:
+            test()
+            print("PASSED")
+        except Skipped as e:
+            print("SKIPPED", "("+str(e)+")")
+        except Exception as e:
+            n_failed += 1
+            print("***FAILED***", repr(e))
+        n += 1
+
+    sys.exit(1 if n_failed else 0)
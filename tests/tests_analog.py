@@ -0,0 +1,154 @@
+# tests_analog.py: tests for the analog eventoids and ADC sampling, run on the host
+#
+# This runs under CPython against the simulated machine module in ../sim:
+#       python tests/tests_analog.py
+#
+# Last modified 16-Oct-2026 23:45
+
+import simtest
+simtest.setup()
+
+from simtest import run
+import machine, simclock
+from machine import ADC
+from eventer import Eventer
+from eventoid_analevel import EventoidAnalogLevel
+from eventoid_anarange import EventoidAnalogMultirange
+from eventoid import EventoidException
+from adcsampler import ADCSampler, ADCScanner
+
+EVENT_UP   = const(0)
+EVENT_DOWN = const(1)
+
+PIN_ADC = 26
+
+clock = simclock.clock
+
+def alternating(center, noise):
+    """every read alternates between center+noise and center-noise"""
+    reads = [0]
+    def f(ms):
+        reads[0] += 1
+        return center + noise if reads[0] & 1 else center - noise
+    return f
+
+def test_oversample():
+    counts = []
+    for oversample in (1, 2):
+        machine.sim_reset()
+        adc = ADC(PIN_ADC)
+        adc.sim_func(alternating(32818, 3000))
+        eventer = Eventer()
+        eventer.register(EventoidAnalogLevel(eventer, (EVENT_UP, EVENT_DOWN), adc, 32768, 100,
+                                             oversample=oversample))
+        counts.append(len(run(eventer, 50, fields=(0, 2))))
+        assert adc.sim_reads() == oversample * 51                  # including the initial read
+    assert counts == [50, 0]
+
+def test_sampler():
+    adc = ADC(PIN_ADC)
+    adc.sim_func(lambda ms: int(ms) * 100)                         # ramp, 100 counts per msec
+    sampler = ADCSampler(adc, size=8, freq_hz=1000)
+    assert sampler.read_u16() == 0                                 # nothing sampled yet: read directly
+    clock.advance_ms(3)
+    assert sampler.read_u16() == (100 + 200 + 300) // 3
+    clock.advance_ms(17)
+    assert sampler.samples == 20
+    assert sampler.read_u16() == sum(range(1300, 2100, 100)) // 8  # last 8 samples only
+    sampler.stop()
+    clock.advance_ms(10)
+    assert sampler.samples == 20
+    repr(sampler)
+
+def test_sampler_eventoid():
+    adc = ADC(PIN_ADC)
+    adc.sim_func(alternating(4000, 2000))
+    sampler = ADCSampler(adc, size=4, freq_hz=2000)
+    clock.advance_ms(2)
+    eventer = Eventer()
+    eventer.register(EventoidAnalogMultirange(eventer, (EVENT_UP, EVENT_DOWN), sampler, 8))
+    reads = adc.sim_reads()
+    t0 = clock.now_us
+    for _ in range(100):
+        eventer.poll()
+    assert adc.sim_reads() == reads                                # polling never touched the ADC
+    assert clock.now_us == t0
+    adc.sim_func(alternating(30000, 2000))
+    assert [e[1] for e in run(eventer, 10, fields=(0, 2))] == [1, 2, 3]
+
+PINS_ADC = (26, 27, 28)
+
+def test_scanner_per_pass():
+    adcs = [ADC(p) for p in PINS_ADC]
+    for (i, adc) in enumerate(adcs):
+        adc.sim_set(10000 * (i + 1))
+    eventer = Eventer()
+    scanner = ADCScanner(adcs, eventer=eventer)
+    for i in (0, 1, 1, 2):                                         # two eventoids share channel 1
+        eventer.register(EventoidAnalogLevel(eventer, (EVENT_UP, EVENT_DOWN), scanner.channel(i), 35000, 500, data=i))
+    assert [a.sim_reads() for a in adcs] == [1, 1, 1]
+    for _ in range(10):
+        eventer.poll()
+    assert [a.sim_reads() for a in adcs] == [11, 11, 11]            # once per pass, however many readers
+    assert scanner.scans == 11
+    adcs[1].sim_set(50000)
+    adcs[2].sim_set(40000)
+    assert sorted(run(eventer, 3, fields=(0, 2))) == [(EVENT_UP, 1), (EVENT_UP, 1), (EVENT_UP, 2)]
+    scanner.deinit()
+    eventer.poll()
+    assert scanner.scans == 14
+
+def test_scanner_timer():
+    adcs = [ADC(p) for p in PINS_ADC]
+    scanner = ADCScanner(adcs, freq_hz=500)
+    adcs[2].sim_set(1234)
+    assert scanner.channel(2).read_u16() == 0
+    clock.advance_ms(10)
+    assert scanner.scans == 6
+    assert scanner.channel(2).read_u16() == 1234
+    scanner.deinit()
+    clock.advance_ms(10)
+    assert scanner.scans == 6
+    repr(scanner)
+
+def test_multirange_levels():
+    adc = ADC(PIN_ADC)
+    adc.sim_set(4000)
+    eventer = Eventer(max_events_per_pass=None)
+    eo = EventoidAnalogMultirange(eventer, (EVENT_UP, EVENT_DOWN), adc, 8)   # width 8191, hysteresis 1638
+    eventer.register(eo)
+    def step(v):
+        adc.sim_set(v)
+        return run(eventer, 1, fields=(0, 2))
+
+    assert eo.level == 0
+    assert step(9191) == []                                        # past the boundary, not the hysteresis
+    assert step(9900) == [(EVENT_UP, 1)]
+    assert step(7000) == []
+    assert step(6000) == [(EVENT_DOWN, 0)]
+    assert step(60000) == [(EVENT_UP, level) for level in range(1, 8)]
+    assert step(65535) == []
+    assert step(0) == [(EVENT_DOWN, level) for level in range(6, -1, -1)]
+    assert step(3*8191 + 1000) == [(EVENT_UP, 1), (EVENT_UP, 2)]   # not quite into 3
+    repr(eo)
+
+def test_multirange_hysteresis():
+    adc = ADC(PIN_ADC)
+    noisy = alternating(3*8191, 500)                               # noise on a boundary
+    adc.sim_func(noisy)
+    eventer = Eventer()
+    eventer.register(EventoidAnalogMultirange(eventer, (EVENT_UP, EVENT_DOWN), adc, 8, data=-1))
+    assert run(eventer, 50, fields=(0, 2)) == []
+    machine.sim_reset()
+    adc = ADC(PIN_ADC)
+    adc.sim_func(noisy)
+    eventer = Eventer()
+    eventer.register(EventoidAnalogMultirange(eventer, (EVENT_UP, EVENT_DOWN), adc, 8, data=-1, hysteresis=100))
+    assert len(run(eventer, 50, fields=(0, 2))) == 50
+    try:
+        EventoidAnalogMultirange(eventer, (EVENT_UP, EVENT_DOWN), adc, 8, hysteresis=4096)
+        assert False
+    except EventoidException:
+        pass
+
+simtest.run_tests(globals())
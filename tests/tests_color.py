@@ -0,0 +1,141 @@
+# tests_color.py: tests for the color eventoid against a simulated TCS34725, run on the host
+#
+# This runs under CPython against the simulated machine module in ../sim:
+#       python tests/tests_color.py
+#
+# Last modified 16-Oct-2026 23:45
+
+import simtest
+simtest.setup()
+
+from simtest import run
+import time
+from machine import I2C
+from simdevices import TCS34725
+from eventer import Eventer
+from eventoid import EventoidException
+from eventoid_color import EventoidColor, I2CADDR_TCS34725
+from i2cbus import I2CBus
+
+EVENT_RED        = const(0)
+EVENT_RED_GONE   = const(1)
+EVENT_GREEN      = const(2)
+EVENT_GREEN_GONE = const(3)
+EVENT_BLUE       = const(4)
+EVENT_BLUE_GONE  = const(5)
+
+EVENTS_COLORS = ((EVENT_RED, EVENT_RED_GONE), (EVENT_GREEN, EVENT_GREEN_GONE), None)
+
+class TCS34725Driver:
+    """just enough of a TCS34725 driver: a 24ms integration time, enabled"""
+    def __init__(self, i2c, address=I2CADDR_TCS34725):
+        self.i2c     = i2c
+        self.address = address
+        i2c.writeto_mem(address, 0x80 | 0x01, bytes((0xF6,)))
+        i2c.writeto_mem(address, 0x80 | 0x00, bytes((0x03,)))
+
+def setup():
+    i2c = I2C(0)
+    chip = TCS34725(i2c)
+    chip.sim_set(300, 100, 100, 100)
+    eventer = Eventer()
+    eo = EventoidColor(eventer, EVENTS_COLORS, TCS34725Driver(i2c))
+    eventer.register(eo)
+    return (i2c, chip, eventer, eo)
+
+def test_dominance():
+    (i2c, chip, eventer, eo) = setup()
+    assert (eo.period_ms == 24) and (eo.overflow_count == 10240)
+    assert run(eventer, 100) == []
+    chip.sim_set(300, 200, 50, 50)                                 # red is twice the average
+    assert run(eventer, 100) == [(EVENT_RED, 120, (200, 50, 50))]
+    assert eo.prev_color == 0
+    chip.sim_set(300, 140, 80, 80)                                 # 1.4 times: still in the band
+    assert run(eventer, 100) == []
+    chip.sim_set(300, 100, 190, 10)                                # straight to green
+    assert run(eventer, 100) == [(EVENT_RED_GONE, 312, (100, 190, 10)), (EVENT_GREEN, 312, (100, 190, 10))]
+    chip.sim_set(300, 0, 0, 200)                                   # blue has no events
+    assert run(eventer, 100) == [(EVENT_GREEN_GONE, 408, (0, 0, 200))]
+    assert eo.prev_color == 2
+    repr(eo)
+
+def test_pacing():
+    (i2c, chip, eventer, eo) = setup()
+    n0 = i2c.transactions
+    run(eventer, 250)
+    assert chip.data_reads == 10                                   # one per integration
+    assert i2c.transactions - n0 == 20                             # and its status check
+    assert eventer.ms_to_deadline() > 0                            # so the eventer can idle until then
+
+def test_not_valid():
+    i2c = I2C(0)
+    chip = TCS34725(i2c)
+    chip.regs[0x01] = 0xF6
+    eventer = Eventer()
+    eo = EventoidColor(eventer, EVENTS_COLORS, None, i2c=i2c)    # enables it itself
+    assert chip.regs[0x00] & 0x03 == 0x03
+    eventer.register(eo)
+    chip.regs[0x13] = 0                                            # (as if the first integration were slow)
+    eo._t_read = time.ticks_add(time.ticks_ms(), -100)
+    eventer.poll()
+    assert chip.data_reads == 0
+
+def test_overflow():
+    (i2c, chip, eventer, eo) = setup()
+    chip.sim_set(65535, 20000, 3000, 1000)                         # red has saturated: it's 0, so green
+    assert run(eventer, 50) == [(EVENT_GREEN, 24, (0, 3000, 1000))]
+
+def test_wait_time():
+    (i2c, chip, eventer, eo) = setup()
+    i2c.writeto_mem(I2CADDR_TCS34725, 0x80 | 0x03, bytes((0xFB,)))   # 12ms wait, x12
+    i2c.writeto_mem(I2CADDR_TCS34725, 0x80 | 0x0D, bytes((0x02,)))
+    i2c.writeto_mem(I2CADDR_TCS34725, 0x80 | 0x00, bytes((0x0B,)))
+    eo.update_timing()
+    assert eo.period_ms == 24 + 144
+
+def colors(ms):
+    """red at 100ms, then blue at 200ms"""
+    if ms < 100:
+        return (300, 100, 100, 100)
+    return (300, 200, 50, 50) if ms < 200 else (300, 50, 50, 200)
+
+def test_shared_bus():
+    i2c = I2C(0)
+    chip = TCS34725(i2c)
+    chip.sim_func(colors)
+    eventer = Eventer(max_events_per_pass=None)
+    bus = I2CBus(eventer)
+    tcs = TCS34725Driver(i2c)
+    eo_rg = EventoidColor(eventer, EVENTS_COLORS, tcs, bus=bus)
+    eo_b  = EventoidColor(eventer, (None, None, (EVENT_BLUE, EVENT_BLUE_GONE)), tcs, bus=bus)
+    assert eo_rg._block is eo_b._block                             # one block of registers for both
+    eventer.register(eo_rg)
+    eventer.register(eo_b)
+    n0 = i2c.transactions
+    events = run(eventer, 300)
+    assert chip.data_reads == 13                                   # one per integration for both (and one before)
+    assert i2c.transactions - n0 == 13                             # with the status in the same read
+    assert [e[0] for e in events] == [EVENT_RED, EVENT_RED_GONE, EVENT_BLUE]
+    assert (eo_rg.reads == 12) and (eo_b.reads == 12)
+    assert 0 < eventer.ms_to_deadline() <= 24
+
+def test_shared_bus_not_valid():
+    i2c = I2C(0)
+    chip = TCS34725(i2c)
+    chip.sim_set(300, 200, 50, 50)
+    eventer = Eventer()
+    eo = EventoidColor(eventer, EVENTS_COLORS, TCS34725Driver(i2c), bus=I2CBus(eventer))
+    eventer.register(eo)
+    eventer.poll()                                                 # read right away, before an integration
+    assert (chip.data_reads == 1) and (eo.reads == 0)
+    assert run(eventer, 30) == [(EVENT_RED, 24, (200, 50, 50))]   # and again a cycle later
+    assert chip.data_reads == 2
+
+def test_no_bus():
+    try:
+        EventoidColor(Eventer(), EVENTS_COLORS, object())
+        assert False, "no bus to use"
+    except EventoidException:
+        pass
+
+simtest.run_tests(globals())
@@ -0,0 +1,63 @@
+# tests_encoder.py: tests for the rotary encoder eventoid, run on the host
+#
+# This runs under CPython against the simulated machine module in ../sim:
+#       python tests/tests_encoder.py
+#
+# Last modified 16-Oct-2026 23:46
+
+import simtest
+simtest.setup()
+
+from simtest import run
+import time
+from machine import Pin
+from simdevices import QuadratureEncoder
+from eventer import Eventer
+from eventoid_encoder import EventoidEncoderPolled
+
+EVENT_UP   = const(0)
+EVENT_DOWN = const(1)
+
+PIN_A = 10
+PIN_B = 11
+
+def make():
+    knob = QuadratureEncoder(PIN_A, PIN_B)
+    eventer = Eventer()
+    eo = EventoidEncoderPolled(eventer, (EVENT_UP, EVENT_DOWN), Pin(PIN_A, Pin.IN), Pin(PIN_B, Pin.IN))
+    eventer.register(eo)
+    return (knob, eventer, eo)
+
+def test_detents():
+    (knob, eventer, eo) = make()
+    assert run(eventer, 2, fields=(0, 2)) == []
+    knob.turn(8)
+    assert run(eventer, 2, fields=(0, 2)) == [(EVENT_UP, 2)]
+    knob.turn(-4)
+    assert run(eventer, 2, fields=(0, 2)) == [(EVENT_DOWN, -1)]
+    knob.turn(3)
+    assert run(eventer, 2, fields=(0, 2)) == []                 # not a whole detent yet
+    knob.turn(1)
+    assert run(eventer, 2, fields=(0, 2)) == [(EVENT_UP, 1)]
+    knob.turn(-6)
+    assert run(eventer, 2, fields=(0, 2)) == [(EVENT_DOWN, -1)]
+    knob.turn(-2)
+    assert run(eventer, 2, fields=(0, 2)) == [(EVENT_DOWN, -1)]
+    assert (eo.position, eo.count(), eo.errors) == (0, 0, 0)
+    repr(eo)
+
+def test_fast_turning():
+    (knob, eventer, eo) = make()
+    knob.turn(4000, step_us=25)                                 # 10000 steps/sec, 100ms
+    events = []
+    for _ in range(30):
+        events += run(eventer, 5, fields=(0, 2))
+        time.sleep_ms(5)                                        # the eventer being slow
+    knob.turn(-1000, step_us=10)
+    events += run(eventer, 30, fields=(0, 2))
+    assert sum([d for (e, d) in events]) == (4000 - 1000) // 4  # no steps lost
+    assert len(events) < 100                                    # coalesced, not one per detent
+    assert all([(d > 0) == (e == EVENT_UP) for (e, d) in events])
+    assert eo.errors == 0
+
+simtest.run_tests(globals())
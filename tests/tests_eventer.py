@@ -0,0 +1,260 @@
+# tests_eventer.py: tests for the eventer's queueing, polling and idling, run on the host
+#
+# This runs under CPython against the simulated machine module in ../sim:
+#       python tests/tests_eventer.py
+#
+# Last modified 16-Oct-2026 23:45
+
+import simtest
+simtest.setup()
+
+from simtest import drain
+import machine, simclock, time
+from machine import Pin
+from eventer import Eventer, EventerException, IDLE_WFI, IDLE_EVENT, POLL_ROUND_ROBIN, OVERFLOW_DROP_NEWEST, OVERFLOW_RAISE, \
+                   StateMachineException
+from eventoid import Eventoid
+from eventoid_gpio import EventoidGPIOPolled, EventoidGPIONonPolled
+from eventoid_timer import EventoidTimerPolled
+from transitions import TransitionTable, TransitionTableException, ANY, SAME, ACTION_DECIDES, UNHANDLED_ERROR
+
+EVENT_RISING  = const(0)
+EVENT_FALLING = const(1)
+EVENT_TIMER   = const(2)
+
+clock = simclock.clock
+
+class EventoidChatty(Eventoid):
+    """queues an event on every poll"""
+    def __init__(self, eventer, event):
+        super().__init__(eventer, "chatty", True)
+        self.event = event
+        self.polls = 0
+
+    def poll(self):
+        self.polls += 1
+        self.eventer.add((self.event, time.ticks_ms(), self.polls))
+        return True
+
+def test_queue_order_and_overflow():
+    eventer = Eventer(queue_size=3)
+    for i in range(5):
+        eventer.add((i, 0, None))
+    assert [e[0] for e in drain(eventer)] == [2, 3, 4]
+    assert eventer.overflows() == 2
+
+    eventer = Eventer(queue_size=2, overflow=OVERFLOW_DROP_NEWEST)
+    for i in range(3):
+        eventer.add((i, 0, None))
+    assert [e[0] for e in drain(eventer)] == [0, 1]
+
+    eventer = Eventer(queue_size=1, overflow=OVERFLOW_RAISE)
+    eventer.add((0, 0, None))
+    try:
+        eventer.add((1, 0, None))
+        assert False, "no exception"
+    except EventerException:
+        pass
+
+def test_add_isr_keeps_order():
+    eventer = Eventer(queue_size=4)
+    eventer.add(("tuple", 1, [1, 2]))
+    eventer.add_isr(7, 2)
+    eventer.add_isr(8, 3, -5)
+    assert drain(eventer) == [("tuple", 1, [1, 2]), (7, 2, None), (8, 3, -5)]
+
+    eventer = Eventer(queue_size=2)         # overwriting the oldest with the other kind of event
+    eventer.add_isr(1, 1)
+    eventer.add_isr(2, 2)
+    eventer.add((3, 3, "x"))
+    assert drain(eventer) == [(2, 2, None), (3, 3, "x")]
+
+def test_gpio_non_polled_irq():
+    eventer = Eventer()
+    pin = Pin(20, Pin.IN)
+    eventer.register(EventoidGPIONonPolled(eventer, (EVENT_RISING, EVENT_FALLING), pin, data=3))
+    clock.advance_ms(5)
+    pin.sim_set(1)
+    assert drain(eventer) == [(EVENT_RISING, 5, 3)]
+    mask = machine.disable_irq()    # edge while interrupts are off is handled once they're back on
+    pin.sim_set(0)
+    assert len(drain(eventer)) == 0
+    machine.enable_irq(mask)
+    assert drain(eventer) == [(EVENT_FALLING, 5, 3)]
+
+def test_gpio_polled():
+    eventer = Eventer()
+    pin = Pin(21, Pin.IN)
+    eventer.register(EventoidGPIOPolled(eventer, (EVENT_RISING, EVENT_FALLING), pin))
+    pin.sim_script(((10, 1), (20, 0)))
+    for _ in range(30):
+        eventer.poll()
+        time.sleep_ms(1)
+    assert [e[:2] for e in drain(eventer)] == [(EVENT_RISING, 10), (EVENT_FALLING, 20)]
+
+def test_timer_service_wraparound():
+    clock.reset(start_ms=simclock.TICKS_PERIOD - 20)    # expirations straddle the ticks_ms wrap
+    eventer = Eventer(timer_service=True)
+    timers = [EventoidTimerPolled(eventer, EVENT_TIMER, data=i) for i in range(4)]
+    for t in timers:
+        eventer.register(t)
+    assert not timers[0].is_polled()
+    for (t, ms) in zip(timers, (30, 10, 40, 15)):
+        t.start(ms)
+    timers[2].cancel()
+    fired = []
+    for _ in range(50):
+        eventer.poll()
+        fired += [e[2] for e in drain(eventer)]
+        time.sleep_ms(1)
+    assert fired == [1, 3, 0], fired
+
+def test_poll_periods():
+    eventer = Eventer(max_events_per_pass=None)
+    fast = EventoidChatty(eventer, 0)
+    slow = EventoidChatty(eventer, 1)
+    eventer.register(slow, period_ms=10, phase_ms=5)
+    eventer.register(fast)
+    for _ in range(100):
+        eventer.poll()
+        time.sleep_ms(1)
+    assert fast.polls == 100
+    assert slow.polls == 10, slow.polls
+
+def test_round_robin():
+    eventer = Eventer(poll_policy=POLL_ROUND_ROBIN, queue_size=64)
+    eos = [EventoidChatty(eventer, i) for i in range(3)]
+    ids = [eventer.register(eo) for eo in eos]
+    for _ in range(30):
+        eventer.poll()
+        time.sleep_ms(1)
+    assert [eo.polls for eo in eos] == [10, 10, 10]
+    assert max(eventer.poll_gaps().values()) <= 3
+
+def test_unregister():
+    eventer = Eventer(poll_policy=POLL_ROUND_ROBIN, queue_size=64)
+    eos = [EventoidChatty(eventer, i) for i in range(4)]
+    ids = [eventer.register(eo) for eo in eos]
+    timer = EventoidTimerPolled(eventer, EVENT_TIMER)
+    tid = eventer.register(timer)
+    for _ in range(2):
+        eventer.poll()
+    eventer.unregister(ids[0])                                     # ahead of where the next pass starts
+    eventer.poll()
+    eventer.poll()
+    eventer.unregister(ids[3])                                     # just polled, ahead again
+    eventer.unregister(tid)                                        # where the next pass starts, so it wraps
+    for _ in range(3):
+        eventer.poll()
+    assert [e[0] for e in drain(eventer)] == [0, 1, 2, 3, 1, 2, 1]
+    assert sorted(eventer.poll_gaps()) == [ids[1], ids[2]]
+    assert (ids[0] not in eventer.eventoids) and (tid not in eventer.eventoids)
+    assert eventer.requires_polling()
+    try:
+        eventer.unregister(ids[0])
+        assert False, "already unregistered"
+    except EventerException:
+        pass
+
+    eventer = Eventer(timer_service=True)                          # a running timer in the TimerService
+    timer = EventoidTimerPolled(eventer, EVENT_TIMER)
+    tid = eventer.register(timer)
+    timer.start(10)
+    eventer.unregister(tid)
+    for _ in range(20):
+        eventer.poll()
+        time.sleep_ms(1)
+    assert drain(eventer) == []
+
+def test_idle_until_timer():
+    eventer = Eventer(idle=IDLE_WFI)
+    timer = EventoidTimerPolled(eventer, EVENT_TIMER)
+    eventer.register(timer)
+    timer.start(250)
+    t0 = time.ticks_ms()
+    eventer.idle()
+    assert time.ticks_diff(time.ticks_ms(), t0) == 250
+    assert eventer.idle_stats()['wakes_deadline'] == 1
+
+    pin = Pin(22, Pin.IN)           # an interrupt ends idling early
+    eventer.register(EventoidGPIONonPolled(eventer, (EVENT_RISING, None), pin))
+    timer.start(250)
+    pin.sim_script(((40, 1),))
+    eventer.idle()
+    assert time.ticks_diff(time.ticks_ms(), t0) == 290
+    assert drain(eventer) == [(EVENT_RISING, time.ticks_ms(), None)]
+
+def test_idle_event():
+    eventer = Eventer(idle=IDLE_EVENT, idle_max_ms=30)
+    timer = EventoidTimerPolled(eventer, EVENT_TIMER)
+    eventer.register(timer)
+    timer.start(50)
+    t0 = time.ticks_ms()
+    events = []
+    for _ in range(5):
+        eventer.idle()
+        eventer.poll()
+        events += drain(eventer)
+    assert events == [(EVENT_TIMER, 50, None)]
+    stats = eventer.idle_stats()
+    assert (stats['wakes_deadline'] == 1) and (stats['wakes_timeout'] == 4)   # 30, 50 and then three of 30
+    assert stats['idle_ms'] == time.ticks_diff(time.ticks_ms(), t0) == 140
+
+    pin = Pin(22, Pin.IN)           # an interrupt ends idling early
+    eventer.register(EventoidGPIONonPolled(eventer, (EVENT_RISING, None), pin))
+    pin.sim_script(((10, 1),))
+    eventer.idle()
+    assert drain(eventer) == [(EVENT_RISING, 150, None)]
+    assert eventer.idle_stats()['wakes_event'] == 1
+
+def test_profiling():
+    eventer = Eventer(queue_size=64)
+    clock.step_us = 3                       # every clock read takes 3us
+    eo = EventoidChatty(eventer, EVENT_RISING)
+    id = eventer.register(eo)
+    for _ in range(5):
+        eventer.poll()
+    assert eventer.stats()['polls'] == {}
+    eventer.set_profiling()
+    for _ in range(10):
+        eventer.poll()
+    p = eventer.stats()['polls'][id]
+    assert (p['count'] == 10) and (p['events'] == 10) and (p['us_min'] > 0)
+    assert p['us_min'] <= p['us_p50'] <= p['us_max']
+
+def test_transition_table():
+    S0, S1 = 0, 1
+    E0, E1, E2 = 0, 1, 2
+    calls = []
+    def act(state, event, event_ms, event_data):
+        calls.append((state, event))
+    def guard(state, event, event_ms, event_data):
+        return S0 if event_data else S1
+
+    try:
+        TransitionTable((S0, S1), (E0, E1, E2), ((S0, E0, act, S1),))
+        assert False, "incomplete table accepted"
+    except TransitionTableException:
+        pass
+
+    for states in ((S0, S1), ("s0", "s1")):                     # dense (list) and sparse (dict) tables
+        (s0, s1) = states
+        table = TransitionTable(states, (E0, E1, E2), (
+                    (s0,  E0, act,   s1),
+                    (s1,  E0, None,  s0),
+                    (ANY, E1, act,   SAME),
+                    (s1,  E1, guard, ACTION_DECIDES)),
+                    unhandled=UNHANDLED_ERROR)
+        calls.clear()
+        assert table(s0, E0, 0, None) == s1
+        assert table(s1, E0, 0, None) == s0
+        assert table(s0, E1, 0, None) == s0
+        assert calls == [(s0, E0), (s0, E1)]
+        assert table(s1, E1, 0, None) == S1 and table(s1, E1, 0, 1) == S0
+        try:
+            table(s0, E2, 0, None)
+            assert False, "unhandled event accepted"
+        except StateMachineException:
+            pass
+
+simtest.run_tests(globals())
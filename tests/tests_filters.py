@@ -0,0 +1,78 @@
+# tests_filters.py: tests for the sample filters and the eventoids using them, run on the host
+#
+# This runs under CPython against the simulated machine module in ../sim:
+#       python tests/tests_filters.py
+#
+# Last modified 16-Oct-2026 23:45
+
+import simtest
+simtest.setup()
+
+from simtest import run
+import machine
+from machine import ADC
+from eventer import Eventer
+from filters import MedianFilter, EMAFilter, OutlierReject, FilterChain
+from eventoid_analevel import EventoidAnalogLevel
+from eventoid_anarange import EventoidAnalogMultirange
+
+EVENT_UP   = const(0)
+EVENT_DOWN = const(1)
+
+PIN_ADC = 26
+
+def test_median():
+    f = MedianFilter(5)
+    assert [f.update(x) for x in (10, 30, 20)] == [10, 30, 20]      # median of what's there so far
+    assert [f.update(x) for x in (9999, 25, 15, -5000, 22)] == [30, 25, 25, 20, 22]
+    import random
+    random.seed(1)
+    f = MedianFilter(7)
+    xs = []
+    for _ in range(500):
+        xs.append(random.randint(-1000, 1000))
+        assert f.update(xs[-1]) == sorted(xs[-7:])[len(xs[-7:]) // 2]
+
+def test_ema():
+    f = EMAFilter(2)
+    assert f.update(1000) == 1000
+    assert [f.update(2000) for _ in range(4)] == [1250, 1437, 1578, 1683]
+    f.reset()
+    assert f.update(-40) == -40
+
+def test_outlier_reject():
+    f = OutlierReject(100, max_rejects=2)
+    assert [f.update(x) for x in (500, 550, 5000, 560, 3000, 3000, 3000, 3050)] == \
+           [500, 550, 550, 560, 560, 560, 3000, 3050]                # the 3rd 3000 in a row is real
+    assert f.rejected == 3
+
+def test_chain():
+    f = FilterChain((OutlierReject(100), MedianFilter(3)))
+    assert [f.update(x) for x in (100, 120, 9000, 110, 130)] == [100, 120, 120, 120, 120]
+
+def noisy(ms):
+    """slow ramp across the threshold with a 30000-count glitch every 7th msec"""
+    v = 20000 + int(ms) * 40
+    return v + 30000 if (int(ms) % 7) == 3 else v
+
+def test_fewer_spurious_events():
+    counts = []
+    for f in (None, MedianFilter(5)):
+        machine.sim_reset()
+        adc = ADC(PIN_ADC)
+        adc.sim_func(noisy)
+        eventer = Eventer()
+        eventer.register(EventoidAnalogLevel(eventer, (EVENT_UP, EVENT_DOWN), adc, 32768, 500, filter=f))
+        counts.append(len(run(eventer, 600, fields=(0, 2))))
+    assert counts[0] > 20                                          # every glitch crosses both ways
+    assert counts[1] == 1                                          # just the one real crossing
+
+def test_anarange_filter():
+    adc = ADC(PIN_ADC)
+    adc.sim_set(4000)
+    eventer = Eventer()
+    eventer.register(EventoidAnalogMultirange(eventer, (EVENT_UP, EVENT_DOWN), adc, 8, filter=MedianFilter(3)))
+    adc.sim_script(((3, 60000), (4, 4000)))                        # a 1ms glitch to the top of the range
+    assert run(eventer, 10, fields=(0, 2)) == []
+
+simtest.run_tests(globals())
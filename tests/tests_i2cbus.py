@@ -0,0 +1,157 @@
+# tests_i2cbus.py: tests for sharing I2C sensor readings among eventoids, run on the host
+#
+# This runs under CPython against the simulated machine module in ../sim:
+#       python tests/tests_i2cbus.py
+#
+# Last modified 16-Oct-2026 23:45
+
+import simtest
+simtest.setup()
+
+from simtest import run
+import time
+from machine import Pin, I2C
+from simdevices import LIS3DH, LIS3DHDriver, lis3dh_shock
+from eventer import Eventer
+from i2cbus import I2CBus
+from eventoid_lis3dh import EventoidLIS3DH
+from eventoid_tilt_and_speed import EventoidTiltAndSpeed
+
+EVENT_RISING  = const(0)
+EVENT_FALLING = const(1)
+EVENT_SAFE    = const(2)
+EVENT_DANGER  = const(3)
+
+I2CADDR_LIS3DH = const(0x18)
+
+PIN_PULSE = 20
+
+def setup():
+    i2c = I2C(0)
+    chip = LIS3DH(i2c, I2CADDR_LIS3DH)
+    driver = LIS3DHDriver(i2c)
+    chip.sim_func(lis3dh_shock(50, y=0.5))                     # tilted 45 degrees in Y
+    time.sleep_ms(20)
+    return (i2c, chip, driver)
+
+def add_eventoids(eventer, accel):
+    eo_x = EventoidLIS3DH(eventer, ((EVENT_RISING, EVENT_FALLING), None, None), accel)
+    eo_x.set_thresholds_g((1.5, 1.5, 1.5))
+    eo_z = EventoidLIS3DH(eventer, (None, None, (EVENT_RISING, EVENT_FALLING)), accel)
+    eo_z.set_thresholds_g((0.5, 0.5, 0.5))
+    eo_t = EventoidTiltAndSpeed(eventer, (EVENT_SAFE, EVENT_DANGER), accel, Pin(PIN_PULSE, Pin.IN))
+    eo_t.set_speed(60)                                             # too fast for 45 degrees
+    for eo in (eo_x, eo_z, eo_t):
+        eventer.register(eo)
+
+def test_shared():
+    (i2c, chip, driver) = setup()
+    eventer = Eventer(max_events_per_pass=None)
+    bus = I2CBus(eventer)
+    accel = bus.device(driver, "acceleration")
+    assert bus.device(driver, "acceleration") is accel             # one per property, however many ask
+    add_eventoids(eventer, accel)
+
+    n0 = i2c.transactions
+    events = run(eventer, 100, fields=(0, 1))
+    assert i2c.transactions - n0 == 100                            # one read per pass for all three
+    assert accel.reads == i2c.transactions - n0 + 1
+    assert events == [(EVENT_DANGER, 20), (EVENT_RISING, 50), (EVENT_FALLING, 70)]
+    assert accel._address == I2CADDR_LIS3DH                        # the driver's attributes pass through
+
+def test_unshared():
+    (i2c, chip, driver) = setup()
+    eventer = Eventer(max_events_per_pass=None)
+    add_eventoids(eventer, driver)
+    n0 = i2c.transactions
+    events = run(eventer, 100, fields=(0, 1))
+    assert i2c.transactions - n0 == 300                            # each reads it for itself
+    assert events == [(EVENT_DANGER, 20), (EVENT_RISING, 50), (EVENT_FALLING, 70)]
+
+def test_period():
+    (i2c, chip, driver) = setup()
+    eventer = Eventer(max_events_per_pass=None)
+    bus = I2CBus(eventer)
+    add_eventoids(eventer, bus.device(driver, "acceleration", period_ms=10))   # the LIS3DH's data rate
+    n0 = i2c.transactions
+    events = run(eventer, 100, fields=(0, 1))
+    assert i2c.transactions - n0 == 9                              # (and the one at 20ms, setting up)
+    assert events == [(EVENT_DANGER, 20), (EVENT_RISING, 50), (EVENT_FALLING, 70)]
+
+def test_no_eventer():
+    (i2c, chip, driver) = setup()
+    bus = I2CBus()
+    accel = bus.device(driver, "acceleration", period_ms=5)
+    n0 = i2c.transactions
+    for _ in range(20):
+        accel.acceleration
+        time.sleep_ms(1)
+    assert i2c.transactions - n0 == 4
+    assert accel.age_ms() == 5
+    accel.refresh()
+    assert (i2c.transactions - n0 == 5) and (accel.age_ms() == 0)
+
+def test_prefetch():
+    (i2c, chip, driver) = setup()
+    eventer = Eventer()
+    bus = I2CBus(eventer, prefetch=True)
+    accel = bus.device(driver, "acceleration", period_ms=10)
+    n0 = i2c.transactions
+    run(eventer, 50, fields=(0, 1))                                # read at the start of the pass, even unpolled
+    assert i2c.transactions - n0 == 5
+    eventer.poll()
+    g = accel.acceleration                                         # already read for this pass
+    assert i2c.transactions - n0 == 6
+    bus.deinit()
+    run(eventer, 50, fields=(0, 1))
+    assert i2c.transactions - n0 == 6
+
+def test_errors():
+    (i2c, chip, driver) = setup()
+    eventer = Eventer()
+    bus = I2CBus(eventer)
+    accel = bus.device(driver, "acceleration")
+    eventer.poll()
+    g = accel.acceleration
+    i2c._devices.pop(I2CADDR_LIS3DH)                               # it's gone off of the bus
+    time.sleep_ms(5)
+    eventer.poll()
+    assert accel.acceleration == g                                 # still the last good reading
+    assert (accel.errors == 1) and (accel.age_ms() == 5)
+
+    driver = LIS3DHDriver.__new__(LIS3DHDriver)                    # a driver for a chip that's never answered
+    driver._i2c     = i2c
+    driver._address = I2CADDR_LIS3DH
+    accel = I2CBus().device(driver, "acceleration")
+    try:
+        accel.acceleration
+        assert False, "nothing to fall back on"
+    except OSError:
+        pass
+
+def test_block():
+    (i2c, chip, driver) = setup()
+    eventer = Eventer()
+    bus = I2CBus(eventer)
+    block = bus.block(i2c, I2CADDR_LIS3DH, 0x28 | 0x80, 6, period_ms=10)
+    assert bus.block(i2c, I2CADDR_LIS3DH, 0x28 | 0x80, 6) is block
+    assert bus.device(driver, "acceleration") is not block
+    n0 = i2c.transactions
+    readings = []
+    for _ in range(100):
+        eventer.poll()
+        b = block.reading()
+        assert block.reading() is b                                # the same buffer for the whole pass
+        readings.append(b[0] | (b[1] << 8))
+        time.sleep_ms(1)
+    assert i2c.transactions - n0 == 10
+    assert (block.reads == 10) and (readings[35] == 32767)         # X during the shock, past 2g
+    i2c._devices.pop(I2CADDR_LIS3DH)
+    time.sleep_ms(10)
+    eventer.poll()
+    b = block.reading()
+    assert (b[0] | (b[1] << 8)) == readings[-1]                    # still the last good reading
+    assert block.errors == 1
+    repr(block)
+
+simtest.run_tests(globals())
@@ -0,0 +1,102 @@
+# tests_keypad.py: tests for the keypad eventoid(s), run on the host
+#
+# This runs under CPython against the simulated machine module in ../sim:
+#       python tests/tests_keypad.py
+#
+# Last modified 16-Oct-2026 23:45
+
+import simtest
+simtest.setup()
+
+from simtest import run, drain
+import machine, simclock, time
+from simdevices import KeypadMatrix
+from eventer import Eventer
+from eventoid_keypad import EventoidKeypadPolled, EventoidKeypadNonPolled, keys_down
+
+EVENT_PRESS   = const(0)
+EVENT_RELEASE = const(1)
+EVENT_CHORD   = const(2)
+
+PINS_ROWS = (7,6,5,4)
+PINS_COLS = (3,2,1,0)
+
+def test_blocking_scan():
+    eventer = Eventer()
+    keypad = KeypadMatrix(PINS_ROWS, PINS_COLS)
+    eventer.register(EventoidKeypadPolled(eventer, (EVENT_PRESS, EVENT_RELEASE), PINS_ROWS, PINS_COLS))
+    keypad.press(2, 1)
+    t0 = time.ticks_ms()
+    eventer.poll()
+    assert time.ticks_diff(time.ticks_ms(), t0) == 2*35            # slept after rows 0 and 1
+    assert [(e[0], e[2]) for e in run(eventer, 1)] == [(EVENT_PRESS, (2, 1))]
+
+def test_incremental_scan():
+    eventer = Eventer()
+    keypad = KeypadMatrix(PINS_ROWS, PINS_COLS)
+    eventer.register(EventoidKeypadPolled(eventer, (EVENT_PRESS, EVENT_RELEASE), PINS_ROWS, PINS_COLS,
+                                          row_delay_ms=5, incremental=True))
+    t0 = time.ticks_ms()
+    eventer.poll()
+    assert time.ticks_diff(time.ticks_ms(), t0) == 0                # never sleeps
+    keypad.press(3, 0)
+    keypad.press(1, 2)
+    events = run(eventer, 40)
+    assert [(e[0], e[2]) for e in events] == [(EVENT_PRESS, (1, 2)), (EVENT_PRESS, (3, 0))]
+    keypad.release(1, 2)
+    events = run(eventer, 40)
+    assert [(e[0], e[2]) for e in events] == [(EVENT_RELEASE, (1, 2))]
+
+def test_multi_and_chord():
+    for incremental in (False, True):
+        machine.sim_reset()
+        eventer = Eventer()
+        keypad = KeypadMatrix(PINS_ROWS, PINS_COLS)
+        eo = EventoidKeypadPolled(eventer, (EVENT_PRESS, EVENT_RELEASE, EVENT_CHORD), PINS_ROWS, PINS_COLS,
+                                  row_delay_ms=2, incremental=incremental, multi=True)
+        eventer.register(eo)
+        keypad.press(0, 0)
+        keypad.press(0, 3)
+        keypad.press(2, 2)
+        events = run(eventer, 20)
+        assert [(e[0], e[2]) for e in events if e[0] != EVENT_CHORD] == \
+               [(EVENT_PRESS, (0, 0)), (EVENT_PRESS, (0, 3)), (EVENT_PRESS, (2, 2))]
+        chords = [e[2] for e in events if e[0] == EVENT_CHORD]
+        assert len(chords) == 1
+        assert keys_down(chords[0], len(PINS_COLS)) == [(0, 0), (0, 3), (2, 2)]
+        assert len(run(eventer, 20)) == 0                            # nothing changed, nothing sent
+
+def test_nonpolled():
+    eventer = Eventer()
+    keypad = KeypadMatrix(PINS_ROWS, PINS_COLS)
+    eo = EventoidKeypadNonPolled(eventer, (EVENT_PRESS, EVENT_RELEASE, EVENT_CHORD), PINS_ROWS, PINS_COLS)
+    eventer.register(eo)
+    assert not eo.is_polled()
+    assert drain(eventer, (0, 2)) == []
+    keypad.press(1, 2)
+    assert drain(eventer, (0, 2)) == [(EVENT_PRESS, (1, 2)), (EVENT_CHORD, 1 << (1*4 + 2))]
+    keypad.press(3, 0)
+    assert drain(eventer, (0, 2)) == [(EVENT_PRESS, (3, 0)), (EVENT_CHORD, (1 << (1*4 + 2)) | (1 << (3*4 + 0)))]
+    keypad.release(1, 2)
+    keypad.release(3, 0)
+    assert drain(eventer, (0, 2)) == [(EVENT_RELEASE, (1, 2)), (EVENT_CHORD, 1 << (3*4 + 0)),
+                              (EVENT_RELEASE, (3, 0)), (EVENT_CHORD, 0)]
+    for row in eo.pins_rows:                                        # left waiting for the next key
+        assert row.value() == 1
+
+def test_nonpolled_held_at_start():
+    eventer = Eventer()
+    keypad = KeypadMatrix(PINS_ROWS, PINS_COLS)
+    keypad.press(0, 1)
+    eventer.register(EventoidKeypadNonPolled(eventer, (EVENT_PRESS, EVENT_RELEASE), PINS_ROWS, PINS_COLS))
+    assert drain(eventer, (0, 2)) == [(EVENT_PRESS, (0, 1))]
+
+def test_nonpolled_change_during_scan():
+    eventer = Eventer()
+    keypad = KeypadMatrix(PINS_ROWS, PINS_COLS)
+    eventer.register(EventoidKeypadNonPolled(eventer, (EVENT_PRESS, EVENT_RELEASE), PINS_ROWS, PINS_COLS))
+    simclock.clock.call_after_ms(0.12, lambda: keypad.press(0, 3))  # after row 0 has been read
+    keypad.press(2, 0)
+    assert drain(eventer, (0, 2)) == [(EVENT_PRESS, (2, 0)), (EVENT_PRESS, (0, 3))] # 2nd caught by the re-check
+
+simtest.run_tests(globals())
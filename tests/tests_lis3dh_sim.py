@@ -0,0 +1,92 @@
+# tests_lis3dh_sim.py: tests for the lis3dh eventoid against a simulated LIS3DH, run on the host
+#
+# (tests_lis3dh.py runs on the MCU, against a real one.)  This runs under CPython against the
+#   simulated machine module in ../sim:
+#       python tests/tests_lis3dh_sim.py
+#
+# Last modified 16-Oct-2026 23:45
+
+import simtest
+simtest.setup()
+
+from simtest import run
+import machine, time
+from machine import Pin, I2C
+from simdevices import LIS3DH, LIS3DHDriver, lis3dh_shock
+from eventer import Eventer
+from eventoid_lis3dh import EventoidLIS3DH
+
+EVENT_RISING  = const(0)
+EVENT_FALLING = const(1)
+
+I2CADDR_LIS3DH = const(0x18)
+
+PIN_INT1 = 20
+PIN_INT2 = 21
+
+def setup(fifo, int1=None, int2=None):
+    i2c = I2C(0)
+    chip = LIS3DH(i2c, I2CADDR_LIS3DH, PIN_INT1, PIN_INT2)
+    driver = LIS3DHDriver(i2c)
+    chip.sim_func(lis3dh_shock(500))
+    time.sleep_ms(20)                                              # a couple of samples to start with
+    eventer = Eventer()
+    eo = EventoidLIS3DH(eventer, ((EVENT_RISING, EVENT_FALLING), None, (EVENT_RISING, EVENT_FALLING)), driver,
+                        fifo=fifo, int1=int1, int2=int2)
+    eo.set_thresholds_g((1.5, 1.5, 0.5))
+    eo.set_halfwidths_g((0.5, 0.5, 0.1))
+    eventer.register(eo)
+    return (i2c, eventer, eo)
+
+def test_polled_misses_shock():
+    (i2c, eventer, eo) = setup(False)
+    assert eo.prev_alarm == [False, False, True]
+    assert run(eventer, 1000, 50) == []                            # polled too slowly to see it
+
+def test_fifo():
+    (i2c, eventer, eo) = setup(True)
+    n0 = i2c.transactions
+    events = run(eventer, 1000, 50)
+    assert [(e[0], e[2]) for e in events] == [(EVENT_RISING, 0), (EVENT_FALLING, 0)]
+    assert abs(time.ticks_diff(events[0][1], 500)) <= 10           # interpolated timestamps
+    assert abs(time.ticks_diff(events[1][1], 520)) <= 10
+    assert i2c.transactions - n0 <= 2 * (1000 // 160 + 1)          # FIFO_SRC + one burst per drain
+    assert eo.overruns == 0
+    eventer.poll()                                                 # (overdue) drain
+    assert eo.ms_to_deadline(time.ticks_ms()) == 160               # the next one, once it's half full
+
+def test_fifo_overrun():
+    (i2c, eventer, eo) = setup(True)
+    time.sleep_ms(1000)                                            # more than 32 samples behind
+    eventer.poll()
+    assert eo.overruns == 1
+
+def test_interrupts():
+    for wired in (True, False):                                    # INT2 wired, and both on INT1
+        machine.sim_reset()
+        int2 = Pin(PIN_INT2, Pin.IN) if wired else None
+        (i2c, eventer, eo) = setup(False, Pin(PIN_INT1, Pin.IN), int2)
+        assert not eo.is_polled()
+        assert eo.prev_alarm == [False, False, True]
+        n0 = i2c.transactions
+        assert run(eventer, 400, 10) == []
+        assert i2c.transactions == n0                              # idle: no I2C traffic at all
+        events = run(eventer, 600, 10)
+        assert [(e[0], e[1], e[2]) for e in events] == [(EVENT_RISING, 500, 0), (EVENT_FALLING, 520, 0)]
+        assert eo.interrupts <= 3                                  # X in alarm wakes it for Z too
+        repr(eo)
+
+def test_interrupt_thresholds():
+    i2c = I2C(0)
+    LIS3DH(i2c, I2CADDR_LIS3DH, PIN_INT1)
+    eventer = Eventer()
+    eo = EventoidLIS3DH(eventer, ((EVENT_RISING, EVENT_FALLING), None, None), LIS3DHDriver(i2c),
+                        int1=Pin(PIN_INT1, Pin.IN))
+    eo.set_thresholds_g((0.2, 0.0, 0.0))
+    try:
+        eo.set_halfwidths_g((0.3, 0.0, 0.0))                       # band goes below 0g
+        assert False
+    except Exception as e:
+        assert type(e).__name__ == "EventoidException"
+
+simtest.run_tests(globals())
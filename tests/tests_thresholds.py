@@ -0,0 +1,106 @@
+# tests_thresholds.py: tests for the multi-channel hysteresis thresholds and the eventoids using them, run on the host
+#
+# This runs under CPython against the simulated machine module in ../sim:
+#       python tests/tests_thresholds.py
+#
+# Last modified 16-Oct-2026 23:45
+
+import simtest
+simtest.setup()
+
+import random
+from machine import Pin
+from eventer import Eventer
+import thresholds
+from thresholds import Thresholds
+from eventoid_tilt_and_speed import EventoidTiltAndSpeed
+
+EVENT_SAFE   = const(0)
+EVENT_DANGER = const(1)
+
+PIN_PULSE = 20
+
+def check_bands(th):
+    th.set((10, None, -5), (2, 0, 1))
+    assert th.reset((10, 50, -10)) == 0b001                        # at its threshold is in alarm; Y is unused
+    assert th.update((8.5, 50, -5)) == 0                           # inside the bands
+    assert th.update((7.5, 99, -3.5)) == 0b101                     # X below 8, Z above -4
+    assert th.alarms == 0b100
+    assert th.update((12, 99, -4.5)) == 0                          # Z still inside its band, X not above 12
+    assert th.update((12.5, 99, -6.5)) == 0b101
+    assert th.alarms == 0b001 and th.alarmed(0) and not th.alarmed(1)
+    th.set_channel(0, None)                                        # taking X out of use takes it out of alarm
+    assert th.alarms == 0
+    assert th.update((99, 99, -99)) == 0
+
+def test_bands():
+    check_bands(Thresholds(3))
+
+def test_scaled():
+    th = Thresholds(2, scale=16380, typecode='i')                  # thresholds in g, samples in counts
+    th.set((1.5, 0.5), (0.5, 0.1))
+    th.reset((0, 16380))
+    assert th.alarms == 0b10
+    assert th.update((32760, 16380)) == 0                          # 2g isn't above 2g
+    assert th.update((32761, 6551)) == 0b11                        # 0.4g is 6552 counts
+    assert th.alarms == 0b01
+
+# The NumPy path (Thresholds._update_numpy()) can only be checked where NumPy is installed; without
+#   it, these tests are reported as SKIPPED and that path is unverified.
+
+def test_numpy():
+    if thresholds.numpy is None:
+        simtest.skip("NumPy isn't installed")
+    th = Thresholds(3, use_numpy=True)
+    assert th._np
+    check_bands(th)
+    th = Thresholds(40)
+    assert th._np
+    th.set([i for i in range(40)], [0.5] * 40)
+    th.reset([-1] * 40)
+    assert th.update([i + 1 for i in range(40)]) == (1 << 40) - 1
+    assert th.update([i - 1 for i in range(40)]) == (1 << 40) - 1
+    assert th.alarms == 0
+
+def test_numpy_matches_loop():
+    if thresholds.numpy is None:
+        simtest.skip("NumPy isn't installed")
+    rng = random.Random(23)
+    th_np   = Thresholds(40, use_numpy=True)
+    th_loop = Thresholds(40, use_numpy=False)
+    assert th_np._np and not th_loop._np
+    centers = [rng.uniform(-10, 10) for _ in range(40)]
+    widths  = [rng.uniform(0, 2) for _ in range(40)]
+    for th in (th_np, th_loop):
+        th.set(centers, widths)
+        th.reset([0] * 40)
+    for _ in range(200):
+        values = [c + rng.uniform(-3, 3) for c in centers]
+        assert th_np.update(values) == th_loop.update(values)
+        assert th_np.alarms == th_loop.alarms
+
+class FakeAccelerometer:
+    def __init__(self):
+        self.acceleration = (0.0, 4.9, 0.0)                        # tilt 45
+
+def test_tilt_and_speed():
+    acc = FakeAccelerometer()
+    eventer = Eventer()
+    eo = EventoidTiltAndSpeed(eventer, (EVENT_SAFE, EVENT_DANGER), acc, Pin(PIN_PULSE, Pin.IN))
+    eventer.register(eo)
+
+    def speed(s):
+        eo.set_speed(s)
+        eventer.poll()
+        e = eventer.next()
+        return None if e is None else e[0]
+
+    assert speed(49) is None                                       # inside the band around 45
+    assert speed(50) == EVENT_DANGER
+    assert eo.was_in_danger
+    assert speed(42) is None
+    assert speed(40) == EVENT_SAFE
+    acc.acceleration = (0.0, 2.45, 0.0)                            # tilt 22.5: now too fast for it
+    assert speed(40) == EVENT_DANGER
+
+simtest.run_tests(globals())
@@ -0,0 +1,154 @@
+# tests_usonic.py: tests for the ultrasonic ranging eventoid(s), run on the host
+#
+# This runs under CPython against the simulated machine module in ../sim:
+#       python tests/tests_usonic.py
+#
+# Last modified 16-Oct-2026 23:45
+
+import simtest
+simtest.setup()
+
+from simtest import run
+import simclock, time
+from machine import Pin
+from simdevices import UltrasonicSensor
+from eventer import Eventer
+from eventoid_uson2z import EventoidUsonic2ZonesPolled, UsonicAsyncRanger, USONIC_TIMEOUT
+from eventoid_usonnz import EventoidUsonicZonesPolled
+from eventoid import bisect_left, bisect_right
+from filters import EMAFilter
+
+EVENT_OUTER_ENTER = const(0)
+EVENT_OUTER_EXIT  = const(1)
+EVENT_INNER_ENTER = const(2)
+EVENT_INNER_EXIT  = const(3)
+
+PIN_TRIGGER = 14
+PIN_ECHO    = 15
+
+ZONES = ((600, (EVENT_OUTER_ENTER, EVENT_OUTER_EXIT)), (300, (EVENT_INNER_ENTER, EVENT_INNER_EXIT)))
+
+clock = simclock.clock
+
+def test_ranger():
+    sensor = UltrasonicSensor(PIN_TRIGGER, PIN_ECHO, distance_mm=500)
+    ranger = UsonicAsyncRanger(Pin(PIN_TRIGGER), Pin(PIN_ECHO))
+    assert ranger.result_mm() is None
+    ranger.start()
+    assert ranger.busy and (ranger.result_mm() is None)
+    clock.advance_ms(5)
+    assert ranger.result_mm() == 500
+    assert ranger.result_mm() is None                               # only reported once
+    sensor.distance_mm = None
+    ranger.start()
+    clock.advance_ms(29)
+    assert ranger.result_mm() is None
+    clock.advance_ms(2)
+    assert ranger.result_mm() == USONIC_TIMEOUT
+
+def test_async_zones():
+    sensor = UltrasonicSensor(PIN_TRIGGER, PIN_ECHO, distance_mm=1000)
+    eventer = Eventer()
+    eo = EventoidUsonic2ZonesPolled(eventer, UsonicAsyncRanger(Pin(PIN_TRIGGER), Pin(PIN_ECHO)),
+                                    (20, 2000), ZONES, 20, None, period_ms=50)
+    eventer.register(eo)
+    assert run(eventer, 200, fields=(0, 2)) == []
+    assert sensor.triggers == 4                                     # one measurement every period_ms
+
+    t0 = clock.now_us
+    for _ in range(100):                                            # no poll waits for an echo
+        eventer.poll()
+    assert clock.now_us - t0 < 100 * 20
+
+    sensor.distance_mm = 450
+    assert run(eventer, 100, fields=(0, 2)) == [(EVENT_OUTER_ENTER, 450)]
+    sensor.distance_mm = 200
+    assert run(eventer, 100, fields=(0, 2)) == [(EVENT_INNER_ENTER, 200)]
+    sensor.distance_mm = None                                       # nothing in range: no change
+    assert run(eventer, 200, fields=(0, 2)) == []
+    sensor.distance_mm = 1200
+    assert run(eventer, 100, fields=(0, 2)) == [(EVENT_INNER_EXIT, 1200), (EVENT_OUTER_EXIT, 1200)]
+
+def dropping_echoes(mm):
+    """misses the echo of two measurements in every five, with the object steady at mm"""
+    return lambda n: None if (n % 5) >= 3 else mm
+
+def test_dropped_echoes_filtered():
+    sensor = UltrasonicSensor(PIN_TRIGGER, PIN_ECHO, distance_mm=1000)
+    sensor.sim_func(dropping_echoes(1000))
+    eventer = Eventer()
+    eo = EventoidUsonic2ZonesPolled(eventer, UsonicAsyncRanger(Pin(PIN_TRIGGER), Pin(PIN_ECHO)),
+                                    (20, 2000), ZONES, 20, None, period_ms=50, filter=EMAFilter(2))
+    eventer.register(eo)
+    assert run(eventer, 2000, fields=(0, 2)) == []                  # timeouts never reach the filter
+    assert sensor.triggers >= 35
+
+class RangerBlocking:
+    def __init__(self, mm):
+        self.mm = mm
+    def range_mm(self):
+        time.sleep_ms(15)
+        return self.mm
+
+def test_blocking_zones():
+    eventer = Eventer()
+    ranger = RangerBlocking(1000)
+    eventer.register(EventoidUsonic2ZonesPolled(eventer, ranger, (20, 2000), ZONES, 20, None))
+    assert run(eventer, 5, fields=(0, 2)) == []
+    ranger.mm = 250
+    assert run(eventer, 1, fields=(0, 2)) == [(EVENT_OUTER_ENTER, 250), (EVENT_INNER_ENTER, 250)]
+
+def test_bisect():
+    a = (10, 20, 20, 30)
+    assert [bisect_left(a, x) for x in (5, 10, 20, 25, 30, 35)] == [0, 0, 1, 3, 3, 4]
+    assert [bisect_right(a, x) for x in (5, 10, 20, 25, 30, 35)] == [0, 1, 3, 3, 4, 4]
+
+def test_n_zones():
+    eventer = Eventer()
+    ranger = RangerBlocking(1000)
+    zones = [(mm, (i*2, i*2+1)) for (i, mm) in enumerate((200, 800, 400, 600))]     # any order
+    eo = EventoidUsonicZonesPolled(eventer, ranger, (20, 2000), zones, 20)
+    eventer.register(eo)
+    (ENTER_200, EXIT_200, ENTER_800, EXIT_800, ENTER_400, EXIT_400, ENTER_600, EXIT_600) = range(8)
+    def step(mm):
+        ranger.mm = mm
+        return [e[0] for e in run(eventer, 1, fields=(0, 2))]
+
+    assert step(1000) == []
+    assert step(790)  == []                                        # not far enough past 800
+    assert step(300)  == [ENTER_800, ENTER_600, ENTER_400]
+    assert eo.zone == 3
+    assert step(410)  == []                                        # not far enough back past 400
+    assert step(430)  == [EXIT_400]
+    assert step(390)  == []
+    assert step(50)   == [ENTER_400, ENTER_200]
+    assert step(5)    == []                                        # outside of range_window
+    assert step(1500) == [EXIT_200, EXIT_400, EXIT_600, EXIT_800]
+    assert eo.zone == 0
+    repr(eo)
+
+def test_n_zones_async():
+    sensor = UltrasonicSensor(PIN_TRIGGER, PIN_ECHO, distance_mm=1000)
+    eventer = Eventer()
+    eo = EventoidUsonicZonesPolled(eventer, UsonicAsyncRanger(Pin(PIN_TRIGGER), Pin(PIN_ECHO)),
+                                   (20, 2000), ZONES, 20, period_ms=50)
+    eventer.register(eo)
+    assert run(eventer, 100, fields=(0, 2)) == []
+    sensor.distance_mm = 250
+    assert run(eventer, 100, fields=(0, 2)) == [(EVENT_OUTER_ENTER, 250), (EVENT_INNER_ENTER, 250)]
+    repr(EventoidUsonic2ZonesPolled(eventer, RangerBlocking(0), (20, 2000), ZONES, 20, None))
+
+def test_n_zones_dropped_echoes_filtered():
+    sensor = UltrasonicSensor(PIN_TRIGGER, PIN_ECHO)
+    sensor.sim_func(dropping_echoes(700))                           # just outside of the outer zone
+    eventer = Eventer()
+    zones = ZONES + ((100, (EVENT_INNER_ENTER + 2, EVENT_INNER_EXIT + 2)),)
+    eo = EventoidUsonicZonesPolled(eventer, UsonicAsyncRanger(Pin(PIN_TRIGGER), Pin(PIN_ECHO)),
+                                   (20, 2000), zones, 20, period_ms=50, filter=EMAFilter(2))
+    eventer.register(eo)
+    assert run(eventer, 2000, fields=(0, 2)) == []
+    assert eo.zone == 0
+    sensor.sim_func(dropping_echoes(250))                           # still there to be found between the drops
+    assert [e[0] for e in run(eventer, 1000, fields=(0, 2))] == [EVENT_OUTER_ENTER, EVENT_INNER_ENTER]
+
+simtest.run_tests(globals())
@@ -0,0 +1,158 @@
+# thresholds.py -- hysteresis thresholds for several channels, checked all at once
+#
+# Eventoids that watch a few related values (the axes of an accelerometer, etc.) each have to keep a
+#   threshold, a hysteresis halfwidth and an alarm state per channel, and check every new sample of
+#   every channel against them.  Thresholds does this for n channels.  The edges of the bands are kept
+#   in arrays, already multiplied by a scale factor into the units that the samples come in (e.g. m/s^2
+#   or the sensor's raw counts, when the thresholds are given in g), so that checking a sample is only
+#   comparisons.  update() checks every channel in one pass and returns a mask with the bit set for
+#   each channel whose alarm state changed, which the eventoid turns into events:
+#
+#       th = Thresholds(3, scale=G_MPS)
+#       th.set((1.5, 1.5, 0.5), (0.5, 0.5, 0.1))
+#       th.reset(accelerometer.acceleration)
+#       ...
+#       changed = th.update(accelerometer.acceleration)
+#       if changed & 1:
+#           ... X has just gone into alarm if (th.alarms & 1), else out of it
+#
+# A channel goes into alarm when its sample rises above threshold+halfwidth, and stays in alarm until
+#   it falls below threshold-halfwidth.  A channel whose threshold is None is never in alarm.  The
+#   alarm states are kept as the bits of the integer alarms (bit i for channel i), so up to 30 channels
+#   can be checked without allocating memory on MicroPython.
+#
+# On CPython with NumPy installed, once there are enough channels for it to pay off, the channels are
+#   checked with a few vectorized array operations.  Otherwise (always, on MicroPython) update() is a
+#   loop over the arrays, which doesn't allocate memory, so it can be used wherever samples arrive.
+#
+# Last modified 16-Oct-2026 23:50
+
+from array import array
+
+try:
+    import numpy                    # only on CPython, and only if it's installed
+except ImportError:
+    numpy = None
+
+NUMPY_MIN_CHANNELS = 16             # fewer than this are quicker to check in a loop, even on CPython
+
+_INT_TYPECODES = "bBhHiIlL"
+
+class Thresholds:
+    """Hysteresis thresholds for n channels, returning a mask of the channels whose alarm state changed."""
+
+    def __init__(self, n, scale=1, typecode='f', use_numpy=None):
+        """
+        n - number of channels [type: int]
+        scale - sample units per threshold unit, e.g. G_MPS for samples in m/s^2 and thresholds in g
+        typecode - array typecode that the scaled thresholds are stored as, 'i' if the samples are
+                   integers (avoiding float arithmetic on the MCU), else 'f' [type: str]
+        use_numpy - (optional) check the channels with NumPy (if it's available), default if n is at
+                    least NUMPY_MIN_CHANNELS [type: bool]
+        """
+        self.n      = n
+        self.scale  = scale
+        self.alarms = 0                 # bit i set while channel i is in alarm
+        self._int   = typecode in _INT_TYPECODES
+        self._big   = 0x3FFFFFFF if self._int else 1e30   # band edges of a channel that's never alarmed
+        self._enabled = 0               # bit i set if channel i has a threshold
+
+        if use_numpy is None:
+            use_numpy = n >= NUMPY_MIN_CHANNELS
+        self._np = use_numpy and (numpy is not None) and (n <= 62)
+        if self._np:
+            dtype = numpy.int64 if self._int else numpy.float64
+            self._center = numpy.zeros(n, dtype)
+            self._high   = numpy.full(n, self._big, dtype)
+            self._low    = numpy.full(n, -self._big, dtype)
+            self._bits   = numpy.left_shift(1, numpy.arange(n, dtype=numpy.int64))
+        else:
+            self._center = array(typecode, [0] * n)
+            self._high   = array(typecode, [self._big] * n)
+            self._low    = array(typecode, [-self._big] * n)
+
+    def __repr__(self):
+        return "Thresholds(n="+str(self.n)+",scale="+str(self.scale)+",alarms="+hex(self.alarms)+\
+               ",numpy="+str(self._np)+")"
+
+    def _scaled(self, x):
+        x *= self.scale
+        return int(x) if self._int else x
+
+    def set_channel(self, i, threshold, halfwidth=0):
+        """
+        Set one channel's hysteresis band, in threshold units.  Its alarm state is kept, unless
+          threshold is None, which takes it out of alarm and stops it from alarming.
+        """
+        bit = 1 << i
+        if threshold is None:
+            self._center[i] = 0
+            self._high[i]   = self._big
+            self._low[i]    = -self._big
+            self._enabled  &= ~bit
+            self.alarms    &= ~bit
+            return
+        self._center[i] = self._scaled(threshold)
+        self._high[i]   = self._scaled(threshold + halfwidth)
+        self._low[i]    = self._scaled(threshold - halfwidth)
+        self._enabled  |= bit
+
+    def set(self, thresholds, halfwidths=None):
+        """
+        Set every channel's hysteresis band.
+        thresholds - per-channel thresholds (the center of their bands), None for an unused channel
+        halfwidths - (optional) per-channel halfwidths of the bands, default 0 (no hysteresis)
+        """
+        for i in range(self.n):
+            self.set_channel(i, thresholds[i], 0 if halfwidths is None else halfwidths[i])
+
+    def reset(self, values=None):
+        """
+        Set the alarm states without raising any changes: from a sample of every channel (in alarm if at
+          least at its threshold), or all out of alarm if there's no sample.  Returns the alarms.
+        """
+        alarms = 0
+        if values is not None:
+            center = self._center
+            bit = 1
+            for i in range(self.n):
+                if values[i] >= center[i]:
+                    alarms |= bit
+                bit <<= 1
+        self.alarms = alarms & self._enabled
+        return self.alarms
+
+    def alarmed(self, i):
+        return bool(self.alarms & (1 << i))
+
+    def update(self, values):
+        """
+        Check a sample of every channel [type: indexable of n numbers] against its band.
+        Returns the mask of channels whose alarm state changed (0 if none did).
+        """
+        if self._np:
+            return self._update_numpy(values)
+
+        alarms = self.alarms
+        high   = self._high
+        low    = self._low
+        bit = 1
+        for i in range(self.n):
+            if alarms & bit:
+                if values[i] < low[i]:
+                    alarms ^= bit
+            elif values[i] > high[i]:
+                alarms |= bit
+            bit <<= 1
+
+        changed = alarms ^ self.alarms
+        self.alarms = alarms
+        return changed
+
+    def _update_numpy(self, values):
+        v = numpy.asarray(values)
+        alarmed = (self._bits & self.alarms) != 0
+        now = numpy.where(alarmed, v >= self._low, v > self._high)
+        changed = int(numpy.bitwise_or.reduce(self._bits[now != alarmed], initial=0))
+        self.alarms ^= changed
+        return changed
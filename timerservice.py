@@ -0,0 +1,133 @@
+# timerservice.py -- shared scheduler for the timers of an Eventer
+#
+# Rather than polling every timer eventoid on every pass (each one reading the clock to find
+#   out that it hasn't expired yet), timers that use the service keep their expirations in a
+#   single min-heap, so that each poll pass only has to look at the soonest one.
+#   Starting a timer is O(log n), cancelling one is O(1) (the heap entry is just marked
+#   dead and thrown away when it reaches the top), and only expired timers are touched.
+#
+# Expirations are time.ticks_ms() values, which wrap around, so they are ordered with
+#   time.ticks_diff() instead of "<".  This is correct as long as all of the pending
+#   expirations are within half of the ticks period of each other (days, for ticks_ms).
+#
+# Last modified 16-Oct-2026 11:40
+
+import time
+from micropython import const
+
+# heap entry layout: [expiration_ticks_ms, sequence#, timer-or-None-if-cancelled]
+_EXP   = const(0)
+_SEQ   = const(1)
+_TIMER = const(2)
+
+def _before(a, b):
+    d = time.ticks_diff(a[_EXP], b[_EXP])
+    if d != 0:
+        return d < 0
+    return a[_SEQ] < b[_SEQ]      # same expiration: first scheduled, first expired
+
+class TimerService:
+    """
+    Min-heap of pending timer expirations, polled once per Eventer poll pass.
+    Timers scheduled here must provide an _expire(t) method, called when they come due.
+    """
+
+    def __init__(self):
+        self._heap      = []
+        self._seq       = 0
+        self._cancelled = 0       # dead entries still in the heap
+
+    def __repr__(self):
+        return "TimerService(pending="+str(len(self))+",dead="+str(self._cancelled)+")"
+
+    def __len__(self):
+        return len(self._heap) - self._cancelled
+
+    def schedule(self, expiration, timer):
+        """Add timer to expire at ticks_ms value expiration.  Returns the entry to cancel() it with."""
+        entry = [expiration, self._seq, timer]
+        self._seq = (self._seq + 1) & 0x3FFFFFFF
+        heap = self._heap
+        heap.append(entry)
+        self._sift_up(len(heap) - 1)
+        return entry
+
+    def cancel(self, entry):
+        """Prevent a scheduled entry from expiring.  Cancelling a cancelled/expired entry is harmless."""
+        if entry[_TIMER] is None:
+            return
+        entry[_TIMER] = None
+        self._cancelled += 1
+        if self._cancelled > (len(self._heap) // 2):     # mostly dead: rebuild without them
+            self._compact()
+
+    def ms_to_deadline(self, now):
+        """msecs from now until the soonest pending expiration, or None if there are none."""
+        top = self._top()
+        return None if top is None else time.ticks_diff(top[_EXP], now)
+
+    def poll(self):
+        """
+        Expire the soonest timer if it is due.  Like the rest of polling, only one timer is
+          expired per call.  Returns True if its timer queued an event, else False.
+        """
+        top = self._top()
+        if top is None:
+            return False
+        t = time.ticks_ms()
+        if time.ticks_diff(t, top[_EXP]) < 0:
+            return False
+        self._pop()
+        timer = top[_TIMER]
+        top[_TIMER] = None        # expired: a later cancel() of this entry is a no-op
+        return timer._expire(t)
+
+    def _top(self):
+        heap = self._heap
+        while heap and (heap[0][_TIMER] is None):
+            self._pop()
+            self._cancelled -= 1
+        return heap[0] if heap else None
+
+    def _pop(self):
+        heap = self._heap
+        last = heap.pop()
+        if heap:
+            top = heap[0]
+            heap[0] = last
+            self._sift_down(0)
+            return top
+        return last
+
+    def _compact(self):
+        self._heap = [e for e in self._heap if e[_TIMER] is not None]
+        self._cancelled = 0
+        for i in range((len(self._heap) // 2) - 1, -1, -1):
+            self._sift_down(i)
+
+    def _sift_up(self, i):
+        heap = self._heap
+        entry = heap[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if not _before(entry, heap[parent]):
+                break
+            heap[i] = heap[parent]
+            i = parent
+        heap[i] = entry
+
+    def _sift_down(self, i):
+        heap = self._heap
+        n = len(heap)
+        entry = heap[i]
+        while True:
+            child = 2*i + 1
+            if child >= n:
+                break
+            if (child + 1 < n) and _before(heap[child+1], heap[child]):
+                child += 1
+            if not _before(heap[child], entry):
+                break
+            heap[i] = heap[child]
+            i = child
+        heap[i] = entry
@@ -0,0 +1,157 @@
+# transitions.py -- declarative transition tables for dispatching a state machine's events
+#
+# Instead of writing event_process() as nested if/elif chains over the current state and
+#   event (which are evaluated one comparison at a time for every event), the state machine
+#   can be described as a list of transitions:
+#
+#       (state, event, action, next_state)
+#
+#   which TransitionTable checks for mistakes and completeness when it's built, and compiles
+#   into a table indexed directly by state and event.  When the states and events are (mostly)
+#   consecutive small integers, as in the examples, the table is a list of lists; otherwise it's
+#   a dict of dicts.  Either way, dispatching an event is a couple of lookups rather than a
+#   search.
+#
+# A TransitionTable is called just like event_process(), so it is passed to Eventer.loop() in
+#   its place:
+#
+#       table = TransitionTable(STATES, EVENTS, (
+#                   (STATE_OFF, EVENT_PRESS,   led_on,  STATE_ON),
+#                   (STATE_ON,  EVENT_RELEASE, led_off, STATE_OFF),
+#                   (ANY,       EVENT_TIMER,   None,    SAME) ),
+#                   unhandled=UNHANDLED_ERROR)
+#       eventer.loop(table, STATE_OFF)
+#
+# Actions are called as action(state, event, event_msecs, event_data), or can be None if a
+#   transition has nothing to do.  Normally their return value is ignored, but if next_state
+#   is ACTION_DECIDES, the action's return value is the next state (e.g. for guarded transitions).
+#
+# Last modified 16-Oct-2026 17:30
+
+from eventer import StateMachineException
+
+class TransitionTableException(Exception):
+    pass
+
+class _Marker:
+    def __init__(self, name):
+        self.name = name
+    def __repr__(self):
+        return self.name
+
+ANY            = _Marker("ANY")             # (state|event) wildcard, overridden by any explicit transition
+SAME           = _Marker("SAME")            # next_state: stay in the current state
+ACTION_DECIDES = _Marker("ACTION_DECIDES")  # next_state: whatever the action returns
+
+# what to do with (state,event) pairs that no transition covers
+UNHANDLED_INCOMPLETE = 0   # don't allow any: raise TransitionTableException when the table is built
+UNHANDLED_ERROR      = 1   # raise StateMachineException when one is dispatched
+UNHANDLED_IGNORE     = 2   # do nothing and stay in the same state
+
+_UNHANDLED = _Marker("UNHANDLED")
+
+class TransitionTable:
+    """
+    Compiled (state x event) -> (action, next_state) table, callable as process_func for Eventer.loop().
+    """
+
+    def __init__(self, states, events, transitions, unhandled=UNHANDLED_INCOMPLETE, trace_info=None):
+        """
+        Check and compile a list of transitions.
+
+        states - every state of the machine [type: iterable]
+        events - every event that can be dispatched [type: iterable]
+        transitions - (state, event, action, next_state) tuples, where state and/or event may be ANY,
+                      action may be None, and next_state may be SAME or ACTION_DECIDES
+        unhandled - (optional) what to do with (state,event) pairs not covered [type: UNHANDLED_*]
+        trace_info - (optional) (state_str, event_str) dicts, as for Eventer, used in error messages
+        """
+        self.states = tuple(states)
+        self.events = tuple(events)
+        (self.state_str, self.event_str) = (None, None) if trace_info is None else trace_info
+        self.unhandled = unhandled
+
+        state_set = set(self.states)
+        event_set = set(self.events)
+        if (len(state_set) != len(self.states)) or (len(event_set) != len(self.events)):
+            raise TransitionTableException("duplicate states or events")
+
+        explicit = dict()      # (state,event) -> (action,next_state)
+        wild     = dict()      # the same, from transitions with ANY
+        for t in transitions:
+            if len(t) != 4:
+                raise TransitionTableException("transition must be (state, event, action, next_state): "+str(t))
+            (state, event, action, state_next) = t
+            if (state is not ANY) and (state not in state_set):
+                raise TransitionTableException("unknown state in "+self._str(state, event))
+            if (event is not ANY) and (event not in event_set):
+                raise TransitionTableException("unknown event in "+self._str(state, event))
+            if (state_next is not SAME) and (state_next is not ACTION_DECIDES) and (state_next not in state_set):
+                raise TransitionTableException("unknown next state in "+self._str(state, event))
+            if (action is not None) and not callable(action):
+                raise TransitionTableException("action isn't callable in "+self._str(state, event))
+            if (state_next is ACTION_DECIDES) and (action is None):
+                raise TransitionTableException("ACTION_DECIDES without an action in "+self._str(state, event))
+
+            target = wild if (state is ANY) or (event is ANY) else explicit
+            for s in (self.states if state is ANY else (state,)):
+                for e in (self.events if event is ANY else (event,)):
+                    if (s, e) in target:
+                        raise TransitionTableException("duplicate transition for "+self._str(s, e))
+                    target[(s, e)] = (action, state_next)
+
+        for (key, entry) in wild.items():
+            if key not in explicit:
+                explicit[key] = entry
+
+        missing = [(s, e) for s in self.states for e in self.events if (s, e) not in explicit]
+        if missing and (unhandled == UNHANDLED_INCOMPLETE):
+            raise TransitionTableException("no transition for "+", ".join([self._str(s, e) for (s, e) in missing]))
+        self.missing = missing
+
+        # compile into a list of lists if the states and events are dense enough, else a dict of dicts
+        entry_unhandled = (None, _UNHANDLED)
+        if self._dense(self.states, self.events):
+            rows = [None] * (max(self.states) + 1)
+            for s in self.states:
+                rows[s] = [entry_unhandled] * (max(self.events) + 1)
+        else:
+            rows = dict()
+            for s in self.states:
+                rows[s] = dict([(e, entry_unhandled) for e in self.events])
+        for ((s, e), entry) in explicit.items():
+            rows[s][e] = entry
+        self._rows = rows
+
+    def _dense(self, states, events):
+        for v in states + events:
+            if (not isinstance(v, int)) or (v < 0):
+                return False
+        return (max(states) + 1) * (max(events) + 1) <= 4 * len(states) * len(events)
+
+    def _str(self, state, event):
+        s = None if (self.state_str is None) or (state is ANY) else self.state_str.get(state)
+        e = None if (self.event_str is None) or (event is ANY) else self.event_str.get(event)
+        return "("+(str(state) if s is None else s)+","+(str(event) if e is None else e)+")"
+
+    def __repr__(self):
+        return "TransitionTable(states="+str(len(self.states))+",events="+str(len(self.events))+\
+               ",missing="+str(len(self.missing))+",rows="+type(self._rows).__name__+")"
+
+    def __call__(self, state, event, event_msecs, event_data):
+        """Dispatch one event: run its transition's action and return the next state."""
+        try:
+            (action, state_next) = self._rows[state][event]
+        except (IndexError, KeyError, TypeError):
+            raise StateMachineException("Undefined state/event "+self._str(state, event))
+
+        if state_next is _UNHANDLED:
+            if self.unhandled == UNHANDLED_IGNORE:
+                return state
+            raise StateMachineException("Unexpected "+self._str(state, event)+":"+str(event_data))
+
+        if action is not None:
+            ret = action(state, event, event_msecs, event_data)
+            if state_next is ACTION_DECIDES:
+                return ret
+        return state if state_next is SAME else state_next